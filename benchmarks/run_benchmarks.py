@@ -0,0 +1,284 @@
+# run_benchmarks.py
+# Benchmark the pipeline stages on synthetic WHR-shaped data of growing size.
+#
+# For every size a synthetic raw file (src/synthetic_data.py) is written into
+# a scratch project folder (data/ + results/), and the stages below run there
+# one after another, in a fresh process per size. Each stage is timed with the
+# pipeline instrumentation (src/instrument.py): wall and CPU time, peak memory
+# and bytes read/written, plus its sub-spans (load, fit, score, save, plot).
+#
+# Every run is appended to benchmarks/history.jsonl together with machine
+# metadata; the run is compared with the last earlier run on the same machine
+# and stages that got slower (or use more memory) beyond the tolerance are
+# flagged.
+#
+# Usage (from the project root):
+#   python benchmarks/run_benchmarks.py                        # 1e3, 1e4, 1e5 rows
+#   python benchmarks/run_benchmarks.py --sizes 1e3 1e5 1e7 --stages load prepare standardize
+#   python benchmarks/run_benchmarks.py --check                # exit 1 on a regression
+
+import argparse
+import contextlib
+import hashlib
+import importlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+from instrument import collect, span  # noqa: E402
+
+HISTORY_FILE = PROJECT_ROOT / "benchmarks" / "history.jsonl"
+SIZES = [1_000, 10_000, 100_000]
+TOLERANCE = 0.25       # relative slowdown / memory growth that counts as a regression
+MIN_WALL_S = 0.05      # stages faster than this are too noisy to compare
+RANDOM_STATE = 0
+
+
+@dataclass
+class Stage:
+    """One benchmarked stage: main(**params) of src/<module>.py (None = raw load only)."""
+
+    name: str
+    module: str | None
+    params: dict = field(default_factory=dict)
+    max_rows: int | None = None  # larger inputs are skipped (memory grows with n x resamples)
+
+
+STAGES = [
+    Stage("load", None),
+    Stage("prepare", "prepare_data"),
+    Stage("standardize", "standardize_data"),
+    Stage("kmeans", "run_kmeans",  # K sweep ("fit") + silhouette and other metrics ("score")
+          {"k_values": [3, 4, 5, 6], "n_init": 3, "random_state": 42, "n_jobs": 1}),
+    Stage("pca", "pca_clusters"),
+    Stage("regression", "gdp_residuals", {"by_cluster": True}),
+    Stage("interactions", "reginteractions",
+          {"n_boot": 200, "n_perm": 200, "cv_folds": 5, "cv_repeats": 1}, max_rows=100_000),
+    Stage("plot", "plot_gdp_happiness"),
+]
+
+
+def machine_metadata():
+    """Machine, interpreter and library versions of this run."""
+    import matplotlib
+    import numpy
+    import pandas
+    import sklearn
+
+    try:
+        memory_gb = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") / 1e9
+    except (ValueError, OSError, AttributeError):
+        memory_gb = None
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT,
+                                capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+
+    meta = {
+        "host": platform.node(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "memory_gb": round(memory_gb, 1) if memory_gb else None,
+        "python": platform.python_version(),
+        "numpy": numpy.__version__,
+        "pandas": pandas.__version__,
+        "sklearn": sklearn.__version__,
+        "matplotlib": matplotlib.__version__,
+        "commit": commit,
+    }
+    # runs are only compared with runs on the same kind of machine
+    key = json.dumps([meta[k] for k in ("host", "processor", "cpu_count", "memory_gb", "python")])
+    meta["machine_id"] = hashlib.sha256(key.encode()).hexdigest()[:12]
+    return meta
+
+
+def _run_stage(stage):
+    import load_data
+
+    # every pipeline step starts without parsed data (steps run in separate processes)
+    load_data._CACHE.clear()
+    if stage.module is None:
+        load_data.load_raw()
+        return
+    importlib.import_module(stage.module).main(**stage.params)
+
+
+def run_size(n_rows, stages, workdir, random_state=RANDOM_STATE):
+    """
+    Write the synthetic file for n_rows into workdir and run the stages there.
+    Returns one result per stage: wall/CPU time, peak memory, I/O and sub-spans.
+    """
+    from synthetic_data import write_csv
+
+    os.chdir(workdir)
+    for folder in ("data", "results"):
+        Path(folder).mkdir(exist_ok=True)
+    start = time.perf_counter()
+    write_csv("data/world-happiness-2024.csv", n_rows, random_state)
+    generate_s = time.perf_counter() - start
+
+    results = []
+    for stage in stages:
+        row = {"stage": stage.name, "n_rows": n_rows}
+        if stage.max_rows is not None and n_rows > stage.max_rows:
+            results.append(dict(row, status=f"skipped (more than {stage.max_rows} rows)"))
+            continue
+        collect()
+        with contextlib.redirect_stdout(io.StringIO()):
+            try:
+                with span(stage.name, cat="step", reset_peak=True):
+                    _run_stage(stage)
+                status = "ok"
+            except Exception as exc:  # later stages may depend on this one
+                status = f"failed: {type(exc).__name__}: {exc}"
+        records = collect()
+        total = records[-1]
+        sub = {}
+        for r in records[:-1]:
+            sub[r["name"]] = round(sub.get(r["name"], 0.0) + r["wall_s"], 4)
+        results.append(dict(
+            row,
+            status=status,
+            wall_s=round(total["wall_s"], 4),
+            cpu_s=round(total["cpu_s"], 4),
+            peak_rss_mb=total["peak_rss_mb"],
+            bytes_read=total["bytes_read"],
+            bytes_written=total["bytes_written"],
+            spans=sub,
+        ))
+        if status != "ok":
+            break
+    return {"n_rows": n_rows, "generate_s": round(generate_s, 3), "stages": results}
+
+
+def run_benchmarks(sizes=SIZES, stage_names=None, random_state=RANDOM_STATE, figures="full"):
+    """Run every size in its own fresh process (forked). Returns the run record."""
+    stages = [s for s in STAGES if stage_names is None or s.name in stage_names]
+    os.environ["MPLBACKEND"] = "Agg"
+    os.environ["HAPPINESS_FIGURES"] = figures
+    run = {
+        "run_id": time.strftime("%Y%m%dT%H%M%S"),
+        "machine": machine_metadata(),
+        "figures": figures,
+        "sizes": [],
+    }
+    context = multiprocessing.get_context("fork")
+    for n_rows in sizes:
+        with tempfile.TemporaryDirectory(prefix="happiness-bench-") as workdir:
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                result = pool.submit(run_size, n_rows, stages, workdir, random_state).result()
+        run["sizes"].append(result)
+        print_size(result)
+    return run
+
+
+def print_size(result):
+    print(f"\n{result['n_rows']:,} rows (synthetic file written in {result['generate_s']:.1f} s)")
+    print(f"  {'stage':<14}{'wall s':>9}{'cpu s':>9}{'peak MB':>10}{'read MB':>10}{'written MB':>12}  sub-spans")
+    for r in result["stages"]:
+        if "wall_s" not in r:
+            print(f"  {r['stage']:<14}{r['status']}")
+            continue
+        spans = ", ".join(f"{k} {v:.2f}" for k, v in r["spans"].items())
+        status = "" if r["status"] == "ok" else f"  [{r['status']}]"
+        print(f"  {r['stage']:<14}{r['wall_s']:>9.2f}{r['cpu_s']:>9.2f}{r['peak_rss_mb']:>10.1f}"
+              f"{r['bytes_read'] / 1e6:>10.1f}{r['bytes_written'] / 1e6:>12.1f}  {spans}{status}")
+
+
+def load_history(path=HISTORY_FILE):
+    if not Path(path).exists():
+        return []
+    with open(path) as fh:
+        return [json.loads(line) for line in fh if line.strip()]
+
+
+def append_history(run, path=HISTORY_FILE):
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a") as fh:
+        fh.write(json.dumps(run) + "\n")
+
+
+def find_baseline(run, history):
+    """Latest earlier run on the same machine with the same figure profile."""
+    for old in reversed(history):
+        same_machine = old["machine"]["machine_id"] == run["machine"]["machine_id"]
+        if same_machine and old.get("figures") == run["figures"] and old["run_id"] != run["run_id"]:
+            return old
+    return None
+
+
+def compare(run, baseline, tolerance=TOLERANCE, min_wall_s=MIN_WALL_S):
+    """
+    Stages of `run` that are slower or use more memory than in `baseline`
+    by more than `tolerance` (relative). Returns a list of messages.
+    """
+    def by_key(record):
+        return {(r["stage"], size["n_rows"]): r
+                for size in record["sizes"] for r in size["stages"] if r.get("status") == "ok"}
+
+    old, new = by_key(baseline), by_key(run)
+    regressions = []
+    for key in sorted(new.keys() & old.keys(), key=lambda k: (k[1], k[0])):
+        before, after = old[key], new[key]
+        stage, n_rows = key
+        if max(before["wall_s"], after["wall_s"]) >= min_wall_s and after["wall_s"] > before["wall_s"] * (1 + tolerance):
+            regressions.append(f"{stage} @ {n_rows:,} rows: wall {before['wall_s']:.2f} s -> {after['wall_s']:.2f} s")
+        if after["peak_rss_mb"] > before["peak_rss_mb"] * (1 + tolerance):
+            regressions.append(f"{stage} @ {n_rows:,} rows: peak memory "
+                               f"{before['peak_rss_mb']:.0f} MB -> {after['peak_rss_mb']:.0f} MB")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline stages on synthetic data.")
+    parser.add_argument("--sizes", nargs="+", type=float, default=SIZES,
+                        help="numbers of rows, e.g. 1e3 1e5 1e7 (default: 1e3 1e4 1e5)")
+    parser.add_argument("--stages", nargs="+", choices=[s.name for s in STAGES], default=None,
+                        help="stages to run (default: all; later stages need the earlier ones)")
+    parser.add_argument("--figures", choices=["full", "preview", "none"], default="full",
+                        help="figure profile for the plotting stages")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE,
+                        help="relative slowdown / memory growth flagged as a regression (default 0.25)")
+    parser.add_argument("--history", default=str(HISTORY_FILE), help="JSON lines file with earlier runs")
+    parser.add_argument("--no-save", action="store_true", help="do not append this run to the history")
+    parser.add_argument("--check", action="store_true", help="exit with status 1 if a regression is found")
+    args = parser.parse_args()
+
+    history = load_history(args.history)
+    run = run_benchmarks([int(n) for n in args.sizes], args.stages, figures=args.figures)
+
+    baseline = find_baseline(run, history)
+    regressions = []
+    if baseline is None:
+        print("\nNo earlier run on this machine to compare with.")
+    else:
+        regressions = compare(run, baseline, args.tolerance)
+        print(f"\nCompared with run {baseline['run_id']} (commit {baseline['machine'].get('commit')}):")
+        for message in regressions:
+            print(f"  REGRESSION {message}")
+        if not regressions:
+            print(f"  no stage slower or larger by more than {args.tolerance:.0%}")
+
+    if not args.no_save:
+        append_history(run, args.history)
+        print(f"Saved run {run['run_id']} to: {args.history}")
+    if args.check and regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
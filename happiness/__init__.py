@@ -0,0 +1,3 @@
+# happiness
+# Command line entry point for the analysis steps (python -m happiness, see
+# __main__.py). The step code itself stays in src/.
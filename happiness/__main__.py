@@ -0,0 +1,139 @@
+# __main__.py
+# One entry point for the analysis steps (run from the project root):
+#   python -m happiness list                          # steps and what they do
+#   python -m happiness run_kmeans                    # one step, with its pipeline params
+#   python -m happiness pca_clusters --figures none   # figure profile (see src/figures.py)
+#   python -m happiness all --jobs 2                  # the full pipeline, like run_all.py
+#   python -m happiness run_kmeans --startup          # where the start-up time goes
+#
+# Only the requested step module is imported, and the steps import
+# scikit-learn, SciPy and matplotlib inside the functions that use them, so a
+# step only pays for the libraries it runs. matplotlib always uses the
+# non-interactive Agg backend (cron jobs have no display).
+#
+# --startup runs the command again under `python -X importtime` and prints
+# the import time per package next to the time of importing the step and
+# running its main().
+
+import argparse
+import importlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# the step scripts live in src/ and import each other by module name
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+# set before anything can import matplotlib
+os.environ["MPLBACKEND"] = "Agg"
+
+from figures import PROFILES  # noqa: E402
+from instrument import collect, import_breakdown, parse_importtime, span  # noqa: E402
+
+# the child process of --startup writes its spans to this file
+STARTUP_ENV = "HAPPINESS_STARTUP_FILE"
+
+
+def list_steps():
+    from pipeline import STEPS
+
+    width = max(len(step.name) for step in STEPS)
+    for step in STEPS:
+        print(f"{step.name:<{width}}  {step.description}")
+
+
+def run_step(name):
+    """Import one pipeline step and run its main() with the pipeline's params."""
+    with span("import pipeline", cat="startup"):
+        from pipeline import STEPS
+    steps = {step.name: step for step in STEPS}
+    if name not in steps:
+        print(f"Unknown step: {name}. See `python -m happiness list`.", file=sys.stderr)
+        return False
+    with span(f"import {name}", cat="startup"):
+        module = importlib.import_module(name)
+    with span("main", cat="step"):
+        module.main(**steps[name].params)
+    return True
+
+
+def run_all(args):
+    with span("import pipeline", cat="startup"):
+        from pipeline import run_pipeline
+    return run_pipeline(jobs=args.jobs, force=args.force, dry_run=args.dry_run)
+
+
+def startup_report(argv, top=12):
+    """Run `python -X importtime -m happiness <argv>` and print where its time went."""
+    with tempfile.TemporaryDirectory(prefix="happiness-startup-") as tmp:
+        spans_file = Path(tmp) / "spans.json"
+        env = dict(os.environ, **{STARTUP_ENV: str(spans_file)})
+        start = time.perf_counter()
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-m", "happiness", *argv],
+                              cwd=PROJECT_ROOT, env=env, stderr=subprocess.PIPE, text=True)
+        total_s = time.perf_counter() - start
+        records = json.loads(spans_file.read_text()) if spans_file.exists() else []
+
+    imports, rest = parse_importtime(proc.stderr)
+    sys.stderr.write(rest)
+    import_s = sum(r["self_s"] for r in imports)
+
+    print(f"\nStart-up of `python -m happiness {' '.join(argv)}`: {total_s:.2f} s in total")
+    print(f"  {'imports (all modules)':<34}{import_s:>8.2f} s  ({len(imports)} modules)")
+    for package, seconds, n_modules in import_breakdown(imports)[:top]:
+        print(f"    {package:<32}{seconds:>8.2f} s  ({n_modules} modules)")
+    for r in records:
+        if r["cat"] in ("startup", "step") and r["parent"] is None:
+            print(f"  {r['name']:<34}{r['wall_s']:>8.2f} s")
+    return proc.returncode
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    parser = argparse.ArgumentParser(
+        prog="python -m happiness",
+        description="Run one step of the happiness analysis, or the full pipeline.",
+    )
+    parser.add_argument("step", help="step name (see `list`), `all` for the pipeline, or `list`")
+    parser.add_argument("--figures", choices=sorted(PROFILES), default=None,
+                        help="figure profile: full (dpi 300, default), preview (dpi 72) or none")
+    parser.add_argument("--startup", action="store_true",
+                        help="report the start-up time (imports per package, step import, main)")
+    parser.add_argument("--jobs", type=int, default=None, help="`all` only: steps run in parallel")
+    parser.add_argument("--force", action="store_true", help="`all` only: rerun every step")
+    parser.add_argument("--dry-run", action="store_true", help="`all` only: show the plan")
+    args = parser.parse_args(argv)
+
+    if args.startup:
+        sys.exit(startup_report([a for a in argv if a != "--startup"]))
+
+    # all scripts use paths relative to the project root
+    os.chdir(PROJECT_ROOT)
+    if args.figures is not None:
+        os.environ["HAPPINESS_FIGURES"] = args.figures
+
+    try:
+        if args.step == "list":
+            list_steps()
+            ok = True
+        elif args.step == "all":
+            ok = run_all(args)
+        else:
+            ok = run_step(args.step)
+    finally:
+        spans_file = os.environ.get(STARTUP_ENV)
+        if spans_file:
+            with open(spans_file, "w") as fh:
+                json.dump(collect(), fh)
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,56 +1,57 @@
 # run_all.py
 # this script is to run the full analysis pipeline for the World Happiness clustering project.
+# All steps run inside this one Python process (see src/pipeline.py), steps that
+# do not depend on each other run in parallel, and steps whose inputs and code
+# did not change since the last run are skipped.
 
-
-import subprocess
+import argparse
+import os
+import sys
 from pathlib import Path
 
 # project root = folder where this file lives
 PROJECT_ROOT = Path(__file__).resolve().parent
 
+# the step scripts live in src/ and import each other by module name
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
 
-def run_step(description, script_rel_path):
-    """Run one Python script and print a header."""
-    print("\n" + "=" * 100)
-    print(f"STEP: {description}")
-    print(f"Running: python {script_rel_path}")
-    print("=" * 100)
-
-    # build the full path so we can run from project root
-    script_full_path = PROJECT_ROOT / script_rel_path
-    subprocess.run(["python", str(script_full_path)], check=True)
+from figures import PROFILES  # noqa: E402
+from pipeline import run_pipeline  # noqa: E402
 
 
 def main():
-  
-    steps = [
-        ("Explore dataset",                                 "src/explore_data.py"),
-        ("Prepare cleaned dataset",                         "src/prepare_data.py"),
-        ("Standardize happiness drivers",                   "src/standardize_data.py"),
-        ("Explore factors (summary & corr)",                "src/explore_factors.py"),
-        ("Run K-Means clustering",                          "src/run_kmeans.py"),
-        ("Summarize clusters",                              "src/analyze_clusters.py"),
-        ("PCA + cluster visualization",                     "src/pca_clusters.py"),
-        ("Regression & residual happiness",                 "src/gdp_residuals.py"),
-        ("Plot cluster profiles (bar chart)",               "src/plot_cluster_profiles.py"),
-        ("Plot residual happiness boxplot",                 "src/plot_residuals_boxplot.py"),
-        ("Plot GDP vs happiness scatter",                   "src/plot_gdp_happiness.py"),
-        ("Robustness: clustering without GDP",              "src/run_kmeans_no_gdp.py"),
-        ("Regression with interactions & corruption dummy", "src/reginteractions.py"),
-        ("Interactions of log GDP with Life expectancy and Generosity", "src/interaction_gdp_pairs.py"),
-    ]
-
-    for desc, script in steps:
-        try:
-            run_step(desc, script)
-        except FileNotFoundError:
-            print(
-                f"WARNING: Script not found: {script}. "
-            )
-        except subprocess.CalledProcessError:
-            print(f"\nERROR while running {script}. Stopping pipeline.")
-            break
+    parser = argparse.ArgumentParser(description="Run the full happiness analysis pipeline.")
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        help="number of steps to run in parallel (default: number of CPUs, 1 = serial)",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="only show which steps would run and why",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="rerun every step, even if it is up to date",
+    )
+    parser.add_argument(
+        "--figures",
+        choices=sorted(PROFILES),
+        default=None,
+        help="figure profile: full (dpi 300, default), preview (dpi 72) or none (tables only)",
+    )
+    args = parser.parse_args()
+
+    # all scripts use paths relative to the project root
+    os.chdir(PROJECT_ROOT)
+
+    ok = run_pipeline(jobs=args.jobs, force=args.force, dry_run=args.dry_run, figures=args.figures)
+    if not ok:
+        sys.exit(1)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,15 +1,16 @@
 # analyze_clusters.py
 
-import pandas as pd
+from artifacts import load_table
 
-CLUSTER_FILE = "results/cluster_assignments.csv"
+# binary copy of results/cluster_assignments.csv (written by run_kmeans.py)
+CLUSTER_TABLE = "cluster_assignments"
 
 
 def main():
     print(">>> ANALYZE_CLUSTERS.PY IS RUNNING <<<")
 
     # Load cluster assignments created by run_kmeans.py
-    df = pd.read_csv(CLUSTER_FILE)
+    df = load_table(CLUSTER_TABLE)
 
     print("\nColumns in cluster_assignments.csv:")
     print(list(df.columns))
@@ -0,0 +1,309 @@
+# artifacts.py
+# Binary storage for the intermediate tables that the pipeline steps pass to
+# each other (standardized data, cluster assignments, ...).
+# CSV files are still written for the human-facing results, but downstream
+# steps load these artifacts instead of parsing the CSV text again.
+#
+# Layout: results/artifacts/<name>/meta.json + the data files of the backend.
+#   "npy"     - one .npy file per column (default, memory-mapped on load);
+#               a text column with missing values also gets a boolean
+#               col_<i>_na.npy mask, so NA does not come back as "nan"
+#   "parquet" - one table.parquet file (needs pyarrow)
+# Feature matrices are stored as a single 2D .npy file and loaded zero-copy.
+# save_arrays() / load_arrays() store a few named arrays plus small JSON
+# metadata (e.g. a fitted model, see ols.py).
+# iter_table() / TableWriter read and write "npy" tables in row chunks, for
+# data that should not be held in memory all at once.
+
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+from instrument import traced
+
+ARTIFACT_DIR = "results/artifacts"
+
+# table format used when saving; can be switched without touching the steps
+DEFAULT_FORMAT = os.environ.get("HAPPINESS_ARTIFACT_FORMAT", "npy")
+
+
+def artifact_path(name, root=ARTIFACT_DIR):
+    """Folder that holds the artifact `name` (used to declare pipeline inputs/outputs)."""
+    return str(Path(root) / name)
+
+
+def _write_meta(folder, meta):
+    with open(folder / "meta.json", "w") as fh:
+        json.dump(meta, fh, indent=2)
+
+
+def _read_meta(folder):
+    meta_file = folder / "meta.json"
+    if not meta_file.exists():
+        raise FileNotFoundError(
+            f"Artifact not found: {folder}. Run the step that creates it first."
+        )
+    with open(meta_file) as fh:
+        return json.load(fh)
+
+
+def _clear_folder(folder):
+    """
+    Create `folder`, or remove the files of an earlier save from it.
+    Subfolders (e.g. artifacts nested under this name) are left alone.
+    """
+    folder.mkdir(parents=True, exist_ok=True)
+    for old in folder.iterdir():
+        if not old.is_dir():
+            old.unlink()
+
+
+def _na_file(folder, i):
+    """Missing-value mask of text column i."""
+    return folder / f"col_{i}_na.npy"
+
+
+def _load_na(folder, meta, col):
+    """Memory-mapped missing-value mask of text column `col`, or None if it has no NA."""
+    if col not in meta.get("na_columns", []):
+        return None
+    return np.load(_na_file(folder, meta["columns"].index(col)), mmap_mode="r")
+
+
+def _text_values(values, na):
+    """Unicode column values as object dtype, NaN where the mask `na` is set."""
+    values = values.astype(object)
+    if na is not None:
+        values[na] = np.nan
+    return values
+
+
+def _save_npy(df, folder):
+    dtypes, na_columns = {}, []
+    for i, col in enumerate(df.columns):
+        values = df[col].to_numpy()
+        if values.dtype == object:
+            # fixed-width unicode keeps text columns memory-mappable (no pickle);
+            # astype(str) writes NA as "nan"/"None", so the mask records it
+            na = df[col].isna().to_numpy()
+            if na.any():
+                np.save(_na_file(folder, i), na, allow_pickle=False)
+                na_columns.append(col)
+            values = values.astype(str)
+        np.save(folder / f"col_{i}.npy", values, allow_pickle=False)
+        dtypes[col] = str(values.dtype)
+    return {"dtypes": dtypes, "na_columns": na_columns}
+
+
+def _load_npy(folder, meta, columns):
+    import pandas as pd
+
+    data = {}
+    for col in columns:
+        i = meta["columns"].index(col)
+        values = np.load(folder / f"col_{i}.npy", mmap_mode="r")
+        if values.dtype.kind == "U":
+            values = _text_values(values, _load_na(folder, meta, col))
+        data[col] = values
+    return pd.DataFrame(data, columns=columns)
+
+
+def _save_parquet(df, folder):
+    df.to_parquet(folder / "table.parquet", index=False)
+    return {}
+
+
+def _load_parquet(folder, meta, columns):
+    import pandas as pd
+
+    return pd.read_parquet(folder / "table.parquet", columns=columns)
+
+
+# format name -> (save function, load function)
+BACKENDS = {
+    "npy": (_save_npy, _load_npy),
+    "parquet": (_save_parquet, _load_parquet),
+}
+
+
+@traced("save")
+def save_table(df, name, fmt=None, root=ARTIFACT_DIR):
+    """Store a DataFrame (index is dropped) as artifact `name`."""
+    fmt = fmt or DEFAULT_FORMAT
+    if fmt not in BACKENDS:
+        raise ValueError(f"Unknown artifact format {fmt!r}; choose from {sorted(BACKENDS)}")
+
+    folder = Path(root) / name
+    _clear_folder(folder)
+
+    df = df.reset_index(drop=True)
+    save, _ = BACKENDS[fmt]
+    meta = {"kind": "table", "format": fmt, "columns": list(df.columns), "n_rows": len(df)}
+    meta.update(save(df, folder))
+    _write_meta(folder, meta)
+    return str(folder)
+
+
+@traced("load")
+def load_table(name, columns=None, root=ARTIFACT_DIR):
+    """Load artifact `name` as a DataFrame (optionally only some columns)."""
+    folder = Path(root) / name
+    meta = _read_meta(folder)
+    if columns is None:
+        columns = meta["columns"]
+    missing = [c for c in columns if c not in meta["columns"]]
+    if missing:
+        raise KeyError(f"Columns {missing} not in artifact {name}")
+    _, load = BACKENDS[meta["format"]]
+    return load(folder, meta, list(columns))
+
+
+def table_meta(name, root=ARTIFACT_DIR):
+    """Column names, row count and format of a stored artifact."""
+    return _read_meta(Path(root) / name)
+
+
+def iter_table(name, columns=None, chunksize=100_000, root=ARTIFACT_DIR):
+    """
+    Yield artifact `name` in DataFrames of at most `chunksize` rows
+    (row index continues across chunks). Only the rows of the current chunk
+    are read from the memory-mapped column files.
+    """
+    import pandas as pd
+
+    folder = Path(root) / name
+    meta = _read_meta(folder)
+    if meta["format"] != "npy":
+        raise ValueError(f"Chunked reading needs the 'npy' format, {name} is {meta['format']!r}")
+    columns = list(columns or meta["columns"])
+    arrays = {
+        col: np.load(folder / f"col_{meta['columns'].index(col)}.npy", mmap_mode="r")
+        for col in columns
+    }
+    masks = {col: _load_na(folder, meta, col) for col in columns}
+    for start in range(0, meta["n_rows"], chunksize):
+        stop = min(start + chunksize, meta["n_rows"])
+        data = {}
+        for col, values in arrays.items():
+            chunk = np.array(values[start:stop])
+            if chunk.dtype.kind == "U":
+                na = masks[col]
+                chunk = _text_values(chunk, None if na is None else na[start:stop])
+            data[col] = chunk
+        yield pd.DataFrame(data, columns=columns, index=pd.RangeIndex(start, stop))
+
+
+class TableWriter:
+    """
+    Write an "npy" table artifact chunk by chunk. The row count and the dtype
+    of every column must be known up front (columns are pre-allocated .npy
+    files that each chunk is written into). Text columns get a missing-value
+    mask as well, which is dropped on close() if the column has no NA.
+    A text value longer than its column's declared width ("<U n") raises
+    ValueError instead of being cut.
+    """
+
+    def __init__(self, name, dtypes, n_rows, root=ARTIFACT_DIR):
+        self.folder = Path(root) / name
+        _clear_folder(self.folder)
+        self.columns = list(dtypes)
+        self.n_rows = n_rows
+        self.pos = 0
+        self.arrays = [
+            np.lib.format.open_memmap(self.folder / f"col_{i}.npy", mode="w+",
+                                      dtype=np.dtype(dtypes[col]), shape=(n_rows,))
+            for i, col in enumerate(self.columns)
+        ]
+        self.masks = {
+            i: np.lib.format.open_memmap(_na_file(self.folder, i), mode="w+", dtype=bool, shape=(n_rows,))
+            for i, array in enumerate(self.arrays) if array.dtype.kind == "U"
+        }
+
+    def write(self, df):
+        for i in self.masks:
+            col, width = self.columns[i], self.arrays[i].dtype.itemsize // 4
+            longest = df[col].dropna().astype(str).str.len().max()
+            if longest > width:
+                raise ValueError(f"Column {col!r} has a value of {longest} characters, "
+                                 f"longer than its declared width <U{width}")
+        stop = self.pos + len(df)
+        for col, array in zip(self.columns, self.arrays):
+            array[self.pos:stop] = df[col].to_numpy()
+        for i, mask in self.masks.items():
+            mask[self.pos:stop] = df[self.columns[i]].isna().to_numpy()
+        self.pos = stop
+
+    def close(self):
+        if self.pos != self.n_rows:
+            raise ValueError(f"Wrote {self.pos} rows, expected {self.n_rows}")
+        dtypes = {}
+        for col, array in zip(self.columns, self.arrays):
+            array.flush()
+            dtypes[col] = str(array.dtype)
+        na_columns = []
+        for i, mask in self.masks.items():
+            has_na = bool(mask.any())
+            mask.flush()
+            if has_na:
+                na_columns.append(self.columns[i])
+            else:
+                _na_file(self.folder, i).unlink()
+        self.arrays, self.masks = [], {}
+        _write_meta(self.folder, {"kind": "table", "format": "npy", "columns": self.columns,
+                                  "n_rows": self.n_rows, "dtypes": dtypes, "na_columns": na_columns})
+        return str(self.folder)
+
+
+@traced("save")
+def save_matrix(X, name, columns, root=ARTIFACT_DIR):
+    """Store a 2D float matrix (rows x named columns) as artifact `name`."""
+    X = np.ascontiguousarray(X, dtype=np.float64)
+    if X.ndim != 2 or X.shape[1] != len(columns):
+        raise ValueError(f"Matrix shape {X.shape} does not match {len(columns)} columns")
+
+    folder = Path(root) / name
+    _clear_folder(folder)
+    np.save(folder / "matrix.npy", X, allow_pickle=False)
+    _write_meta(folder, {"kind": "matrix", "format": "npy", "columns": list(columns), "shape": list(X.shape)})
+    return str(folder)
+
+
+@traced("load")
+def load_matrix(name, columns=None, root=ARTIFACT_DIR):
+    """
+    Memory-map the matrix artifact `name` (read-only, no copy).
+    Selecting a contiguous run of columns is still a view; any other
+    selection makes one copy of the selected columns.
+    """
+    folder = Path(root) / name
+    meta = _read_meta(folder)
+    X = np.load(folder / "matrix.npy", mmap_mode="r")
+    if columns is None:
+        return X
+
+    idx = [meta["columns"].index(c) for c in columns]
+    if idx == list(range(idx[0], idx[0] + len(idx))):
+        return X[:, idx[0]:idx[0] + len(idx)]
+    return X[:, idx]
+
+
+@traced("save")
+def save_arrays(arrays, name, meta=None, root=ARTIFACT_DIR):
+    """Store named numpy arrays ({name: array}) plus JSON-serializable `meta`."""
+    folder = Path(root) / name
+    _clear_folder(folder)
+    for key, values in arrays.items():
+        np.save(folder / f"{key}.npy", np.asarray(values), allow_pickle=False)
+    _write_meta(folder, {"kind": "arrays", "format": "npy", "arrays": list(arrays), **(meta or {})})
+    return str(folder)
+
+
+@traced("load")
+def load_arrays(name, root=ARTIFACT_DIR):
+    """Return ({name: memory-mapped array}, meta) of a save_arrays() artifact."""
+    folder = Path(root) / name
+    meta = _read_meta(folder)
+    arrays = {key: np.load(folder / f"{key}.npy", mmap_mode="r") for key in meta["arrays"]}
+    return arrays, meta
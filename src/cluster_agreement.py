@@ -0,0 +1,179 @@
+# cluster_agreement.py
+# Agreement between one reference labeling and many other labelings of the
+# same rows, computed for all of them at once.
+# Everything starts from a batched contingency table (one np.bincount for
+# the whole batch); the label matching, ARI, NMI, variation of information
+# and Jaccard are array operations on it.
+# A label of -1 marks a row that is left out of a labeling (e.g. a row that
+# was not drawn in a bootstrap resample).
+
+from itertools import permutations
+
+import numpy as np
+import pandas as pd
+
+# up to this many clusters the best matching is found by trying every
+# permutation at once (K! candidates), above it by the Hungarian algorithm;
+# the gather is B x K! x K values (K = 5: 600 per table, K = 7 would be 35280)
+MAX_BRUTE_FORCE_K = 5
+
+
+def contingency_batch(reference, labelings, k_ref=None, k_other=None):
+    """
+    Contingency tables of `reference` (n,) against every row of `labelings`
+    (B, n). Returns an int array (B, k_ref, k_other); entry [b, i, j] counts
+    the rows with reference label i and label j in labeling b.
+    Rows where either label is -1 are not counted.
+    """
+    reference = np.asarray(reference)
+    labelings = np.atleast_2d(labelings)
+    n_batch = len(labelings)
+    if k_ref is None:
+        k_ref = int(reference.max()) + 1
+    if k_other is None:
+        k_other = int(labelings.max()) + 1
+
+    keep = (labelings >= 0) & (reference >= 0)
+    batch = np.broadcast_to(np.arange(n_batch)[:, None], labelings.shape)
+    codes = (batch * k_ref + reference) * k_other + labelings
+    counts = np.bincount(codes[keep], minlength=n_batch * k_ref * k_other)
+    return counts.reshape(n_batch, k_ref, k_other)
+
+
+def best_matching(contingency):
+    """
+    For each table (B, k_ref, k_other): the labeling's cluster matched to
+    each reference cluster so that the matched rows are maximal (one-to-one;
+    Hungarian algorithm on the contingency table).
+    Returns an int array (B, k_ref), match[b, i] = label in labeling b that
+    corresponds to reference label i, or -1 if the labeling has fewer
+    clusters and i is left unmatched.
+    """
+    from scipy.optimize import linear_sum_assignment
+
+    contingency = np.asarray(contingency)
+    n_batch, k_ref, k_other = contingency.shape
+
+    if k_ref <= k_other <= MAX_BRUTE_FORCE_K:
+        # every injective mapping at once: matched[b, p] = sum_i C[b, i, perms[p, i]]
+        perms = np.array(list(permutations(range(k_other), k_ref)))
+        matched = contingency[:, np.arange(k_ref), perms].sum(axis=2)
+        return perms[matched.argmax(axis=1)]
+
+    match = np.full((n_batch, k_ref), -1)
+    for b in range(n_batch):
+        rows, cols = linear_sum_assignment(contingency[b], maximize=True)
+        match[b, rows] = cols
+    return match
+
+
+def matched_share(contingency, match):
+    """Share of counted rows that fall on the matched pairs, per table."""
+    contingency = np.asarray(contingency)
+    n_batch, k_ref, _ = contingency.shape
+    picked = contingency[np.arange(n_batch)[:, None], np.arange(k_ref), np.maximum(match, 0)]
+    matched = np.where(match >= 0, picked, 0).sum(axis=1)
+    return matched / np.maximum(contingency.sum(axis=(1, 2)), 1)
+
+
+def align_labels(labelings, match):
+    """
+    Relabel every row of `labelings` (B, n) into the reference label ids,
+    given best_matching() output. Clusters without a reference partner get
+    the ids k_ref, k_ref + 1, ...; -1 stays -1.
+    """
+    labelings = np.atleast_2d(labelings)
+    n_batch, k_ref = match.shape
+    k_other = max(int(labelings.max()) + 1, int(match.max()) + 1)
+
+    # inverse[b, j] = reference label matched to label j of labeling b
+    inverse = np.full((n_batch, k_other), -1)
+    batch = np.broadcast_to(np.arange(n_batch)[:, None], match.shape)
+    found = match >= 0
+    inverse[batch[found], match[found]] = np.broadcast_to(np.arange(k_ref), match.shape)[found]
+    unmatched = inverse < 0
+    inverse[unmatched] = k_ref + np.cumsum(unmatched, axis=1)[unmatched] - 1
+
+    aligned = np.take_along_axis(inverse, np.maximum(labelings, 0), axis=1)
+    return np.where(labelings < 0, -1, aligned)
+
+
+def _pairs(x):
+    return x * (x - 1) / 2.0
+
+
+def adjusted_rand_batch(contingency):
+    """Adjusted Rand index for every table in a (B, k_ref, k_other) batch."""
+    contingency = np.asarray(contingency, dtype=np.float64)
+    n = contingency.sum(axis=(1, 2))
+    index = _pairs(contingency).sum(axis=(1, 2))
+    rows = _pairs(contingency.sum(axis=2)).sum(axis=1)
+    cols = _pairs(contingency.sum(axis=1)).sum(axis=1)
+
+    expected = rows * cols / np.maximum(_pairs(n), 1.0)
+    maximum = (rows + cols) / 2.0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ari = (index - expected) / (maximum - expected)
+    # both labelings put everything in one cluster (or one row per cluster)
+    return np.where(maximum == expected, 1.0, ari)
+
+
+def jaccard_batch(contingency):
+    """
+    Per reference cluster, the Jaccard similarity to its most similar cluster
+    in each labeling (Hennig's clusterwise stability). Returns (B, k_ref);
+    NaN where a reference cluster has no counted rows.
+    """
+    contingency = np.asarray(contingency, dtype=np.float64)
+    rows = contingency.sum(axis=2, keepdims=True)
+    cols = contingency.sum(axis=1, keepdims=True)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        jaccard = contingency / (rows + cols - contingency)
+    best = np.nanmax(np.where(np.isnan(jaccard), -1.0, jaccard), axis=2)
+    return np.where(rows[:, :, 0] > 0, best, np.nan)
+
+
+def _entropy(p, axis):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return -np.where(p > 0, p * np.log(p), 0.0).sum(axis=axis)
+
+
+def information_batch(contingency):
+    """
+    Mutual information, normalized mutual information (arithmetic mean of
+    the two entropies, as sklearn) and variation of information, in nats,
+    for every table in a batch. Returns (mi, nmi, vi), each of shape (B,).
+    """
+    contingency = np.asarray(contingency, dtype=np.float64)
+    p = contingency / np.maximum(contingency.sum(axis=(1, 2), keepdims=True), 1.0)
+    h_ref = _entropy(p.sum(axis=2), axis=1)
+    h_other = _entropy(p.sum(axis=1), axis=1)
+    h_joint = _entropy(p, axis=(1, 2))
+
+    mi = np.maximum(h_ref + h_other - h_joint, 0.0)
+    mean_h = (h_ref + h_other) / 2.0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        nmi = np.where(mean_h > 0, mi / mean_h, 1.0)
+    vi = np.maximum(h_ref + h_other - 2 * mi, 0.0)
+    return mi, nmi, vi
+
+
+def compare_labelings(reference, labelings, names=None):
+    """
+    Compare many labelings (B, n) with one reference labeling (n,) in one
+    batch. Returns a DataFrame with one row per labeling: rows compared,
+    number of clusters, share of rows on the optimal label matching, ARI,
+    NMI and variation of information.
+    """
+    labelings = np.atleast_2d(labelings)
+    table = contingency_batch(reference, labelings)
+    match = best_matching(table)
+    _, nmi, vi = information_batch(table)
+    return pd.DataFrame({
+        "n_rows": table.sum(axis=(1, 2)),
+        "n_clusters": [len(np.unique(row[row >= 0])) for row in labelings],
+        "matched_share": matched_share(table, match),
+        "ari": adjusted_rand_batch(table),
+        "nmi": nmi,
+        "vi": vi,
+    }, index=pd.Index(names if names is not None else range(len(labelings)), name="labeling"))
@@ -0,0 +1,187 @@
+# cluster_stability.py
+# How stable is the baseline clustering (run_kmeans.py) under resampling?
+# Refits K-Means on many bootstrap resamples (or subsamples without
+# replacement) of the standardized matrix on a process pool and compares
+# every refit with the baseline labels (cluster_agreement.py):
+#   - per country: share of resamples where it keeps its (aligned) cluster,
+#     and how often it lands with the other members of its baseline cluster
+#   - per cluster: Jaccard similarity to the best matching refit cluster
+#   - overall: distribution of the adjusted Rand index (ARI)
+#   - co-assignment matrix: share of resamples where two countries that
+#     were both drawn end up in the same cluster
+# Only rows drawn in a resample are scored for it. The co-assignment counts
+# are summed batch by batch (one matrix product per batch), never stored
+# per resample.
+
+import time
+
+import numpy as np
+import pandas as pd
+
+from artifacts import load_matrix, load_table
+from cluster_agreement import adjusted_rand_batch, align_labels, best_matching, contingency_batch, jaccard_batch
+from shared_matrix import resolve_jobs, shared_matrix, shared_matrix_pool
+
+# artifacts written by standardize_data.py and run_kmeans.py
+FEATURES = "features_std"
+BASE_TABLE = "cluster_assignments"
+
+METHODS = ["bootstrap", "subsample"]
+N_RESAMPLES = 1000
+SUBSAMPLE_FRACTION = 0.8
+RANDOM_STATE = 42
+N_INIT = 3
+
+# resamples per pool task; fixed so results do not depend on the worker count
+BATCH_SIZE = 50
+
+# Jaccard thresholds from Hennig (2007): >= 0.75 stable, <= 0.5 dissolved
+STABLE_JACCARD = 0.75
+DISSOLVED_JACCARD = 0.5
+
+
+def draw_rows(n, method, fraction, seed):
+    """Row indices of one resample."""
+    rng = np.random.default_rng(seed)
+    if method == "bootstrap":
+        return rng.choice(n, size=n, replace=True)
+    if method == "subsample":
+        return rng.choice(n, size=max(2, int(round(fraction * n))), replace=False)
+    raise ValueError(f"Unknown resampling method {method!r}; choose from {METHODS}")
+
+
+def _run_batch(X, reference, resamples, method, fraction, random_state, n_init):
+    """
+    Refit and score the resamples with the given numbers. Returns the batch
+    totals (co-assignment counts, counts of rows drawn together, label
+    agreement per row) and the per-resample ARI and Jaccard values.
+    """
+    from sklearn.cluster import KMeans
+
+    n = len(X)
+    k = int(reference.max()) + 1
+    labels = np.full((len(resamples), n), -1)
+    for b, r in enumerate(resamples):
+        seed = np.random.SeedSequence([random_state, r]).generate_state(2)
+        rows = draw_rows(n, method, fraction, seed[0])
+        model = KMeans(n_clusters=k, n_init=n_init, random_state=int(seed[1])).fit(X[rows])
+        drawn = np.unique(rows)
+        labels[b, drawn] = model.predict(X[drawn])
+
+    table = contingency_batch(reference, labels, k, k)
+    aligned = align_labels(labels, best_matching(table))
+
+    drawn = (labels >= 0).astype(np.float64)  # (B, n)
+    onehot = (aligned[:, :, None] == np.arange(k)).astype(np.float64)  # (B, n, k)
+    onehot = onehot.transpose(1, 0, 2).reshape(n, -1)  # (n, B * k)
+
+    return {
+        "coassigned": onehot @ onehot.T,
+        "drawn_together": drawn.T @ drawn,
+        "agree": (aligned == reference).sum(axis=0),
+        "drawn": drawn.sum(axis=0),
+        "ari": adjusted_rand_batch(table),
+        "jaccard": jaccard_batch(table),
+    }
+
+
+def _run_batch_shared(reference, resamples, method, fraction, random_state, n_init):
+    return _run_batch(shared_matrix(), reference, resamples, method, fraction, random_state, n_init)
+
+
+def resample_stability(X, reference, n_resamples=N_RESAMPLES, method="bootstrap",
+                       fraction=SUBSAMPLE_FRACTION, random_state=RANDOM_STATE,
+                       n_init=N_INIT, n_jobs=None):
+    """
+    Run n_resamples refits of K-Means (K = number of reference clusters) and
+    return the summed batch totals; "ari" and "jaccard" are concatenated in
+    resample order.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown resampling method {method!r}; choose from {METHODS}")
+    X = np.ascontiguousarray(X, dtype=np.float64)
+    reference = np.asarray(reference)
+    batches = [range(s, min(s + BATCH_SIZE, n_resamples)) for s in range(0, n_resamples, BATCH_SIZE)]
+    args = (method, fraction, random_state, n_init)
+
+    n_jobs = resolve_jobs(n_jobs, len(batches))
+    if n_jobs == 1:
+        results = [_run_batch(X, reference, batch, *args) for batch in batches]
+    else:
+        with shared_matrix_pool(X, n_jobs) as pool:
+            futures = [pool.submit(_run_batch_shared, reference, batch, *args) for batch in batches]
+            results = [f.result() for f in futures]
+
+    totals = {}
+    for key in ("coassigned", "drawn_together", "agree", "drawn"):
+        totals[key] = sum(r[key] for r in results)
+    for key in ("ari", "jaccard"):
+        totals[key] = np.concatenate([r[key] for r in results])
+    return totals
+
+
+def main(n_resamples=N_RESAMPLES, method="bootstrap", subsample_fraction=SUBSAMPLE_FRACTION,
+         random_state=RANDOM_STATE, n_init=N_INIT, n_jobs=None):
+    print(">>> CLUSTER_STABILITY.PY IS RUNNING <<<")
+
+    # 1) Baseline labels and the matrix they were fitted on
+    df = load_table(BASE_TABLE, columns=["Country name", "cluster"])
+    X = load_matrix(FEATURES)
+    reference = df["cluster"].to_numpy()
+    k = int(reference.max()) + 1
+    print(f"Baseline: {len(df)} countries in K = {k} clusters")
+
+    # 2) Refit on every resample and compare with the baseline
+    print(f"Running {n_resamples} {method} resamples ...")
+    start = time.perf_counter()
+    totals = resample_stability(X, reference, n_resamples, method, subsample_fraction,
+                                random_state, n_init, n_jobs)
+    print(f"Done in {time.perf_counter() - start:.1f} s")
+
+    # 3) Co-assignment frequencies (pairs never drawn together stay empty)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        coassignment = totals["coassigned"] / totals["drawn_together"]
+    names = df["Country name"]
+    pd.DataFrame(coassignment, index=names, columns=names).to_csv("results/stability_coassignment.csv")
+
+    # 4) Per country: aligned label agreement and co-assignment with own cluster
+    same = reference[:, None] == reference[None, :]
+    np.fill_diagonal(same, False)
+    own = np.where(same, coassignment, np.nan)
+    countries = df.assign(
+        times_drawn=totals["drawn"].astype(int),
+        label_agreement=totals["agree"] / totals["drawn"],
+        coassignment_own_cluster=np.nanmean(own, axis=1),
+    )
+    countries.to_csv("results/stability_country.csv", index=False)
+
+    # 5) Per cluster: Jaccard stability
+    jaccard = totals["jaccard"]
+    clusters = pd.DataFrame({
+        "cluster": np.arange(k),
+        "size": np.bincount(reference, minlength=k),
+        "jaccard_mean": np.nanmean(jaccard, axis=0),
+        "jaccard_median": np.nanmedian(jaccard, axis=0),
+        "share_stable": (jaccard >= STABLE_JACCARD).mean(axis=0),
+        "share_dissolved": (jaccard <= DISSOLVED_JACCARD).mean(axis=0),
+    })
+    clusters.to_csv("results/stability_clusters.csv", index=False)
+
+    # 6) ARI of every resample
+    ari = pd.DataFrame({"resample": np.arange(n_resamples), "ari": totals["ari"]})
+    ari.to_csv("results/stability_ari.csv", index=False)
+
+    print("\nClusterwise Jaccard stability (>= 0.75 stable, <= 0.5 dissolved):")
+    print(clusters.round(3).to_string(index=False))
+    low, median, high = np.percentile(totals["ari"], [2.5, 50, 97.5])
+    print(f"\nARI vs baseline: median {median:.3f} (95% of resamples in {low:.3f} to {high:.3f})")
+    print("\nLeast stable countries (share of resamples in their own cluster):")
+    print(countries.nsmallest(10, "label_agreement")[["Country name", "cluster", "label_agreement"]]
+          .round(3).to_string(index=False))
+
+    print("\nSaved: results/stability_country.csv, results/stability_clusters.csv,")
+    print("       results/stability_ari.csv, results/stability_coassignment.csv")
+
+
+if __name__ == "__main__":
+    main()
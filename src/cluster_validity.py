@@ -0,0 +1,117 @@
+# cluster_validity.py
+# Cluster validity metrics for choosing K, all computed from the same
+# per-cluster statistics (sizes, sums, centroids):
+#   inertia (within-cluster sum of squares, for the elbow), Calinski-Harabasz,
+#   Davies-Bouldin and silhouette.
+# Only silhouette needs pairwise distances; for a K sweep the distances are
+# computed once (DistanceBlocks cache) and reused for every K.
+
+import numpy as np
+import pandas as pd
+
+from instrument import traced
+from silhouette import EXACT_MAX_ROWS, MAX_MEMORY_MB, DistanceBlocks, score_silhouette
+
+# how each metric picks the best K
+HIGHER_IS_BETTER = {
+    "silhouette": True,
+    "calinski_harabasz": True,
+    "davies_bouldin": False,
+}
+
+# memory for keeping the distance matrix between the K values of a sweep
+DISTANCE_CACHE_MB = 256
+
+
+def cluster_stats(X, labels):
+    """
+    One pass over the data: cluster sizes, centroids, within-cluster sum of
+    squares and mean distance to the centroid, per cluster.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    _, codes = np.unique(labels, return_inverse=True)
+    k = codes.max() + 1
+
+    sizes = np.bincount(codes, minlength=k).astype(float)
+    sums = np.stack([np.bincount(codes, weights=X[:, j], minlength=k) for j in range(X.shape[1])], axis=1)
+    centroids = sums / sizes[:, None]
+
+    dist_to_centroid = np.linalg.norm(X - centroids[codes], axis=1)
+    within_ss = np.bincount(codes, weights=dist_to_centroid**2, minlength=k)
+    mean_dist = np.bincount(codes, weights=dist_to_centroid, minlength=k) / sizes
+
+    return {
+        "sizes": sizes,
+        "centroids": centroids,
+        "within_ss": within_ss,
+        "mean_dist": mean_dist,
+        "grand_mean": X.mean(axis=0),
+    }
+
+
+def validity_from_stats(stats, n):
+    """Inertia, Calinski-Harabasz and Davies-Bouldin from cluster_stats()."""
+    sizes, centroids = stats["sizes"], stats["centroids"]
+    k = len(sizes)
+    inertia = stats["within_ss"].sum()
+
+    between_ss = (sizes * ((centroids - stats["grand_mean"]) ** 2).sum(axis=1)).sum()
+    if k > 1 and inertia > 0:
+        ch = between_ss / (k - 1) / (inertia / (n - k))
+    else:
+        ch = np.nan
+
+    # Davies-Bouldin: mean over clusters of the worst (S_i + S_j) / d(c_i, c_j)
+    centroid_dist = np.linalg.norm(centroids[:, None, :] - centroids[None, :, :], axis=2)
+    spread = stats["mean_dist"][:, None] + stats["mean_dist"][None, :]
+    np.fill_diagonal(centroid_dist, np.inf)
+    db = (spread / centroid_dist).max(axis=1).mean() if k > 1 else np.nan
+
+    return {"inertia": float(inertia), "calinski_harabasz": float(ch), "davies_bouldin": float(db)}
+
+
+def evaluate(X, labels, distances=None, max_memory_mb=MAX_MEMORY_MB):
+    """All validity metrics for one labeling of X."""
+    scores = validity_from_stats(cluster_stats(X, labels), len(X))
+    sil, low, high = score_silhouette(X, labels, max_memory_mb=max_memory_mb, distances=distances)
+    scores.update({"silhouette": sil, "silhouette_ci_low": low, "silhouette_ci_high": high})
+    return scores
+
+
+@traced("score")
+def evaluate_sweep(X, labels_by_k, max_memory_mb=MAX_MEMORY_MB, cache_mb=DISTANCE_CACHE_MB):
+    """
+    Validity metrics for every K of a sweep ({K: labels}).
+    Returns a DataFrame indexed by K.
+    """
+    distances = None
+    if len(X) <= EXACT_MAX_ROWS:
+        distances = DistanceBlocks(X, max_memory_mb, cache_mb)
+
+    rows = {k: evaluate(X, labels, distances, max_memory_mb) for k, labels in labels_by_k.items()}
+    table = pd.DataFrame.from_dict(rows, orient="index")
+    table.index.name = "k"
+    return table.sort_index()
+
+
+def elbow_k(inertia):
+    """
+    K at the elbow of the inertia curve (pd.Series indexed by K): the point
+    farthest below the straight line from the first to the last K.
+    """
+    k = inertia.index.to_numpy(dtype=float)
+    y = inertia.to_numpy(dtype=float)
+    if len(k) < 3:
+        return int(k[0])
+    line = y[0] + (y[-1] - y[0]) * (k - k[0]) / (k[-1] - k[0])
+    return int(k[np.argmax(line - y)])
+
+
+def choose_best_k(table, metric="silhouette"):
+    """Best K in an evaluate_sweep() table according to one metric."""
+    if metric == "inertia":
+        return elbow_k(table["inertia"])
+    if metric not in HIGHER_IS_BETTER:
+        raise ValueError(f"Unknown metric {metric!r}; choose from {sorted(HIGHER_IS_BETTER) + ['inertia']}")
+    column = table[metric]
+    return int(column.idxmax() if HIGHER_IS_BETTER[metric] else column.idxmin())
@@ -1,37 +1,73 @@
 # compare_clusters.py
 # Compare baseline clusters with clusters from model without GDP (in run_kmeans_no_gdp.py)
+# and with any other labelings of the same countries, all in one batch
+# (cluster_agreement.py): label ids are matched optimally (Hungarian on the
+# contingency table) before counting agreement, plus ARI, NMI and variation
+# of information.
 
+import numpy as np
 import pandas as pd
 
-BASE_FILE = "results/cluster_assignments.csv"
-NO_GDP_FILE = "results/cluster_assignments_no_gdp.csv"
+from artifacts import load_table
+from cluster_agreement import best_matching, compare_labelings, contingency_batch
 
+# binary copies of cluster_assignments.csv and cluster_assignments_no_gdp.csv
+BASE_TABLE = "cluster_assignments"
+NO_GDP_TABLE = "cluster_assignments_no_gdp"
 
-def main():
+# (artifact, label column) of every labeling compared with the baseline
+LABELINGS = [[NO_GDP_TABLE, "cluster_no_gdp"]]
+
+AGREEMENT_FILE = "results/cluster_agreement.csv"
+
+
+def load_labelings(countries, labelings):
+    """
+    Stack the label columns of several artifacts into one (B, n) array, in
+    the order of `countries`. Countries missing from a labeling get -1.
+    """
+    tables = {}
+    stacked = np.full((len(labelings), len(countries)), -1)
+    for b, (table, column) in enumerate(labelings):
+        if table not in tables:
+            tables[table] = load_table(table).set_index("Country name")
+        labels = tables[table][column].reindex(countries)
+        stacked[b] = labels.fillna(-1).to_numpy(dtype=int)
+    return stacked
+
+
+def main(labelings=LABELINGS):
     print(">>> COMPARE_CLUSTERS.PY IS RUNNING <<<")
 
     # 1) Load both sets of labels
-    df_base = pd.read_csv(BASE_FILE)[["Country name", "cluster"]]
-    df_no_gdp = pd.read_csv(NO_GDP_FILE)[["Country name", "cluster_no_gdp"]]
-
-    # 2) Merge on country name
-    df_merged = df_base.merge(df_no_gdp, on="Country name", how="inner")
+    df_base = load_table(BASE_TABLE, columns=["Country name", "cluster"])
+    reference = df_base["cluster"].to_numpy()
+    stacked = load_labelings(df_base["Country name"], labelings)
+    names = [column for _, column in labelings]
 
-    print(f"\nNumber of countries in comparison: {len(df_merged)}")
+    print(f"\nNumber of countries in comparison: {(stacked[0] >= 0).sum()}")
 
-    # 3) Confusion matrix (crosstab)
-    confusion = pd.crosstab(df_merged["cluster"], df_merged["cluster_no_gdp"])
+    # 2) Confusion matrix of the no-GDP model (rows = baseline cluster)
+    table = contingency_batch(reference, stacked[:1])[0]
+    confusion = pd.DataFrame(table, index=pd.Index(range(table.shape[0]), name="cluster"))
+    confusion.columns.name = names[0]
     print("\nConfusion matrix (rows = baseline cluster, cols = no-GDP cluster):")
     print(confusion)
 
-    # 4) Percentage of unchanged labels (direct match)
-    same_label = (df_merged["cluster"] == df_merged["cluster_no_gdp"])
-    pct_same = same_label.mean() * 100
-    print(f"\nShare of countries with identical cluster label: {pct_same:.1f}%")
+    match = best_matching(table[None])[0]
+    print("\nMatched clusters (baseline -> no-GDP):",
+          ", ".join(f"{i} -> {j}" for i, j in enumerate(match) if j >= 0))
+
+    # 3) Agreement after matching the label ids, for every labeling at once
+    agreement = compare_labelings(reference, stacked, names)
+    print("\nAgreement with the baseline (matched_share = same cluster after matching labels):")
+    print(agreement.round(3))
 
-    # Save confusion matrix
+    # Save confusion matrix and agreement table
     confusion.to_csv("results/cluster_confusion_no_gdp.csv")
+    agreement.to_csv(AGREEMENT_FILE)
     print("\nSaved confusion matrix to: results/cluster_confusion_no_gdp.csv")
+    print(f"Saved agreement metrics to: {AGREEMENT_FILE}")
 
 
 if __name__ == "__main__":
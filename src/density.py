@@ -0,0 +1,114 @@
+# density.py
+# Aggregated scatter plots for data with many rows (e.g. country-year-region
+# panels): instead of one marker per row, points are binned into a fixed 2D
+# grid per category (one np.bincount over all rows) and the grid is drawn as
+# a single image. Each pixel takes the category colours mixed by their
+# counts, with opacity growing with the log of the total count. Drawing
+# cost and the data shipped to the figure workers (figures.py) depend on
+# the grid size only, not on the number of points.
+# Points in nearly empty cells (outliers) are returned separately so they
+# can still be drawn as markers.
+
+import numpy as np
+
+# below this many points a plain marker scatter is drawn
+DENSITY_MIN_POINTS = 20_000
+
+# grid cells (x, y)
+GRID = (400, 300)
+
+# points in cells with at most this many points are drawn as markers
+SPARSE_COUNT = 1
+
+# opacity of a cell with a single point (full opacity at the densest cell)
+MIN_ALPHA = 0.3
+
+
+def use_density(n_points, density=None):
+    """density=None picks the density image for large data, markers otherwise."""
+    return n_points >= DENSITY_MIN_POINTS if density is None else bool(density)
+
+
+def data_extent(x, y, pad=0.02):
+    """(xmin, xmax, ymin, ymax) of the points with a small margin."""
+    extent = []
+    for values in (x, y):
+        low, high = float(np.nanmin(values)), float(np.nanmax(values))
+        margin = (high - low) * pad or 0.5
+        extent += [low - margin, high + margin]
+    return tuple(extent)
+
+
+def cell_index(x, y, extent, grid=GRID):
+    """Flat grid cell (row-major, y rows) of every point."""
+    nx, ny = grid
+    xmin, xmax, ymin, ymax = extent
+    ix = np.clip(((np.asarray(x) - xmin) / (xmax - xmin) * nx).astype(np.int64), 0, nx - 1)
+    iy = np.clip(((np.asarray(y) - ymin) / (ymax - ymin) * ny).astype(np.int64), 0, ny - 1)
+    return iy * nx + ix
+
+
+def density_grid(x, y, categories, n_categories=None, grid=GRID, extent=None):
+    """
+    Point counts per category and cell. Returns (counts of shape
+    (n_categories, ny, nx), extent, cell index of every point).
+    categories are integer codes 0..n_categories-1.
+    """
+    categories = np.asarray(categories, dtype=np.int64)
+    if n_categories is None:
+        n_categories = int(categories.max()) + 1
+    if extent is None:
+        extent = data_extent(x, y)
+    nx, ny = grid
+    cells = cell_index(x, y, extent, grid)
+    counts = np.bincount(categories * (nx * ny) + cells, minlength=n_categories * nx * ny)
+    return counts.reshape(n_categories, ny, nx), extent, cells
+
+
+def sparse_points(counts, cells, max_count=SPARSE_COUNT):
+    """Boolean mask of the points that lie in cells with at most max_count points."""
+    total = counts.sum(axis=0).ravel()
+    return total[cells] <= max_count
+
+
+def compose_density(counts, colors, min_alpha=MIN_ALPHA):
+    """
+    RGBA image (ny, nx, 4) from per-category counts and one RGB(A) colour per
+    category: colour = count-weighted mix, alpha = log-scaled total count,
+    empty cells fully transparent.
+    """
+    colors = np.asarray(colors, dtype=np.float64)[:, :3]
+    total = counts.sum(axis=0)
+    image = np.zeros(total.shape + (4,))
+    filled = total > 0
+    if not filled.any():
+        return image
+
+    image[..., :3] = np.einsum("cyx,ck->yxk", counts, colors) / np.maximum(total, 1)[..., None]
+    scale = np.log1p(total) / np.log1p(total.max())
+    image[..., 3] = np.where(filled, min_alpha + (1 - min_alpha) * scale, 0.0)
+    return image
+
+
+def draw_density(ax, counts, extent, colors):
+    """
+    Draw the composed density image on ax. Returns one legend handle per
+    category (a square marker in its colour).
+    """
+    from matplotlib.lines import Line2D
+
+    ax.imshow(
+        compose_density(counts, colors),
+        extent=extent,
+        origin="lower",
+        aspect="auto",
+        interpolation="nearest",
+    )
+    return [Line2D([], [], marker="s", linestyle="", markersize=8, color=color[:3]) for color in colors]
+
+
+def category_colors(n_categories, cmap="tab10"):
+    """One RGBA colour per category code from a qualitative colormap."""
+    from matplotlib import colormaps
+
+    return colormaps[cmap](np.arange(n_categories) % colormaps[cmap].N)
@@ -1,16 +1,13 @@
 # explore_data.py
 # my 1st EDA step: load the file, check that reading works, list all variables
 
-import pandas as pd
-
-# path to my World Happiness Report 2024 file
-DATA_FILE = "data/world-happiness-2024.csv"
+from load_data import load_raw
 
 def main():
     print(">>> EXPLORE_DATA.PY IS RUNNING <<<")
 
     # Load the dataset
-    df = pd.read_csv(DATA_FILE, sep=";", decimal=",")
+    df = load_raw()
 
     # show how many rows (countries) and columns (variables) I have
     print("Data shape (rows, columns):", df.shape)
@@ -0,0 +1,128 @@
+# feature_subsets.py
+# Generalizes the no-GDP robustness check (run_kmeans_no_gdp.py): clusters
+# every non-empty subset of the six standardized drivers (63 subsets) for a
+# range of K, in parallel on one shared-memory copy of the standardized
+# matrix (shared_matrix.py). Each task takes the columns of its subset from
+# the shared matrix: a strided view when they are evenly spaced (adjacent
+# columns, every other column, ...), otherwise a copy of those columns.
+# For every (subset, K) the table holds the validity metrics
+# (cluster_validity.py) and the agreement with the baseline clusters
+# (cluster_agreement.py, all labelings compared in one batch).
+
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+from artifacts import load_matrix, load_table, table_meta
+from cluster_agreement import compare_labelings
+from cluster_validity import evaluate_sweep
+from shared_matrix import resolve_jobs, shared_matrix, shared_matrix_pool
+
+# artifacts written by standardize_data.py and run_kmeans.py
+FEATURES = "features_std"
+BASE_TABLE = "cluster_assignments"
+
+K_VALUES = [2, 3, 4, 5, 6]
+RANDOM_STATE = 42
+N_INIT = 10
+
+SUBSET_FILE = "results/feature_subsets.csv"
+
+# metrics kept in the results table
+VALIDITY_COLS = ["inertia", "calinski_harabasz", "davies_bouldin", "silhouette"]
+AGREEMENT_COLS = ["matched_share", "ari", "nmi", "vi"]
+
+
+def all_subsets(n_features):
+    """Column index tuples of every non-empty subset, smallest subsets first."""
+    return [cols for size in range(1, n_features + 1) for cols in combinations(range(n_features), size)]
+
+
+def column_view(X, cols):
+    """
+    Columns `cols` (increasing) of X. Evenly spaced columns - a single
+    column, adjacent ones, (0, 2, 4), ... - are a strided view (no copy).
+    Any other subset has no constant column stride, so NumPy cannot view it
+    and the columns are copied (n_rows x len(cols) floats per task).
+    """
+    step = cols[1] - cols[0] if len(cols) > 1 else 1
+    if list(cols) == list(range(cols[0], cols[-1] + 1, step)):
+        return X[:, cols[0]:cols[-1] + 1:step]
+    return X[:, list(cols)]
+
+
+def _fit_subset(X, cols, k_values, random_state, n_init):
+    """K-Means for every K on one subset; returns (cols, {K: labels}, validity table)."""
+    from sklearn.cluster import KMeans
+
+    Xs = column_view(X, cols)
+    labels_by_k = {
+        k: KMeans(n_clusters=k, n_init=n_init, random_state=random_state).fit_predict(Xs)
+        for k in k_values
+    }
+    return cols, labels_by_k, evaluate_sweep(Xs, labels_by_k)
+
+
+def _fit_subset_shared(cols, k_values, random_state, n_init):
+    return _fit_subset(shared_matrix(), cols, k_values, random_state, n_init)
+
+
+def sweep_subsets(X, k_values=K_VALUES, subsets=None, random_state=RANDOM_STATE,
+                  n_init=N_INIT, n_jobs=None):
+    """
+    Fit every subset (default: all non-empty ones) for every K, one pool task
+    per subset. Returns a list of (cols, {K: labels}, validity table) in
+    subset order.
+    """
+    X = np.ascontiguousarray(X, dtype=np.float64)
+    subsets = subsets if subsets is not None else all_subsets(X.shape[1])
+    args = (list(k_values), random_state, n_init)
+
+    n_jobs = resolve_jobs(n_jobs, len(subsets))
+    if n_jobs == 1:
+        return [_fit_subset(X, cols, *args) for cols in subsets]
+    with shared_matrix_pool(X, n_jobs) as pool:
+        futures = [pool.submit(_fit_subset_shared, cols, *args) for cols in subsets]
+        return [f.result() for f in futures]
+
+
+def main(k_values=K_VALUES, random_state=RANDOM_STATE, n_init=N_INIT, n_jobs=None):
+    print(">>> FEATURE_SUBSETS.PY IS RUNNING <<<")
+
+    columns = table_meta(FEATURES)["columns"]
+    X = load_matrix(FEATURES)
+    reference = load_table(BASE_TABLE, columns=["cluster"])["cluster"].to_numpy()
+
+    subsets = all_subsets(len(columns))
+    print(f"Clustering {len(subsets)} feature subsets for K = {list(k_values)} ...")
+    fits = sweep_subsets(X, k_values, subsets, random_state, n_init, n_jobs)
+
+    # one row per (subset, K): validity metrics, then agreement with the baseline
+    rows, labelings = [], []
+    for cols, labels_by_k, validity in fits:
+        name = "+".join(columns[c].removesuffix("_std") for c in cols)
+        for k in validity.index:
+            rows.append({"subset": name, "n_features": len(cols), "k": k,
+                         **validity.loc[k, VALIDITY_COLS].to_dict()})
+            labelings.append(labels_by_k[k])
+
+    agreement = compare_labelings(reference, np.vstack(labelings))
+    table = pd.concat([pd.DataFrame(rows), agreement[AGREEMENT_COLS].reset_index(drop=True)], axis=1)
+    table.to_csv(SUBSET_FILE, index=False)
+    print(f"Saved {len(table)} rows to: {SUBSET_FILE}")
+
+    best = table.loc[table.groupby("subset")["silhouette"].idxmax()]
+    print("\nBest K per subset (by silhouette), top 10 subsets:")
+    print(best.nlargest(10, "silhouette")[["subset", "k", "silhouette", "ari"]]
+          .round(3).to_string(index=False))
+
+    k_base = int(reference.max()) + 1
+    print(f"\nSubsets that reproduce the baseline best at K = {k_base} (ARI):")
+    same_k = table[table["k"] == k_base]
+    print(same_k.nlargest(10, "ari")[["subset", "silhouette", "matched_share", "ari"]]
+          .round(3).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
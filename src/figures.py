@@ -0,0 +1,97 @@
+# figures.py
+# Figure rendering for the plotting steps, separated from the analysis:
+# a step describes each figure as a FigureSpec (output path, size, a
+# module-level draw function and the data it needs) and hands the specs to
+# render(). render() draws them with matplotlib's object-oriented Figure API
+# on the Agg backend (no pyplot state, no GUI), several figures at once on a
+# process pool.
+#
+# Profiles (env HAPPINESS_FIGURES or run_all.py --figures):
+#   "full"    - publication quality, dpi 300 (default)
+#   "preview" - dpi 72, for quick looks while iterating
+#   "none"    - no figures at all, for batch runs where only tables matter
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable
+
+from instrument import traced
+from shared_matrix import resolve_jobs
+
+PROFILES = {
+    "full": {"dpi": 300},
+    "preview": {"dpi": 72},
+    "none": None,
+}
+DEFAULT_PROFILE = "full"
+
+# output files that are figures (skipped in the "none" profile)
+FIGURE_SUFFIXES = (".png", ".pdf", ".svg")
+
+
+@dataclass
+class FigureSpec:
+    """
+    One figure: draw(fig, **data) fills an empty Figure, saved to path.
+    label names the figure in the "Saved <label> to: <path>" message.
+    """
+
+    path: str
+    draw: Callable
+    data: dict = field(default_factory=dict)
+    figsize: tuple = (8, 6)
+    label: str = "figure"
+
+
+def current_profile():
+    """Figure profile of this run (env HAPPINESS_FIGURES, default "full")."""
+    profile = os.environ.get("HAPPINESS_FIGURES", DEFAULT_PROFILE)
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown figure profile {profile!r}; choose from {sorted(PROFILES)}")
+    return profile
+
+
+def is_figure(path):
+    return str(path).endswith(FIGURE_SUFFIXES)
+
+
+def render_one(spec, dpi):
+    """Draw and save one spec with the Agg canvas; returns the path."""
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=spec.figsize)
+    FigureCanvasAgg(fig)
+    spec.draw(fig, **spec.data)
+    fig.savefig(spec.path, dpi=dpi)
+    return spec.path
+
+
+@traced("plot")
+def render(specs, profile=None, jobs=None):
+    """
+    Render FigureSpecs according to the profile (default: current_profile()).
+    More than one spec is rendered on a process pool of up to `jobs`
+    workers (default: number of CPUs, or the step's share inside a parallel
+    pipeline run, see shared_matrix.default_jobs). Returns the saved paths.
+    """
+    specs = list(specs)
+    profile = profile or current_profile()
+    settings = PROFILES[profile]
+    if settings is None:
+        for spec in specs:
+            print(f"Skipped {spec.label} (profile 'none'): {spec.path}")
+        return []
+
+    dpi = settings["dpi"]
+    jobs = resolve_jobs(jobs, len(specs))
+
+    if jobs == 1:
+        paths = [render_one(spec, dpi) for spec in specs]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            paths = list(pool.map(render_one, specs, [dpi] * len(specs)))
+    for spec, path in zip(specs, paths):
+        print(f"Saved {spec.label} to: {path} ({profile}, dpi {dpi})")
+    return paths
@@ -1,16 +1,74 @@
 # gdp_residuals.py
 # Regress happiness on log_GDP and analyze residuals by cluster
+# The fit is stored as an artifact (ols.py) so plot_gdp_happiness.py can reuse it.
+# by_cluster=True also fits Ladder score ~ log_GDP and ~ all six drivers
+# separately within each cluster (all clusters from one grouped pass,
+# ols_grouped.py), plus one pooled all-drivers model with cluster dummies and
+# cluster x driver interactions (same lines as the per-cluster fits, in one model).
 
 import pandas as pd
-from sklearn.linear_model import LinearRegression
 
-CLUSTER_FILE = "results/cluster_assignments.csv"
+from artifacts import load_table
+from ols import fit_ols, save_fit
+from ols_grouped import fit_groups, pooled_design
 
-def main():
+# binary copy of results/cluster_assignments.csv (written by run_kmeans.py)
+CLUSTER_TABLE = "cluster_assignments"
+
+# fitted model Ladder score ~ log_GDP (coefficients, SE, residuals, R^2)
+GDP_FIT = "ols_gdp"
+
+DRIVER_COLS = ["log_GDP", "Social_Support", "Life_expectancy", "Freedom", "Generosity", "Corruption"]
+
+# per-cluster (segmented) regression outputs
+SEGMENT_COEFS = "results/cluster_regressions.csv"
+SEGMENT_RESID = "results/cluster_segment_residuals.csv"
+POOLED_COEFS = "results/cluster_pooled_model.csv"
+
+
+def segmented_regressions(df):
+    """
+    Per-cluster fits of the GDP-only and the all-drivers model, plus the
+    pooled all-drivers model with a separate intercept and slope of every
+    driver per cluster.
+    Saves the coefficient tables and the within-cluster residuals.
+    """
+    y = df["Ladder score"]
+    clusters = df["cluster"].to_numpy()
+
+    tables = []
+    resid = df[["Country name", "cluster"]].copy()
+    for model, cols in {"log_GDP": ["log_GDP"], "all drivers": DRIVER_COLS}.items():
+        coefs, summary, resid[f"resid_{model.replace(' ', '_')}"] = fit_groups(df[cols], y, clusters)
+        coefs = coefs.merge(summary, on="group").rename(columns={"group": "cluster"})
+        coefs.insert(0, "model", model)
+        tables.append(coefs)
+    coefs = pd.concat(tables, ignore_index=True)
+
+    gdp = coefs[(coefs["model"] == "log_GDP")].pivot(index="cluster", columns="term", values="coef")
+    print("\nPer-cluster regression Ladder score ~ log_GDP:")
+    print(gdp.join(coefs[coefs["model"] == "log_GDP"].groupby("cluster")[["n", "r2"]].first()).round(3))
+    fit_all = coefs[coefs["model"] == "all drivers"].groupby("cluster")[["n", "r2"]].first()
+    print("\nPer-cluster regression on all six drivers (R^2):")
+    print(fit_all.round(3))
+
+    # pooled model: one fit, cluster-specific intercepts and driver slopes
+    pooled = fit_ols(pooled_design(df[DRIVER_COLS], clusters, DRIVER_COLS, group_name="cluster"), y)
+    pooled_table = pooled.summary()
+    print(f"\nPooled model with cluster x driver interactions (R^2 = {pooled.r2:.3f}):")
+    print(pooled_table.round(4).to_string(index=False))
+
+    coefs.to_csv(SEGMENT_COEFS, index=False)
+    resid.to_csv(SEGMENT_RESID, index=False)
+    pooled_table.to_csv(POOLED_COEFS, index=False)
+    print(f"\nSaved: {SEGMENT_COEFS}, {SEGMENT_RESID}, {POOLED_COEFS}")
+
+
+def main(by_cluster=True):
     print(">>> GDP_RESIDUALS.PY IS RUNNING <<<")
     
     # 1) Load data with cluster labels
-    df = pd.read_csv(CLUSTER_FILE)
+    df = load_table(CLUSTER_TABLE)
     
     print("\nColumns in cluster_assignments.csv:")
     print(list(df.columns))
@@ -19,18 +77,15 @@ def main():
     X = df[["log_GDP"]]     # predictor
     y = df["Ladder score"]  # outcome (happiness)
     
-    model = LinearRegression()
-    model.fit(X, y)
-    
-    y_pred = model.predict(X)
-    residuals = y - y_pred
+    fit = fit_ols(X, y)
+    save_fit(fit, GDP_FIT)
     
-    df["happiness_resid"] = residuals
+    df["happiness_resid"] = fit.resid
     
     print("\nLinear regression: Ladder score ~ log_GDP")
-    print(f"Intercept: {model.intercept_:.3f}")
-    print(f"Slope (log_GDP): {model.coef_[0]:.3f}")
-    print(f"R^2: {model.score(X, y):.3f}")
+    print(f"Intercept: {fit.coef[0]:.3f}")
+    print(f"Slope (log_GDP): {fit.coef[1]:.3f} (SE {fit.se[1]:.3f})")
+    print(f"R^2: {fit.r2:.3f}")
     
     print("\nSummary of residuals (happiness beyond GDP):")
     print(df["happiness_resid"].describe())
@@ -47,6 +102,10 @@ def main():
     print("\nSaved:")
     print(" - results/cluster_assignments_with_resid.csv")
     print(" - results/cluster_residuals_summary.csv")
+
+    # 5) Separate regressions within each cluster
+    if by_cluster:
+        segmented_regressions(df)
     
 if __name__ == "__main__":
     main()
@@ -0,0 +1,202 @@
+# instrument.py
+# Lightweight run instrumentation: named spans that record wall time, CPU
+# time, peak resident memory and bytes read/written (Linux /proc counters),
+# nested inside each other. run_pipeline() wraps every step in a span and
+# the shared helpers add sub-spans with @traced (artifacts: load/save,
+# load_data: load, kmeans_sweep: fit, cluster_validity: score, figures: plot).
+# A span costs two reads of small /proc files, so tracing stays on by
+# default (HAPPINESS_TRACE=0 turns it off).
+#
+# Output of a pipeline run:
+#   results/pipeline_trace.jsonl - one JSON object per span
+#   results/pipeline_trace.json  - Chrome trace_event format; open it in
+#                                  chrome://tracing or https://ui.perfetto.dev
+#
+# parse_importtime() / import_breakdown() read the output of
+# `python -X importtime` (start-up report of python -m happiness --startup).
+#
+# Counters are per process: work done in a nested process pool (figure
+# rendering, shared-memory K-Means workers) shows up as wall time of the
+# span that waits for it, not as its CPU time or I/O.
+
+import functools
+import json
+import os
+import resource
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+TRACE_LINES = "results/pipeline_trace.jsonl"
+TRACE_FILE = "results/pipeline_trace.json"
+
+ENABLED = os.environ.get("HAPPINESS_TRACE", "1") != "0"
+
+# finished spans of this process, and the names of the open ones
+_RECORDS = []
+_STACK = []
+
+
+def io_counters():
+    """(bytes read, bytes written) by this process so far, (0, 0) if unknown."""
+    try:
+        with open("/proc/self/io") as fh:
+            fields = dict(line.split(":") for line in fh)
+        return int(fields["rchar"]), int(fields["wchar"])
+    except (OSError, KeyError, ValueError):
+        return 0, 0
+
+
+def peak_rss_mb():
+    """Peak resident memory (MB) since process start or the last reset_peak_rss()."""
+    try:
+        with open("/proc/self/status") as fh:
+            for line in fh:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def reset_peak_rss():
+    """Restart the peak-memory count (Linux); a no-op where not supported."""
+    try:
+        with open("/proc/self/clear_refs", "w") as fh:
+            fh.write("5")
+    except OSError:
+        pass
+
+
+@contextmanager
+def span(name, cat="span", reset_peak=False, **args):
+    """
+    Record the block as a span called `name`. Extra keyword arguments are
+    stored with it (e.g. span("load", artifact="features_std")).
+    reset_peak=True measures the peak memory of this block alone.
+    """
+    if not ENABLED:
+        yield
+        return
+    if reset_peak:
+        reset_peak_rss()
+    parent = _STACK[-1] if _STACK else None
+    _STACK.append(name)
+    read0, written0 = io_counters()
+    cpu0 = time.process_time()
+    start = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        end = time.perf_counter_ns()
+        cpu1 = time.process_time()
+        read1, written1 = io_counters()
+        _STACK.pop()
+        _RECORDS.append({
+            "name": name,
+            "cat": cat,
+            "parent": parent,
+            "pid": os.getpid(),
+            "start_us": start // 1000,
+            "wall_s": (end - start) / 1e9,
+            "cpu_s": cpu1 - cpu0,
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+            "bytes_read": read1 - read0,
+            "bytes_written": written1 - written0,
+            **args,
+        })
+
+
+def traced(name, cat="span"):
+    """Decorator: every call of the function is a span `name` (function name stored with it)."""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name, cat, function=f"{func.__module__}.{func.__qualname__}"):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def collect():
+    """Return and forget the spans recorded in this process so far."""
+    records = list(_RECORDS)
+    _RECORDS.clear()
+    return records
+
+
+def chrome_trace(records):
+    """Chrome trace_event document: one complete ("X") event per span."""
+    origin = min((r["start_us"] for r in records), default=0)
+    events = []
+    for pid in sorted({r["pid"] for r in records}):
+        events.append({"name": "process_name", "ph": "M", "pid": pid, "tid": pid,
+                       "args": {"name": f"process {pid}"}})
+    for r in records:
+        args = {k: v for k, v in r.items() if k not in ("name", "cat", "pid", "start_us", "wall_s")}
+        events.append({
+            "name": r["name"],
+            "cat": r["cat"],
+            "ph": "X",
+            "ts": r["start_us"] - origin,
+            "dur": max(int(r["wall_s"] * 1e6), 1),
+            "pid": r["pid"],
+            "tid": r["pid"],
+            "args": args,
+        })
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def write_trace(records, lines_path=TRACE_LINES, trace_path=TRACE_FILE):
+    """Write the spans as JSON lines and as a Chrome trace file."""
+    for path in (lines_path, trace_path):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(lines_path, "w") as fh:
+        for record in records:
+            fh.write(json.dumps(record) + "\n")
+    with open(trace_path, "w") as fh:
+        json.dump(chrome_trace(records), fh)
+
+
+def print_summary(records):
+    """One line per step span: wall, CPU, peak memory and I/O."""
+    steps = [r for r in records if r["cat"] == "step"]
+    if not steps:
+        return
+    print(f"\n{'step':<28}{'wall s':>9}{'cpu s':>9}{'peak MB':>10}{'read MB':>10}{'written MB':>12}")
+    for r in sorted(steps, key=lambda r: r["wall_s"], reverse=True):
+        print(f"{r['name']:<28}{r['wall_s']:>9.2f}{r['cpu_s']:>9.2f}{r['peak_rss_mb']:>10.1f}"
+              f"{r['bytes_read'] / 1e6:>10.2f}{r['bytes_written'] / 1e6:>12.2f}")
+
+
+def parse_importtime(text):
+    """
+    Split the stderr text of `python -X importtime` into import records
+    ({"module", "self_s", "cumulative_s", "depth"}) and the remaining text.
+    """
+    imports, rest = [], []
+    for line in text.splitlines(keepends=True):
+        if not line.startswith("import time:"):
+            rest.append(line)
+            continue
+        fields = line[len("import time:"):].rstrip("\n").split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # the header line
+        name = fields[2]
+        imports.append({
+            "module": name.strip(),
+            "self_s": int(fields[0]) / 1e6,
+            "cumulative_s": int(fields[1]) / 1e6,
+            "depth": (len(name) - len(name.lstrip()) - 1) // 2,  # 0 = imported directly
+        })
+    return imports, "".join(rest)
+
+
+def import_breakdown(imports):
+    """Import time per top-level package, largest first: [(package, seconds, n_modules)]."""
+    totals = {}
+    for record in imports:
+        package = record["module"].split(".")[0]
+        seconds, count = totals.get(package, (0.0, 0))
+        totals[package] = (seconds + record["self_s"], count + 1)
+    return sorted(((p, s, n) for p, (s, n) in totals.items()), key=lambda t: t[1], reverse=True)
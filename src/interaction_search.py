@@ -0,0 +1,131 @@
+# interaction_search.py
+# Lets the data pick the interaction terms that reginteractions.py chooses
+# by hand. All pairwise products of the six drivers are built in one
+# vectorized step; forward-stepwise selection then adds, one at a time, the
+# product that lowers the residual sum of squares most, on top of the six
+# main effects.
+# The model is kept as an orthonormal basis Q (thin QR of the design). Every
+# candidate is stored as its residual against Q, so the SSE drop of adding
+# it is (r'e)^2 / r'r for all candidates at once, and accepting one is a
+# rank-one update of the residual matrix; no candidate is ever refitted.
+# The nested models along the path are scored by repeated k-fold CV
+# (ols_cv.py) and the model with the lowest CV error is reported.
+
+import numpy as np
+import pandas as pd
+
+from ols import add_intercept, fit_ols
+from ols_cv import N_FOLDS, N_REPEATS, cv_scores
+from reginteractions import (
+    BASE_COLS, CORRUPTION_COL, DATA_FILE, FREEDOM_COL, GDP_COL, GENEROSITY_COL, LIFE_COL,
+    SOCIAL_COL, TARGET_COL,
+)
+
+OUT_PATH = "results/interaction_search.csv"
+
+# short names used for the product terms (same style as logGDP_x_SocialSupport)
+SHORT_NAMES = {
+    GDP_COL: "logGDP",
+    SOCIAL_COL: "SocialSupport",
+    LIFE_COL: "LifeExpectancy",
+    FREEDOM_COL: "Freedom",
+    GENEROSITY_COL: "Generosity",
+    CORRUPTION_COL: "Corruption",
+}
+
+RANDOM_STATE = 42
+
+# candidates whose part not explained by the model is this small (relative
+# to their own size) are treated as collinear and skipped
+COLLINEAR_TOL = 1e-8
+
+
+def pairwise_products(X, names):
+    """All products of two different columns of X, with names "a_x_b"."""
+    X = np.asarray(X, dtype=np.float64)
+    i, j = np.triu_indices(X.shape[1], k=1)
+    return X[:, i] * X[:, j], [f"{names[a]}_x_{names[b]}" for a, b in zip(i, j)]
+
+
+def forward_stepwise(X_fixed, candidates, y, max_steps=None):
+    """
+    Forward selection of candidate columns on top of X_fixed (+ intercept).
+    Returns (order of selected candidate indices, SSE after each step,
+    starting with the SSE of the fixed model).
+    """
+    Q, _ = np.linalg.qr(add_intercept(X_fixed))
+    y = np.asarray(y, dtype=np.float64)
+    resid = y - Q @ (Q.T @ y)
+    R = candidates - Q @ (Q.T @ candidates)  # candidates orthogonalized against the model
+    scale = np.maximum((candidates**2).sum(axis=0), 1e-300)
+
+    available = np.ones(R.shape[1], dtype=bool)
+    max_steps = R.shape[1] if max_steps is None else min(max_steps, R.shape[1])
+    order, sse = [], [float(resid @ resid)]
+    for _ in range(max_steps):
+        norm2 = (R**2).sum(axis=0)
+        usable = available & (norm2 > COLLINEAR_TOL * scale)
+        if not usable.any():
+            break
+        gain = np.where(usable, (R.T @ resid) ** 2 / np.where(usable, norm2, 1.0), -np.inf)
+        best = int(np.argmax(gain))
+
+        # rank-one updates: new basis vector q, then residual and candidates
+        q = R[:, best] / np.sqrt(norm2[best])
+        resid -= q * (q @ resid)
+        R -= np.outer(q, q @ R)
+
+        available[best] = False
+        order.append(best)
+        sse.append(float(resid @ resid))
+    return order, sse
+
+
+def main(max_steps=None, cv_folds=N_FOLDS, cv_repeats=N_REPEATS, random_state=RANDOM_STATE):
+    print(">>> INTERACTION_SEARCH.PY IS RUNNING <<<")
+
+    df = pd.read_csv(DATA_FILE).dropna(subset=BASE_COLS + [TARGET_COL])
+    X_base = df[BASE_COLS].to_numpy(dtype=np.float64)
+    y = df[TARGET_COL].to_numpy(dtype=np.float64)
+
+    # 1) Every pairwise product of the drivers
+    products, names = pairwise_products(X_base, [SHORT_NAMES[c] for c in BASE_COLS])
+    print(f"{len(names)} candidate interaction terms on top of the {len(BASE_COLS)} main effects")
+
+    # 2) Forward-stepwise path
+    order, sse = forward_stepwise(X_base, products, y, max_steps)
+    sst = ((y - y.mean()) ** 2).sum()
+
+    # 3) Cross-validate every model on the path (nested specs of one design)
+    X_all = np.column_stack([X_base, products])
+    n_base = len(BASE_COLS)
+    specs = [list(range(n_base)) + [n_base + c for c in order[:step]] for step in range(len(order) + 1)]
+    cv = cv_scores(X_all, y, specs, n_folds=cv_folds, n_repeats=cv_repeats, random_state=random_state)
+
+    path = pd.DataFrame({
+        "step": np.arange(len(order) + 1),
+        "added_term": ["(main effects only)"] + [names[c] for c in order],
+        "r2": 1 - np.array(sse) / sst,
+        "cv_r2": cv["cv_r2"].to_numpy(),
+        "cv_rmse": cv["cv_rmse"].to_numpy(),
+        "cv_rmse_sd": cv["cv_rmse_sd"].to_numpy(),
+    })
+    best_step = int(path["cv_rmse"].idxmin())
+    path["selected"] = path["step"] <= best_step
+    path.to_csv(OUT_PATH, index=False)
+
+    print(f"\nForward-stepwise path ({cv_repeats} x {cv_folds}-fold CV):")
+    print(path.round(4).to_string(index=False))
+    print(f"Saved selection path to: {OUT_PATH}")
+
+    # 4) Selected model
+    chosen = [names[c] for c in order[:best_step]]
+    print(f"\nLowest CV RMSE after {best_step} step(s): {path.loc[best_step, 'cv_rmse']:.4f}")
+    print("Selected interaction terms:", chosen if chosen else "none")
+    fit = fit_ols(X_all[:, specs[best_step]], y, names=list(BASE_COLS) + chosen)
+    print("\nSelected model:")
+    print(fit.summary().round(4).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# kmeans_stream.py
+# Out-of-core clustering for data sets that do not fit next to the pandas
+# copies the normal scripts make.
+# Pass 1: MiniBatchKMeans.partial_fit on chunks of the memory-mapped feature
+#         matrix (a few epochs over the file).
+# Pass 2: predict chunk by chunk, append the rows to the assignments CSV and
+#         artifact, and accumulate per-cluster sums for the profile table.
+# Memory use depends on the chunk size, not on the number of rows.
+
+import numpy as np
+import pandas as pd
+
+from artifacts import TableWriter, iter_table, load_matrix, table_meta
+from silhouette import SAMPLE_SIZE, silhouette_exact
+
+CHUNKSIZE = 50_000
+N_EPOCHS = 3
+
+
+def iter_matrix_chunks(name, columns, chunksize=CHUNKSIZE):
+    """Yield (start row, float64 chunk) from the memory-mapped matrix artifact."""
+    X = load_matrix(name, columns)
+    for start in range(0, len(X), chunksize):
+        yield start, np.asarray(X[start:start + chunksize], dtype=np.float64)
+
+
+def fit_streaming(name, columns, k, chunksize=CHUNKSIZE, n_epochs=N_EPOCHS, random_state=42):
+    """Fit MiniBatchKMeans with k clusters by streaming the matrix n_epochs times."""
+    from sklearn.cluster import MiniBatchKMeans
+
+    model = MiniBatchKMeans(n_clusters=k, random_state=random_state, n_init=3,
+                            batch_size=min(chunksize, 4096))
+    for _ in range(n_epochs):
+        for _, chunk in iter_matrix_chunks(name, columns, chunksize):
+            if len(chunk) >= k:
+                model.partial_fit(chunk)
+    return model
+
+
+def sample_silhouette(name, columns, model, sample_size=SAMPLE_SIZE, random_state=0):
+    """Silhouette of a random sample of rows (only the sampled rows are read)."""
+    X = load_matrix(name, columns)
+    rng = np.random.default_rng(random_state)
+    rows = np.sort(rng.choice(len(X), size=min(sample_size, len(X)), replace=False))
+    sample = np.asarray(X[rows], dtype=np.float64)
+    return silhouette_exact(sample, model.predict(sample))
+
+
+def write_assignments(model, features, columns, table, out_cols, label_col,
+                      out_csv, out_table, profile_csv=None, chunksize=CHUNKSIZE):
+    """
+    Second pass: label every row chunk by chunk. Writes `out_cols` of
+    `table` plus `label_col` to out_csv and to the artifact out_table and, if
+    profile_csv is given, the mean of each feature column per cluster.
+    """
+    meta = table_meta(table)
+    n_rows = meta["n_rows"]
+    dtypes = {col: meta["dtypes"][col] for col in out_cols}
+    dtypes[label_col] = "int32"
+    writer = TableWriter(out_table, dtypes, n_rows)
+
+    k = model.n_clusters
+    sums = np.zeros((k, len(columns)))
+    counts = np.zeros(k)
+
+    chunks = zip(iter_table(table, out_cols, chunksize), iter_matrix_chunks(features, columns, chunksize))
+    with open(out_csv, "w", newline="") as fh:
+        for i, (rows, (_, X)) in enumerate(chunks):
+            labels = model.predict(X).astype(np.int32)
+            rows[label_col] = labels
+            rows.to_csv(fh, header=(i == 0), index=False)
+            writer.write(rows)
+
+            counts += np.bincount(labels, minlength=k)
+            for j in range(len(columns)):
+                sums[:, j] += np.bincount(labels, weights=X[:, j], minlength=k)
+    writer.close()
+
+    if profile_csv is not None:
+        profiles = pd.DataFrame(sums / counts[:, None], columns=columns)
+        profiles.insert(0, label_col, np.arange(k))
+        profiles = profiles[counts > 0]
+        profiles.to_csv(profile_csv, index=False)
+        return profiles
+    return None
@@ -0,0 +1,172 @@
+# kmeans_sweep.py
+# Fits K-Means for many K values (and many restarts per K) in parallel.
+# The feature matrix is copied once into shared memory and every worker
+# process reads it from there (shared_matrix.py). Each (K, restart) task
+# gets its own seed derived from random_state, so the result does not depend
+# on the number of workers or on the order in which tasks finish.
+#
+# mode="bisecting" instead fits only the smallest K from scratch and
+# builds each K+1 from the K solution by splitting its worst cluster (largest
+# within-cluster sum of squares) in two, then refining all centers with a few
+# Lloyd iterations. Running this file compares both modes on the project data.
+
+import time
+
+import numpy as np
+import pandas as pd
+
+from artifacts import load_matrix
+from instrument import traced
+from shared_matrix import resolve_jobs, shared_matrix, shared_matrix_pool
+
+SWEEP_MODES = ["independent", "bisecting"]
+
+# restarts of the 2-means that splits the worst cluster
+SPLIT_N_INIT = 3
+
+
+def restart_seed(random_state, k, restart):
+    """Seed for one (K, restart) task, derived from random_state."""
+    return int(np.random.SeedSequence([random_state, k, restart]).generate_state(1)[0])
+
+
+def _fit_one(X, k, restart, random_state):
+    from sklearn.cluster import KMeans
+
+    model = KMeans(n_clusters=k, n_init=1, random_state=restart_seed(random_state, k, restart))
+    model.fit(X)
+    return k, restart, model
+
+
+def _fit_shared(k, restart, random_state):
+    return _fit_one(shared_matrix(), k, restart, random_state)
+
+
+@traced("fit")
+def sweep_kmeans(X, k_values, n_init=10, random_state=42, n_jobs=None, mode="independent"):
+    """
+    Fit K-Means with n_init restarts for every K in k_values.
+    Returns {K: fitted KMeans}, keeping the restart with the lowest inertia
+    (ties go to the lower restart number). Each model also gets
+    total_n_iter_, the Lloyd iterations spent on that K over all restarts.
+    n_jobs: worker processes (default: all CPUs, 1 = no pool).
+    mode: "independent" or "bisecting" (see sweep_bisecting).
+    """
+    if mode == "bisecting":
+        return sweep_bisecting(X, k_values, n_init, random_state, n_jobs)
+    if mode != "independent":
+        raise ValueError(f"Unknown sweep mode {mode!r}; choose from {SWEEP_MODES}")
+
+    X = np.ascontiguousarray(X, dtype=np.float64)
+    tasks = [(k, r) for k in k_values for r in range(n_init)]
+
+    n_jobs = resolve_jobs(n_jobs, len(tasks))
+
+    if n_jobs == 1:
+        fits = [_fit_one(X, k, r, random_state) for k, r in tasks]
+    else:
+        with shared_matrix_pool(X, n_jobs) as pool:
+            futures = [pool.submit(_fit_shared, k, r, random_state) for k, r in tasks]
+            fits = [f.result() for f in futures]
+
+    best = {}
+    iterations = {}
+    for k, restart, model in sorted(fits, key=lambda fit: (fit[0], fit[1])):
+        iterations[k] = iterations.get(k, 0) + model.n_iter_
+        if k not in best or model.inertia_ < best[k].inertia_:
+            best[k] = model
+    for k, model in best.items():
+        model.total_n_iter_ = iterations[k]
+    return best
+
+
+def split_worst_cluster(X, model, seed):
+    """
+    Initial centers for K+1 clusters: the K centers of `model`, with the
+    cluster that has the largest within-cluster sum of squares replaced by
+    the two centers of a 2-means fit on its members.
+    Returns (centers, Lloyd iterations used by the split; estimated as the
+    best restart's n_iter_ times the number of restarts).
+    """
+    from sklearn.cluster import KMeans
+
+    labels, centers = model.labels_, model.cluster_centers_
+    k = len(centers)
+    sse = np.bincount(labels, weights=((X - centers[labels]) ** 2).sum(axis=1), minlength=k)
+    sizes = np.bincount(labels, minlength=k)
+    sse[sizes < 2] = -1  # a single point cannot be split
+    worst = int(np.argmax(sse))
+
+    halves = KMeans(n_clusters=2, n_init=SPLIT_N_INIT, random_state=seed).fit(X[labels == worst])
+    new_centers = np.vstack([np.delete(centers, worst, axis=0), halves.cluster_centers_])
+    return new_centers, halves.n_iter_ * SPLIT_N_INIT
+
+
+def sweep_bisecting(X, k_values, n_init=10, random_state=42, n_jobs=None):
+    """
+    Warm-started sweep: the smallest K is fitted like sweep_kmeans (n_init
+    restarts); every following K starts from the previous solution with its
+    worst cluster split in two (bisecting K-Means) and is refined with Lloyd
+    iterations on all rows. Same return value as sweep_kmeans.
+    """
+    from sklearn.cluster import KMeans
+
+    X = np.ascontiguousarray(X, dtype=np.float64)
+    k_values = sorted(k_values)
+    models = sweep_kmeans(X, [k_values[0]], n_init, random_state, n_jobs)
+
+    model = models[k_values[0]]
+    # walk through every K up to the largest one, keep the requested ones
+    for k in range(k_values[0] + 1, k_values[-1] + 1):
+        init, split_iter = split_worst_cluster(X, model, restart_seed(random_state, k, 0))
+        model = KMeans(n_clusters=k, init=init, n_init=1).fit(X)
+        model.total_n_iter_ = split_iter + model.n_iter_
+        if k in k_values:
+            models[k] = model
+    return models
+
+
+def compare_sweep_modes(X, k_values, n_init=10, random_state=42, n_jobs=1):
+    """
+    Run both sweep modes on X. Returns one row per (mode, K) with the
+    inertia, the Lloyd iterations and the wall time of the whole sweep.
+    """
+    rows = []
+    for mode in SWEEP_MODES:
+        start = time.perf_counter()
+        models = sweep_kmeans(X, k_values, n_init, random_state, n_jobs, mode=mode)
+        seconds = time.perf_counter() - start
+        for k in sorted(models):
+            rows.append({
+                "mode": mode,
+                "k": k,
+                "inertia": models[k].inertia_,
+                "lloyd_iterations": models[k].total_n_iter_,
+                "sweep_seconds": seconds,
+            })
+    return pd.DataFrame(rows)
+
+
+def main(k_values=range(2, 31), n_init=10):
+    print(">>> KMEANS_SWEEP.PY IS RUNNING <<<")
+
+    X = load_matrix("features_std")
+    k_values = list(k_values)
+    print(f"Comparing sweep modes for K = {k_values[0]}..{k_values[-1]} on {len(X)} rows")
+
+    table = compare_sweep_modes(X, k_values, n_init)
+    wide = table.pivot(index="k", columns="mode", values=["inertia", "lloyd_iterations"])
+    wide["inertia_ratio"] = wide[("inertia", "bisecting")] / wide[("inertia", "independent")]
+    print(wide)
+
+    totals = table.groupby("mode")[["lloyd_iterations", "sweep_seconds"]].agg(
+        {"lloyd_iterations": "sum", "sweep_seconds": "first"}
+    )
+    print("\nTotal Lloyd iterations and wall time per sweep:")
+    print(totals)
+    speedup = totals.loc["independent", "lloyd_iterations"] / totals.loc["bisecting", "lloyd_iterations"]
+    print(f"\nBisecting sweep uses {speedup:.1f}x fewer Lloyd iterations.")
+
+
+if __name__ == "__main__":
+    main()
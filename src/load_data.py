@@ -1,21 +1,144 @@
 # load_data.py
 # uploading the data and checking if it works
+# Also the shared loader for the raw WHR file: every script reads the raw
+# data through load_raw(), which only parses the columns it is asked for
+# (with fixed dtypes), can filter rows while streaming the file in chunks,
+# and keeps the parsed result in memory for the rest of the run.
+
+import os
 
 import pandas as pd
 
+from instrument import traced
+
 DATA_FILE = "data/world-happiness-2024.csv"
 
+# the WHR export uses ';' as separator and ',' as decimal mark
+SEP = ";"
+DECIMAL = ","
+
+# Declared schema of the raw file: column -> dtype.
+# Analysis columns keep float64; columns that are only displayed are float32.
+# "year" and "Regional indicator" only exist in the multi-year panel files.
+SCHEMA = {
+    "Country name": "object",
+    "Regional indicator": "category",
+    "year": "int16",
+    "Ladder score": "float64",
+    "upperwhisker": "float32",
+    "lowerwhisker": "float32",
+    "Explained by: Log GDP per capita": "float64",
+    "Explained by: Social support": "float64",
+    "Explained by: Healthy life expectancy": "float64",
+    "Explained by: Freedom to make life choices": "float64",
+    "Explained by: Generosity": "float64",
+    "Explained by: Perceptions of corruption": "float64",
+    "Dystopia + residual": "float32",
+}
+
+# rows per chunk when streaming large files
+CHUNKSIZE = 100_000
+
+# parsed results of this run: key -> DataFrame
+_CACHE = {}
+
+
+def read_header(path=DATA_FILE):
+    """Column names of the raw file (reads only the first line)."""
+    return list(pd.read_csv(path, sep=SEP, nrows=0).columns)
+
+
+def _row_mask(chunk, where, predicate):
+    mask = pd.Series(True, index=chunk.index)
+    for col, wanted in (where or {}).items():
+        if isinstance(wanted, (list, tuple, set, frozenset)):
+            mask &= chunk[col].isin(wanted)
+        else:
+            mask &= chunk[col] == wanted
+    if predicate is not None:
+        mask &= predicate(chunk)
+    return mask
+
+
+def iter_raw(columns=None, where=None, predicate=None, chunksize=CHUNKSIZE, path=DATA_FILE):
+    """
+    Stream the raw file in chunks of `chunksize` rows (None = one chunk).
+    columns:   columns to parse (default: every column of the file)
+    where:     {column: value or list of values} rows to keep, e.g. {"year": [2023, 2024]}
+    predicate: function(chunk) -> boolean mask, for filters `where` cannot express
+    Yields DataFrames with only the requested columns and matching rows.
+    """
+    header = read_header(path)
+    if columns is None:
+        columns = header
+    needed = list(dict.fromkeys(list(columns) + list((where or {}).keys())))
+    missing = [c for c in needed if c not in header]
+    if missing:
+        raise KeyError(f"Columns {missing} not found in {path}")
+
+    options = {
+        "sep": SEP,
+        "decimal": DECIMAL,
+        "usecols": needed,
+        "dtype": {c: SCHEMA[c] for c in needed if c in SCHEMA},
+    }
+    if chunksize is None:
+        reader = [pd.read_csv(path, **options)]
+    else:
+        reader = pd.read_csv(path, chunksize=chunksize, **options)
+
+    for chunk in reader:
+        if where or predicate is not None:
+            chunk = chunk[_row_mask(chunk, where, predicate)]
+        yield chunk[list(columns)]
+
+
+@traced("load")
+def load_raw(columns=None, where=None, predicate=None, chunksize=None, path=DATA_FILE):
+    """
+    Load the raw WHR file as one DataFrame (same arguments as iter_raw).
+    chunksize=None parses the file in one go; set it to bound the memory used
+    while filtering a large file. Results are cached for the rest of the run,
+    so a second call with the same arguments does not parse the file again.
+    """
+    stat = os.stat(path)
+    key = (
+        os.path.abspath(path),
+        stat.st_mtime_ns,
+        stat.st_size,
+        tuple(columns) if columns is not None else None,
+        tuple(sorted((col, frozenset(v) if isinstance(v, (list, tuple, set)) else v)
+                     for col, v in (where or {}).items())),
+        predicate,
+    )
+    if key not in _CACHE and columns is not None:
+        # reuse an earlier read of more columns with the same filters
+        for cached_key, cached in _CACHE.items():
+            same_rows = cached_key[:3] == key[:3] and cached_key[4:] == key[4:]
+            if same_rows and set(columns) <= set(cached.columns):
+                _CACHE[key] = cached[list(columns)]
+                break
+    if key not in _CACHE:
+        parts = list(iter_raw(columns, where, predicate, chunksize, path))
+        if len(parts) == 1:
+            _CACHE[key] = parts[0].reset_index(drop=True)
+        else:
+            _CACHE[key] = pd.concat(parts, ignore_index=True)
+    # callers may modify their copy; the cached frame stays untouched
+    return _CACHE[key].copy()
+
+
 def main () :
     """Load the csv file and show basic info."""
     # read the Excel file into a pandas DataFrame
-    df = pd.read_csv(DATA_FILE, sep=";", decimal=",")
-    
+    df = load_raw()
+
     # print number of rows and columns
     print("Data shape (rows, columns):", df.shape)
-    
+
     # show the first 5 rows
     print("\nFirst 5 rows")
     print(df.head())
-    
+
 if __name__ == "__main__":
     main()
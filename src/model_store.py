@@ -0,0 +1,210 @@
+# model_store.py
+# Versioned store for fitted scikit-learn estimators (the scaler of
+# standardize_data.py, the K-Means models of run_kmeans.py, the PCA of
+# pca_clusters.py), so steps and tests load the fitted object instead of
+# fitting it again.
+#
+# Layout: results/models/<name>/v001/, v002/, ... - one save_arrays()
+# artifact per version (see artifacts.py): the estimator's array attributes
+# as .npy files, everything else in meta.json together with
+#   data_hash - SHA-256 of the training matrix
+#   params    - estimator parameters plus the fit settings of the step
+# No pickles: the estimator is rebuilt from its class name and state.
+#
+# A stored model is stale when it was fitted on other data or with other
+# params; load_model() raises StaleModelError then, and load_or_fit() fits
+# and stores a new version. The newest KEEP_VERSIONS versions are kept.
+
+import hashlib
+import importlib
+import json
+import shutil
+import time
+from pathlib import Path
+
+import numpy as np
+
+from artifacts import load_arrays, save_arrays
+
+MODEL_DIR = "results/models"
+KEEP_VERSIONS = 5
+
+
+class StaleModelError(RuntimeError):
+    """The stored model was fitted on other data or with other params."""
+
+
+def _root(root):
+    """Store folder: root, or MODEL_DIR as it is at call time (tests point it elsewhere)."""
+    return MODEL_DIR if root is None else root
+
+
+def model_path(name, root=None):
+    """Folder with all versions of model `name` (used to declare pipeline outputs)."""
+    return str(Path(_root(root)) / name)
+
+
+def data_hash(X, block_rows=100_000):
+    """
+    SHA-256 of a training matrix (values as float64, and its shape). Hashed
+    in row blocks, so a memory-mapped matrix is never copied as a whole.
+    """
+    X = np.asarray(X)
+    digest = hashlib.sha256(str(X.shape).encode())
+    for start in range(0, len(X), block_rows):
+        digest.update(np.ascontiguousarray(X[start:start + block_rows], dtype=np.float64).tobytes())
+    return digest.hexdigest()
+
+
+def versions(name, root=None):
+    """Stored version numbers of model `name`, oldest first."""
+    folder = Path(_root(root)) / name
+    if not folder.is_dir():
+        return []
+    return sorted(int(p.name[1:]) for p in folder.glob("v[0-9]*") if p.is_dir())
+
+
+def _jsonable(value):
+    """value as plain JSON (tuples become lists); repr() for anything else."""
+    try:
+        return json.loads(json.dumps(value))
+    except TypeError:
+        return repr(value)
+
+
+def _split_state(model):
+    """
+    Estimator state -> (arrays, JSON attributes, names of text arrays,
+    random generator states). A RandomState (e.g. of MiniBatchKMeans after
+    partial_fit) is stored as its key array plus the rest of get_state().
+    """
+    arrays, attributes, text_arrays, random_states = {}, {}, [], {}
+    for key, value in model.__getstate__().items():
+        if isinstance(value, np.random.RandomState):
+            bit_generator, keys, pos, has_gauss, cached_gaussian = value.get_state()
+            arrays[key] = keys
+            random_states[key] = [bit_generator, pos, has_gauss, cached_gaussian]
+        elif isinstance(value, np.ndarray):
+            if value.dtype == object:
+                # e.g. feature_names_in_; stored as fixed-width unicode (no pickle)
+                value = value.astype(str)
+                text_arrays.append(key)
+            arrays[key] = value
+        elif isinstance(value, np.generic):
+            attributes[key] = value.item()
+        elif value is None or isinstance(value, (bool, int, float, str)):
+            attributes[key] = value
+        else:
+            raise TypeError(f"Cannot store attribute {key!r} of {type(model).__name__} "
+                            f"({type(value).__name__})")
+    return arrays, attributes, text_arrays, random_states
+
+
+def save_model(model, name, X, params=None, root=None):
+    """
+    Store a fitted estimator as the next version of model `name`.
+    X: the training matrix; params: fit settings of the step (stored next
+    to, and taking precedence over, the estimator's own get_params()).
+    Returns the version number.
+    """
+    root = _root(root)
+    arrays, attributes, text_arrays, random_states = _split_state(model)
+    X = np.asarray(X)
+    version = (versions(name, root) or [0])[-1] + 1
+    cls = type(model)
+    meta = {
+        "model": name,
+        "version": version,
+        "estimator": f"{cls.__module__}.{cls.__qualname__}",
+        "sklearn": attributes.pop("_sklearn_version", None),
+        "data_hash": data_hash(X),
+        "n_rows": int(X.shape[0]),
+        "n_features": int(X.shape[1]) if X.ndim > 1 else 1,
+        "params": _jsonable({**model.get_params(), **(params or {})}),
+        "attributes": attributes,
+        "text_arrays": text_arrays,
+        "random_states": random_states,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    save_arrays(arrays, f"{name}/v{version:03d}", meta, root)
+
+    for old in versions(name, root)[:-KEEP_VERSIONS]:
+        shutil.rmtree(Path(root) / name / f"v{old:03d}")
+    return version
+
+
+def model_info(name, version=None, root=None):
+    """meta.json of a stored model version (default: the newest)."""
+    return _load(name, version, root)[1]
+
+
+def stale_reason(meta, X=None, params=None):
+    """Why a stored model (its meta) does not fit X / params, or None if it does."""
+    if X is not None and data_hash(X) != meta["data_hash"]:
+        return "training data changed"
+    for key, value in (params or {}).items():
+        if _jsonable(value) != meta["params"].get(key):
+            return f"parameter {key} changed: {meta['params'].get(key)!r} -> {value!r}"
+    return None
+
+
+def _load(name, version, root):
+    root = _root(root)
+    stored = versions(name, root)
+    if not stored:
+        raise FileNotFoundError(
+            f"Model not found: {model_path(name, root)}. Run the step that fits it first."
+        )
+    version = stored[-1] if version is None else version
+    arrays, meta = load_arrays(f"{name}/v{version:03d}", root)
+    return arrays, meta
+
+
+def load_model(name, X=None, params=None, version=None, root=None):
+    """
+    Rebuild the stored estimator `name` (default: the newest version).
+    With X and/or params, raises StaleModelError if the model was fitted
+    on other data or with other settings.
+    """
+    arrays, meta = _load(name, version, root)
+    reason = stale_reason(meta, X, params)
+    if reason is not None:
+        raise StaleModelError(f"Model {name} v{meta['version']:03d} is stale: {reason}")
+
+    module, _, qualname = meta["estimator"].rpartition(".")
+    cls = getattr(importlib.import_module(module), qualname)
+    state = dict(meta["attributes"])
+    for key, values in arrays.items():
+        values = np.array(values)
+        state[key] = values.astype(object) if key in meta["text_arrays"] else values
+    for key, (bit_generator, pos, has_gauss, cached_gaussian) in meta.get("random_states", {}).items():
+        generator = np.random.RandomState()
+        generator.set_state((bit_generator, state[key], pos, has_gauss, cached_gaussian))
+        state[key] = generator
+    if meta["sklearn"] is not None:
+        # lets scikit-learn warn when the model comes from another version
+        state["_sklearn_version"] = meta["sklearn"]
+    model = cls.__new__(cls)
+    model.__setstate__(state)
+    return model
+
+
+def load_or_fit(name, X, fit, params=None, root=None):
+    """
+    The stored model `name` if it was fitted on X with params; otherwise
+    call fit() (returns the fitted estimator) and store its result.
+    """
+    try:
+        model = load_model(name, X, params, root=root)
+    except FileNotFoundError:
+        reason = "first fit"
+    except StaleModelError as exc:
+        reason = str(exc)
+    else:
+        print(f"Loaded model {name} from: {model_path(name, root)}")
+        return model
+
+    model = fit()
+    version = save_model(model, name, X, params, root)
+    print(f"Saved model {name} v{version:03d} to: {model_path(name, root)} ({reason})")
+    return model
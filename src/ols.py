@@ -0,0 +1,206 @@
+# ols.py
+# Closed-form ordinary least squares shared by the regression steps
+# (gdp_residuals.py, plot_gdp_happiness.py, reginteractions.py).
+#   fit_ols()   - one model, solved through a QR decomposition of the design
+#   fit_specs() - many specifications (column subsets of one design matrix)
+#                 from a single Gram matrix X'X, one Cholesky solve each
+# A fit is kept as an OLSFit (coefficients, standard errors, residuals, R^2)
+# and can be stored as an artifact, so later steps reuse it instead of
+# fitting the same model again.
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from artifacts import ARTIFACT_DIR, load_arrays, save_arrays
+
+INTERCEPT = "Intercept"
+
+
+@dataclass
+class OLSFit:
+    """Result of one least-squares fit (names include the intercept, if any)."""
+
+    names: list
+    coef: np.ndarray
+    se: np.ndarray
+    fitted: np.ndarray
+    resid: np.ndarray
+    xtx_inv: np.ndarray
+    df_resid: int
+    r2: float
+    intercept: bool = True
+
+    @property
+    def n(self):
+        return len(self.resid)
+
+    @property
+    def sigma2(self):
+        """Residual variance (SSE / residual degrees of freedom); NaN without residual df."""
+        if self.df_resid <= 0:
+            return np.nan
+        return float(self.resid @ self.resid) / self.df_resid
+
+    @property
+    def rmse(self):
+        """In-sample root mean squared error (SSE / n)."""
+        return float(np.sqrt(self.resid @ self.resid / self.n))
+
+    @property
+    def adj_r2(self):
+        if self.df_resid <= 0:
+            return np.nan
+        return 1 - (1 - self.r2) * (self.n - int(self.intercept)) / self.df_resid
+
+    def params(self):
+        """Coefficients as a Series indexed by term name."""
+        return pd.Series(self.coef, index=self.names)
+
+    def predict(self, X):
+        """Predictions for new rows (X without the intercept column)."""
+        return add_intercept(X, self.intercept) @ self.coef
+
+    def summary(self):
+        """Table with coefficient, standard error, t statistic and p-value per term."""
+        from scipy import stats
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = self.coef / self.se
+        p = 2 * stats.t.sf(np.abs(t), self.df_resid)
+        return pd.DataFrame({"term": self.names, "coef": self.coef, "se": self.se, "t": t, "p_value": p})
+
+
+def add_intercept(X, intercept=True):
+    """Design matrix as float64, with a leading column of ones if intercept."""
+    X = np.asarray(X, dtype=np.float64)
+    if X.ndim == 1:
+        X = X[:, None]
+    if not intercept:
+        return X
+    return np.column_stack([np.ones(len(X)), X])
+
+
+def _column_names(X, names, intercept):
+    if names is None:
+        names = list(X.columns) if isinstance(X, pd.DataFrame) else [f"x{j}" for j in range(np.shape(X)[1])]
+    return ([INTERCEPT] if intercept else []) + list(names)
+
+
+def _finish(Xd, y, coef, xtx_inv, names, intercept):
+    fitted = Xd @ coef
+    resid = y - fitted
+    df_resid = len(y) - len(coef)
+    sse = float(resid @ resid)
+    sst = float(((y - y.mean()) ** 2).sum()) if intercept else float(y @ y)
+    sigma2 = sse / df_resid if df_resid > 0 else np.nan
+    return OLSFit(
+        names=names,
+        coef=coef,
+        se=np.sqrt(sigma2 * np.diag(xtx_inv)),
+        fitted=fitted,
+        resid=resid,
+        xtx_inv=xtx_inv,
+        df_resid=df_resid,
+        r2=1 - sse / sst if sst > 0 else np.nan,
+        intercept=intercept,
+    )
+
+
+def spec_columns(X, specs, names=None, intercept=True):
+    """
+    Design-matrix column indices (intercept first) of every spec; specs are
+    lists of column names or indices of X. specs=None means all columns.
+    Returns (all design column names, list of index arrays).
+    """
+    all_names = _column_names(X, names, intercept)
+    lead = [0] if intercept else []
+    offset = int(intercept)
+    if specs is None:
+        specs = [list(range(len(all_names) - offset))]
+    index = [
+        np.array(lead + [all_names.index(c) if isinstance(c, str) else c + offset for c in spec], dtype=int)
+        for spec in specs
+    ]
+    return all_names, index
+
+
+def solve_stack(gram, rhs):
+    """
+    Solve a stack of normal equations gram[b] @ coef[b] = rhs[b]; falls back
+    to the pseudo-inverse if one of them is singular.
+    """
+    try:
+        return np.linalg.solve(gram, rhs[..., None])[..., 0]
+    except np.linalg.LinAlgError:
+        return np.einsum("bij,bj->bi", np.linalg.pinv(gram), rhs)
+
+
+def inv_stack(gram):
+    """Inverse of every matrix in a stack; pseudo-inverse if one of them is singular."""
+    try:
+        return np.linalg.inv(gram)
+    except np.linalg.LinAlgError:
+        return np.linalg.pinv(gram)
+
+
+def fit_ols(X, y, names=None, intercept=True):
+    """
+    Least squares of y on the columns of X (plus an intercept), via QR:
+    X = QR, coef = R^-1 Q'y, (X'X)^-1 = R^-1 R^-T.
+    """
+    from scipy import linalg
+
+    names = _column_names(X, names, intercept)
+    Xd = add_intercept(X, intercept)
+    y = np.asarray(y, dtype=np.float64)
+
+    Q, R = np.linalg.qr(Xd)
+    coef = linalg.solve_triangular(R, Q.T @ y)
+    R_inv = linalg.solve_triangular(R, np.eye(R.shape[1]))
+    return _finish(Xd, y, coef, R_inv @ R_inv.T, names, intercept)
+
+
+def fit_specs(X, y, specs, names=None, intercept=True):
+    """
+    Fit several specifications that use different columns of the same X.
+    specs: list of column lists (names if X is a DataFrame or names are
+    given, else indices); the intercept is added to every spec.
+    X'X and X'y are computed once; each spec is one Cholesky solve on its
+    sub-block. Returns a list of OLSFit in the order of specs.
+    """
+    from scipy import linalg
+
+    all_names, index = spec_columns(X, specs, names, intercept)
+    Xd = add_intercept(X, intercept)
+    y = np.asarray(y, dtype=np.float64)
+    gram = Xd.T @ Xd
+    xty = Xd.T @ y
+
+    fits = []
+    for idx in index:
+        factor = linalg.cho_factor(gram[np.ix_(idx, idx)])
+        coef = linalg.cho_solve(factor, xty[idx])
+        xtx_inv = linalg.cho_solve(factor, np.eye(len(idx)))
+        fits.append(_finish(Xd[:, idx], y, coef, xtx_inv, [all_names[i] for i in idx], intercept))
+    return fits
+
+
+def save_fit(fit, name, root=ARTIFACT_DIR):
+    """Store an OLSFit as artifact `name` (arrays + names and R^2 in meta.json)."""
+    arrays = {key: getattr(fit, key) for key in ("coef", "se", "fitted", "resid", "xtx_inv")}
+    meta = {"names": fit.names, "df_resid": fit.df_resid, "r2": fit.r2, "intercept": fit.intercept}
+    return save_arrays(arrays, name, meta, root)
+
+
+def load_fit(name, root=ARTIFACT_DIR):
+    """Load an OLSFit stored with save_fit()."""
+    arrays, meta = load_arrays(name, root)
+    return OLSFit(
+        names=meta["names"],
+        df_resid=meta["df_resid"],
+        r2=meta["r2"],
+        intercept=meta["intercept"],
+        **{key: np.asarray(values) for key, values in arrays.items()},
+    )
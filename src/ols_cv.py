@@ -0,0 +1,110 @@
+# ols_cv.py
+# Cross-validated R^2 / RMSE for OLS specifications without refitting from
+# scratch (ols.py):
+#   k-fold / repeated k-fold - X'X and X'y are computed once for the full
+#       design; the training fit of a fold is the full Gram minus the fold's
+#       own rows (downdating), so a fold costs one small solve. Every
+#       specification (column subset) reuses the same fold Grams.
+#   leave-one-out - no folds at all: the LOO residual of row i is
+#       e_i / (1 - h_i), with h_i the diagonal of the hat matrix.
+
+import numpy as np
+import pandas as pd
+
+from ols import add_intercept, spec_columns
+
+N_FOLDS = 5
+N_REPEATS = 10
+
+
+def fold_ids(n, n_folds=N_FOLDS, n_repeats=1, random_state=0):
+    """Fold number of every row for each repeat, shape (n_repeats, n)."""
+    rng = np.random.default_rng(random_state)
+    base = np.arange(n) % n_folds
+    return np.vstack([rng.permutation(base) for _ in range(n_repeats)])
+
+
+def kfold_predictions(X, y, folds, specs=None, names=None, intercept=True):
+    """
+    Out-of-fold predictions for every spec and repeat, shape
+    (n_specs, n_repeats, n). folds: fold_ids() output.
+    """
+    Xd = add_intercept(X, intercept)
+    y = np.asarray(y, dtype=np.float64)
+    folds = np.atleast_2d(folds)
+    n_repeats, n = folds.shape
+    n_folds = int(folds.max()) + 1
+    _, index = spec_columns(X, specs, names, intercept)
+
+    gram = Xd.T @ Xd
+    xty = Xd.T @ y
+    # training sufficient statistics of every (repeat, fold): full minus the fold
+    train_gram = np.empty((n_repeats, n_folds) + gram.shape)
+    train_xty = np.empty((n_repeats, n_folds, len(xty)))
+    for r in range(n_repeats):
+        for f in range(n_folds):
+            rows = folds[r] == f
+            train_gram[r, f] = gram - Xd[rows].T @ Xd[rows]
+            train_xty[r, f] = xty - Xd[rows].T @ y[rows]
+
+    preds = np.empty((len(index), n_repeats, n))
+    for s, idx in enumerate(index):
+        sub_gram = train_gram[:, :, idx[:, None], idx]
+        sub_xty = train_xty[:, :, idx]
+        coef = np.linalg.solve(sub_gram, sub_xty[..., None])[..., 0]  # (R, F, q)
+        for r in range(n_repeats):
+            preds[s, r] = (Xd[:, idx] * coef[r, folds[r]]).sum(axis=1)
+    return preds
+
+
+def loo_predictions(X, y, specs=None, names=None, intercept=True):
+    """
+    Leave-one-out predictions for every spec, shape (n_specs, n), from a
+    single fit each: y_i - e_i / (1 - h_i).
+    """
+    from scipy import linalg
+
+    Xd = add_intercept(X, intercept)
+    y = np.asarray(y, dtype=np.float64)
+    gram = Xd.T @ Xd
+    xty = Xd.T @ y
+
+    preds = []
+    for idx in spec_columns(X, specs, names, intercept)[1]:
+        Xs = Xd[:, idx]
+        factor = linalg.cho_factor(gram[np.ix_(idx, idx)])
+        resid = y - Xs @ linalg.cho_solve(factor, xty[idx])
+        leverage = (Xs * linalg.cho_solve(factor, Xs.T).T).sum(axis=1)
+        preds.append(y - resid / (1 - leverage))
+    return np.array(preds)
+
+
+def _scores(y, preds):
+    """R^2 and RMSE of predictions (..., n) against y."""
+    sse = ((y - preds) ** 2).sum(axis=-1)
+    sst = ((y - y.mean()) ** 2).sum()
+    return 1 - sse / sst, np.sqrt(sse / len(y))
+
+
+def cv_scores(X, y, specs=None, spec_names=None, n_folds=N_FOLDS, n_repeats=1,
+              random_state=0, names=None, intercept=True):
+    """
+    Out-of-sample R^2 and RMSE for every spec. n_folds="loo" uses the
+    leave-one-out shortcut. With repeats, the mean and standard deviation
+    over repeats are reported. Returns a DataFrame indexed by spec.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    if n_folds == "loo":
+        r2, rmse = _scores(y, loo_predictions(X, y, specs, names, intercept))
+        r2_sd = rmse_sd = np.zeros_like(r2)
+    else:
+        folds = fold_ids(len(y), n_folds, n_repeats, random_state)
+        r2, rmse = _scores(y, kfold_predictions(X, y, folds, specs, names, intercept))
+        r2, r2_sd = r2.mean(axis=1), r2.std(axis=1)
+        rmse, rmse_sd = rmse.mean(axis=1), rmse.std(axis=1)
+
+    index = spec_names if spec_names is not None else range(len(r2))
+    return pd.DataFrame(
+        {"cv_r2": r2, "cv_r2_sd": r2_sd, "cv_rmse": rmse, "cv_rmse_sd": rmse_sd},
+        index=pd.Index(index, name="spec"),
+    )
@@ -0,0 +1,114 @@
+# ols_grouped.py
+# Separate OLS fits per group (e.g. per cluster) from one pass over the
+# data: the per-group X'X, X'y and y'y are accumulated together with a
+# one-hot group matrix (einsum / bincount), then every group's normal
+# equations are solved in one stacked call (ols.py). No loop over groups.
+# The residual sums of squares come from the residuals themselves (one
+# bincount), not from y'y - b'X'y, which cancels badly when R^2 is near 1.
+# pooled_design() builds the matching single model with group dummies and
+# group x predictor interactions.
+
+import numpy as np
+import pandas as pd
+
+from ols import INTERCEPT, add_intercept, inv_stack, solve_stack
+
+
+def grouped_stats(X, y, groups, n_groups=None, intercept=True):
+    """
+    Per-group sufficient statistics. Returns (gram (G, p, p), xty (G, p),
+    yy (G,), y_sum (G,), n (G,)); groups are integer codes 0..G-1.
+    """
+    Xd = add_intercept(X, intercept)
+    y = np.asarray(y, dtype=np.float64)
+    groups = np.asarray(groups)
+    if n_groups is None:
+        n_groups = int(groups.max()) + 1
+    onehot = (groups[:, None] == np.arange(n_groups)).astype(np.float64)  # (n, G)
+
+    gram = np.einsum("ng,ni,nj->gij", onehot, Xd, Xd, optimize=True)
+    xty = np.einsum("ng,ni,n->gi", onehot, Xd, y, optimize=True)
+    yy = np.bincount(groups, weights=y * y, minlength=n_groups)
+    y_sum = np.bincount(groups, weights=y, minlength=n_groups)
+    n = np.bincount(groups, minlength=n_groups)
+    return gram, xty, yy, y_sum, n
+
+
+def fit_groups(X, y, groups, names=None, n_groups=None, intercept=True):
+    """
+    OLS of y on X within every group. Returns (coefficient table with one
+    row per group and term: coef, se, t, p_value; group table: n, r2, rmse;
+    residual of every row under its own group's fit).
+    Groups with no more rows than coefficients get NaN. A group whose X'X
+    is singular (e.g. a predictor without variance in it) gets the
+    minimum-norm (pseudo-inverse) fit; its residuals are still exact.
+    """
+    from scipy import stats
+
+    if names is None:
+        names = list(X.columns) if isinstance(X, pd.DataFrame) else [f"x{j}" for j in range(np.shape(X)[1])]
+    terms = ([INTERCEPT] if intercept else []) + list(names)
+    groups = np.asarray(groups)
+    gram, xty, yy, y_sum, n = grouped_stats(X, y, groups, n_groups, intercept)
+    p = gram.shape[1]
+
+    ok = n > p
+    coef = np.full(xty.shape, np.nan)
+    xtx_inv = np.full(gram.shape, np.nan)
+    if ok.any():
+        coef[ok] = solve_stack(gram[ok], xty[ok])
+        xtx_inv[ok] = inv_stack(gram[ok])
+
+    Xd = add_intercept(X, intercept)
+    y = np.asarray(y, dtype=np.float64)
+    resid = y - (Xd * coef[groups]).sum(axis=1)
+
+    n_groups = len(n)
+    sse = np.bincount(groups, weights=resid * resid, minlength=n_groups)
+    df_resid = np.where(ok, n - p, np.nan)
+    sigma2 = sse / df_resid
+    se = np.sqrt(sigma2[:, None] * np.diagonal(xtx_inv, axis1=1, axis2=2))
+    if intercept:
+        centered = y - (y_sum / np.maximum(n, 1))[groups]
+        sst = np.bincount(groups, weights=centered * centered, minlength=n_groups)
+    else:
+        sst = yy
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = coef / se  # NaN for a coefficient pinned by a singular group
+    coefs = pd.DataFrame({
+        "group": np.repeat(np.arange(n_groups), p),
+        "term": terms * n_groups,
+        "coef": coef.ravel(),
+        "se": se.ravel(),
+        "t": t.ravel(),
+        "p_value": (2 * stats.t.sf(np.abs(t), df_resid[:, None])).ravel(),
+    })
+    summary = pd.DataFrame({
+        "group": np.arange(n_groups),
+        "n": n,
+        "r2": 1 - sse / sst,
+        "rmse": np.sqrt(sse / np.maximum(n, 1)),
+    })
+    return coefs, summary, resid
+
+
+def pooled_design(X, groups, names, n_groups=None, group_name="group"):
+    """
+    Design for one pooled model with a separate intercept and slope per
+    group: X, group dummies (group 0 = reference) and dummy x X interactions.
+    Returns a DataFrame (fit it with an intercept).
+    """
+    X = np.asarray(X, dtype=np.float64)
+    groups = np.asarray(groups)
+    if n_groups is None:
+        n_groups = int(groups.max()) + 1
+    dummies = (groups[:, None] == np.arange(1, n_groups)).astype(np.float64)  # (n, G-1)
+
+    columns = {name: X[:, j] for j, name in enumerate(names)}
+    for g in range(1, n_groups):
+        columns[f"{group_name}{g}"] = dummies[:, g - 1]
+    for g in range(1, n_groups):
+        for j, name in enumerate(names):
+            columns[f"{group_name}{g}_x_{name}"] = dummies[:, g - 1] * X[:, j]
+    return pd.DataFrame(columns)
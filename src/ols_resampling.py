@@ -0,0 +1,76 @@
+# ols_resampling.py
+# Bootstrap and permutation inference for OLS coefficients (ols.py), with
+# every resampled regression solved in one batched call:
+#   bootstrap   - a resample is a vector of row weights (how often each row
+#                 was drawn); X'WX and X'Wy for a whole batch of resamples
+#                 are two einsum calls, then one stacked np.linalg.solve
+#   permutation - Freedman-Lane: permute the residuals of the model without
+#                 the tested term; the design does not change, so all
+#                 permutations are one product with (X'X)^-1 X'
+
+import numpy as np
+
+from ols import add_intercept, fit_specs, solve_stack
+
+N_RESAMPLES = 2000
+
+# resamples solved per batch (bounds the (batch, n, p) intermediate)
+BATCH_SIZE = 500
+
+
+def bootstrap_coefs(X, y, n_boot=N_RESAMPLES, random_state=0, intercept=True):
+    """
+    Coefficients of n_boot case-resampling bootstrap fits, shape (n_boot, p)
+    (p includes the intercept). Resamples depend only on random_state.
+    """
+    Xd = add_intercept(X, intercept)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    rng = np.random.default_rng(random_state)
+
+    coefs = []
+    for start in range(0, n_boot, BATCH_SIZE):
+        size = min(BATCH_SIZE, n_boot - start)
+        weights = rng.multinomial(n, np.full(n, 1.0 / n), size=size).astype(np.float64)
+        gram = np.einsum("bn,ni,nj->bij", weights, Xd, Xd, optimize=True)
+        xty = (weights * y) @ Xd
+        coefs.append(solve_stack(gram, xty))
+    return np.vstack(coefs)
+
+
+def bootstrap_ci(samples, level=0.95):
+    """Percentile interval per column of a (n_boot, p) sample."""
+    tail = (1 - level) / 2 * 100
+    low, high = np.percentile(samples, [tail, 100 - tail], axis=0)
+    return low, high
+
+
+def permutation_pvalues(X, y, n_perm=N_RESAMPLES, random_state=0, intercept=True):
+    """
+    Two-sided Freedman-Lane permutation p-value for every slope (not the
+    intercept). For slope j the residuals of the model without j are
+    permuted and added back to its fitted values; p = (1 + #|b*_j| >= |b_j|)
+    / (n_perm + 1). The same permutations are used for every j.
+    """
+    Xd = add_intercept(X, intercept)
+    y = np.asarray(y, dtype=np.float64)
+    n, p = Xd.shape
+    offset = int(intercept)
+    slopes = range(p - offset)
+
+    # (X'X)^-1 X' maps any response vector to coefficients
+    projector = np.linalg.solve(Xd.T @ Xd, Xd.T)
+    observed = projector @ y
+
+    reduced = fit_specs(X, y, [[c for c in slopes if c != j] for j in slopes], intercept=intercept)
+    rng = np.random.default_rng(random_state)
+    perms = np.argsort(rng.random((n_perm, n)), axis=1)  # (n_perm, n)
+
+    pvalues = np.empty(len(slopes))
+    for j, fit in zip(slopes, reduced):
+        # Y*[:, b] = fitted + permuted residuals; only row j of the projector is needed
+        permuted = fit.fitted[:, None] + fit.resid[perms].T
+        null = projector[j + offset] @ permuted
+        extreme = np.abs(null) >= np.abs(observed[j + offset]) - 1e-12
+        pvalues[j] = (1 + extreme.sum()) / (n_perm + 1)
+    return pvalues
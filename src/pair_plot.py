@@ -0,0 +1,113 @@
+# pair_plot.py
+# Scatter matrix of a set of variables coloured by cluster, as FigureSpecs
+# for figures.py. The correlation matrix is computed once (np.corrcoef) and
+# the point colours once (one RGBA row per point), so drawing a panel is a
+# plain column lookup. Lower triangle: one scatter per pair; diagonal:
+# histogram stacked by cluster; upper triangle: the correlation.
+# Single panels can be exported as their own figures.
+
+import numpy as np
+
+MATRIX_PANEL_SIZE = 2.2  # inches per panel in the matrix
+POINT_SIZE = 8           # marker area in the matrix panels
+
+
+def cluster_colors(clusters, cmap="viridis"):
+    """
+    Colours for cluster codes as matplotlib's scatter(c=clusters, cmap=cmap)
+    would pick them. Returns (RGBA per point, RGBA per cluster, cluster codes).
+    """
+    from matplotlib import colormaps
+
+    clusters = np.asarray(clusters)
+    codes = np.unique(clusters)
+    span = max(codes.max() - codes.min(), 1)
+    palette = colormaps[cmap]((codes - codes.min()) / span)
+    return palette[np.searchsorted(codes, clusters)], palette, codes
+
+
+def cluster_legend(ax, palette, codes, **kwargs):
+    from matplotlib.lines import Line2D
+
+    handles = [Line2D([], [], marker="o", linestyle="", color=color) for color in palette]
+    return ax.legend(handles, [str(c) for c in codes], title="Cluster", **kwargs)
+
+
+def draw_pair_matrix(fig, X, names, point_colors, palette, codes, clusters, corr):
+    """All pairs of the columns of X in one grid with shared axes per column / row."""
+    from matplotlib import colormaps
+
+    p = len(names)
+    axes = fig.subplots(p, p, sharex="col", squeeze=False)
+    for i in range(1, p):
+        for j in range(1, i):
+            axes[i, j].sharey(axes[i, 0])
+
+    by_cluster = [clusters == c for c in codes]
+    for i in range(p):
+        for j in range(p):
+            ax = axes[i, j]
+            if i > j:
+                ax.scatter(X[:, j], X[:, i], color=point_colors, s=POINT_SIZE, alpha=0.8, linewidths=0)
+            elif i == j:
+                ax.hist([X[mask, i] for mask in by_cluster], bins=20, stacked=True, color=palette)
+                ax.set_yticks([])
+            else:
+                r = corr[i, j]
+                ax.set_facecolor(colormaps["coolwarm"]((r + 1) / 2, alpha=0.5))
+                ax.text(0.5, 0.5, f"{r:.2f}", transform=ax.transAxes, ha="center", va="center", fontsize=12)
+                ax.tick_params(left=False, labelleft=False)
+            if i == p - 1:
+                ax.set_xlabel(names[j], fontsize=8)
+            if j == 0 and i > 0:
+                ax.set_ylabel(names[i], fontsize=8)
+            elif i <= j:
+                ax.tick_params(labelleft=False)
+            ax.tick_params(labelsize=7)
+
+    cluster_legend(axes[0, p - 1], palette, codes, loc="upper right", fontsize=8)
+    fig.suptitle("Happiness drivers by cluster (upper triangle: correlation)")
+    fig.tight_layout()
+
+
+def draw_panel(fig, x, y, x_name, y_name, point_colors, palette, codes, r):
+    """One pair as its own figure, with zero lines and the correlation in the title."""
+    ax = fig.subplots()
+    ax.scatter(x, y, color=point_colors, alpha=0.8)
+    cluster_legend(ax, palette, codes)
+
+    # Zero lines (helpful if data are z-scores; if not, they still
+    # show the point where each variable is equal to 0)
+    ax.axvline(0, color="grey", linestyle="--", linewidth=1)
+    ax.axhline(0, color="grey", linestyle="--", linewidth=1)
+
+    ax.set_xlabel(x_name)
+    ax.set_ylabel(y_name)
+    ax.set_title(f"{x_name} vs {y_name} (corr = {r:.2f})")
+    fig.tight_layout()
+
+
+def pair_plot_specs(X, names, clusters, out_file, panels=(), cmap="viridis"):
+    """
+    FigureSpecs for the scatter matrix of the columns of X (saved to out_file)
+    and for the single panels in `panels`: (x name, y name, output file).
+    Returns (specs, correlation matrix).
+    """
+    from figures import FigureSpec
+
+    X = np.asarray(X, dtype=np.float64)
+    names = list(names)
+    clusters = np.asarray(clusters)
+    corr = np.corrcoef(X, rowvar=False)
+    point_colors, palette, codes = cluster_colors(clusters, cmap)
+    shared = {"point_colors": point_colors, "palette": palette, "codes": codes}
+
+    size = MATRIX_PANEL_SIZE * len(names)
+    specs = [FigureSpec(out_file, draw_pair_matrix, dict(shared, X=X, names=names, clusters=clusters, corr=corr),
+                        figsize=(size, size), label="scatter matrix")]
+    for x_name, y_name, path in panels:
+        j, i = names.index(x_name), names.index(y_name)
+        specs.append(FigureSpec(path, draw_panel, dict(
+            shared, x=X[:, j], y=X[:, i], x_name=x_name, y_name=y_name, r=corr[i, j],
+        ), label="plot"))
+    return specs, corr
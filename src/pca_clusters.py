@@ -1,21 +1,107 @@
 # pca_clusters.py
 # PCA visualization of K-Means clusters
+# Large inputs (many rows) are drawn as a per-cluster density image
+# (density.py) instead of one marker per row.
+# The fitted PCA is kept in the model store (model_store.py) and reused
+# while the standardized data is the same.
 
-import pandas as pd
-from sklearn.decomposition import PCA
-import matplotlib.pyplot as plt
 
-STD_FILE = "results/happiness_standardized.csv"
-CLUSTER_FILE = "results/cluster_assignments.csv"
+from artifacts import load_table
+from density import category_colors, density_grid, draw_density, sparse_points, use_density
+from figures import FigureSpec, render
+from model_store import load_or_fit
 
-def main():
+# binary copies of happiness_standardized.csv and cluster_assignments.csv
+STD_TABLE = "happiness_standardized"
+CLUSTER_TABLE = "cluster_assignments"
+
+PCA_FILE = "results/pca_clusters.png"
+N_COMPONENTS = 2
+
+
+def fit_pca(X, n_components=N_COMPONENTS):
+    """PCA of X, from the model store if it was already fitted on X."""
+    from sklearn.decomposition import PCA
+
+    return load_or_fit("pca", X, lambda: PCA(n_components=n_components).fit(X),
+                       {"n_components": n_components})
+
+
+def draw_pca(fig, pcs, clusters, explained):
+    """Scatter of the first two principal components, coloured by cluster."""
+    ax = fig.subplots()
+    scatter = ax.scatter(
+        pcs[:, 0],
+        pcs[:, 1],
+        c=clusters,
+        cmap="tab10",
+        alpha=0.8,
+        edgecolors="k",
+        linewidths=0.5,
+    )
+    
+    ax.set_xlabel(f"PC1 ({explained[0]:.1f}% variance)")
+    ax.set_ylabel(f"PC2 ({explained[1]:.1f}% variance)")
+    ax.set_title("PCA of happiness drivers with K-Means clusters")
+    
+    # Legend: one entry per cluster
+    handles, labels = scatter.legend_elements(prop="colors", num=len(set(clusters)))
+    ax.legend(handles, labels, title="Cluster", loc="best")
+
+    fig.tight_layout()
+
+
+def draw_pca_density(fig, counts, extent, outliers, outlier_clusters, explained):
+    """Density image of the first two principal components per cluster, outliers as markers."""
+    ax = fig.subplots()
+    colors = category_colors(len(counts))
+    handles = draw_density(ax, counts, extent, colors)
+    ax.scatter(
+        outliers[:, 0],
+        outliers[:, 1],
+        color=colors[outlier_clusters],
+        s=8,
+        edgecolors="k",
+        linewidths=0.3,
+    )
+
+    ax.set_xlabel(f"PC1 ({explained[0]:.1f}% variance)")
+    ax.set_ylabel(f"PC2 ({explained[1]:.1f}% variance)")
+    ax.set_title("PCA of happiness drivers with K-Means clusters (density)")
+    ax.legend(handles, [str(c) for c in range(len(counts))], title="Cluster", loc="best")
+
+    fig.tight_layout()
+
+
+def pca_figure(pcs, clusters, explained, density=None):
+    """
+    FigureSpec for the PCA scatter: markers for small data, a density image
+    (only the grid and the outliers are passed to the renderer) for large data.
+    """
+    if not use_density(len(pcs), density):
+        return FigureSpec(PCA_FILE, draw_pca, {"pcs": pcs, "clusters": clusters, "explained": explained},
+                          label="PCA scatter plot")
+
+    counts, extent, cells = density_grid(pcs[:, 0], pcs[:, 1], clusters)
+    sparse = sparse_points(counts, cells)
+    return FigureSpec(PCA_FILE, draw_pca_density, {
+        "counts": counts,
+        "extent": extent,
+        "outliers": pcs[sparse],
+        "outlier_clusters": clusters[sparse],
+        "explained": explained,
+    }, label="PCA scatter plot")
+
+
+def main(density=None):
+    """density: True/False forces the density image / markers; None decides by size."""
     print(">>> PCA_CLUSTERS.PY IS RUNNING <<<")
     
     # 1) load standardized data
-    df_std = pd.read_csv(STD_FILE)
+    df_std = load_table(STD_TABLE)
     
     # 2) Load cluster labels (may not include _std columns)
-    df_clusters = pd.read_csv(CLUSTER_FILE)[["Country name", "cluster"]]
+    df_clusters = load_table(CLUSTER_TABLE, columns=["Country name", "cluster"])
     
     # 3) Merge to attach cluster label to standardized features
     df = df_std.merge(df_clusters, on="Country name", how="left")
@@ -38,9 +124,9 @@ def main():
     
     X = df[factor_std_cols].values
     
-    # 4) Run PCA with 2 components
-    pca = PCA(n_components=2)
-    X_pca = pca.fit_transform(X)
+    # 4) Run PCA with 2 components (stored model if the data did not change)
+    pca = fit_pca(X)
+    X_pca = pca.transform(X)
     
     df["PC1"] = X_pca[:, 0]
     df["PC2"] = X_pca[:, 1]
@@ -52,31 +138,9 @@ def main():
     print(f"\nExplained variance by PC1: {pc1_var:.1f}%")
     print(f"Explained variance by PC2: {pc2_var:.1f}%")
     
-    # 5) Scatter plot
-    plt.figure(figsize=(8, 6))
-    scatter = plt.scatter(
-        df["PC1"],
-        df["PC2"],
-        c=df["cluster"],
-        cmap="tab10",
-        alpha=0.8,
-        edgecolors="k",
-        linewidths=0.5,
-    )
-    
-    plt.xlabel(f"PC1 ({pc1_var:.1f}% variance)")
-    plt.ylabel(f"PC2 ({pc2_var:.1f}% variance)")
-    plt.title("PCA of happiness drivers with K-Means clusters")
-    
-    # Legend: one entry per cluster
-    handles, labels = scatter.legend_elements(prop="colors", num=df["cluster"].nunique())
-    plt.legend(handles, labels, title="Cluster", loc="best")
-                                              
-    plt.tight_layout()
-    plt.savefig("results/pca_clusters.png", dpi=300)
-    plt.close()
-    
-    print("\nSaved PCA scatter plot to: results/pca_clusters.png")
-                                              
+    # 5) Scatter plot (markers or density image, rendered by figures.py)
+    render([pca_figure(X_pca, df["cluster"].to_numpy(), expl_var * 100, density)])
+
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,580 @@
+# pipeline.py
+# Declares every analysis step together with the files it reads and writes,
+# builds the dependency graph from those files and runs the steps inside
+# one warm Python process (independent branches run in parallel).
+# A step is skipped when its input files, source code and parameters have the
+# same content hash as at its last successful run.
+
+import contextlib
+import hashlib
+import importlib
+import inspect
+import io
+import json
+import multiprocessing
+import os
+import sys
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from artifacts import artifact_path
+from figures import DEFAULT_PROFILE, current_profile, is_figure
+from instrument import collect, print_summary, span, write_trace
+from model_store import model_path
+from shared_matrix import WORKER_JOBS_ENV
+
+SRC_DIR = Path(__file__).resolve().parent
+
+# hashes of what each step was last built from (make-style incremental runs)
+STATE_FILE = "results/.pipeline_state.json"
+
+# heavy libraries the steps import lazily; preloaded before the worker pool forks
+WARM_IMPORTS = ["pandas", "scipy.linalg", "scipy.stats", "sklearn.cluster",
+                "sklearn.decomposition", "sklearn.preprocessing",
+                "matplotlib.figure", "matplotlib.backends.backend_agg"]
+
+RAW_FILE = "data/world-happiness-2024.csv"
+CLEAN_FILE = "results/clean_happiness_data.csv"
+STD_FILE = "results/happiness_standardized.csv"
+CLUSTER_FILE = "results/cluster_assignments.csv"
+PROFILE_FILE = "results/cluster_profiles.csv"
+RESID_FILE = "results/cluster_assignments_with_resid.csv"
+NO_GDP_FILE = "results/cluster_assignments_no_gdp.csv"
+
+# binary intermediate tables (see artifacts.py)
+STD_TABLE = artifact_path("happiness_standardized")
+FEATURES = artifact_path("features_std")
+CLUSTER_TABLE = artifact_path("cluster_assignments")
+NO_GDP_TABLE = artifact_path("cluster_assignments_no_gdp")
+GDP_FIT = artifact_path("ols_gdp")
+INTERACTION_FIT = artifact_path("ols_reginteractions")
+
+# fitted estimators (see model_store.py)
+SCALER_MODEL = model_path("scaler")
+KMEANS_MODEL = model_path("kmeans")
+PCA_MODEL = model_path("pca")
+
+
+@dataclass
+class Step:
+    """
+    One pipeline step: src/<name>.py with a main(), the files it reads/writes
+    and keyword arguments passed to main().
+    """
+
+    name: str
+    description: str
+    inputs: list = field(default_factory=list)
+    outputs: list = field(default_factory=list)
+    params: dict = field(default_factory=dict)
+
+
+STEPS = [
+    Step("explore_data", "Explore dataset",
+         inputs=[RAW_FILE]),
+    Step("prepare_data", "Prepare cleaned dataset",
+         inputs=[RAW_FILE],
+         outputs=[CLEAN_FILE]),
+    Step("standardize_data", "Standardize happiness drivers",
+         inputs=[CLEAN_FILE],
+         outputs=[STD_FILE, STD_TABLE, FEATURES, SCALER_MODEL]),
+    Step("explore_factors", "Explore factors (summary & corr)",
+         inputs=[FEATURES],
+         outputs=[
+             "results/factor_summary.csv",
+             "results/factor_correlations.csv",
+             "results/factor_corr_heatmap.png",
+         ]),
+    Step("run_kmeans", "Run K-Means clustering",
+         inputs=[STD_TABLE, FEATURES],
+         outputs=[CLUSTER_FILE, CLUSTER_TABLE, PROFILE_FILE, "results/kmeans_validity.csv",
+                  KMEANS_MODEL],
+         params={"k_values": [3, 4, 5, 6], "random_state": 42, "n_init": 10,
+                 "selection_metric": "silhouette", "sweep_mode": "independent",
+                 "streaming": False}),
+    Step("analyze_clusters", "Summarize clusters",
+         inputs=[CLUSTER_TABLE],
+         outputs=["results/cluster_summary.csv"]),
+    Step("pca_clusters", "PCA + cluster visualization",
+         inputs=[STD_TABLE, CLUSTER_TABLE],
+         outputs=["results/pca_clusters.png", PCA_MODEL]),
+    Step("gdp_residuals", "Regression & residual happiness",
+         inputs=[CLUSTER_TABLE],
+         outputs=[
+             RESID_FILE,
+             "results/cluster_residuals_summary.csv",
+             "results/cluster_regressions.csv",
+             "results/cluster_segment_residuals.csv",
+             "results/cluster_pooled_model.csv",
+             GDP_FIT,
+         ],
+         params={"by_cluster": True}),
+    Step("plot_cluster_profiles", "Plot cluster profiles (bar chart)",
+         inputs=[PROFILE_FILE],
+         outputs=["results/cluster_profiles_bars.png"]),
+    Step("plot_residuals_boxplot", "Plot residual happiness boxplot",
+         inputs=[RESID_FILE],
+         outputs=["results/residuals_boxplot.png"]),
+    Step("plot_gdp_happiness", "Plot GDP vs happiness scatter",
+         inputs=[RESID_FILE, GDP_FIT],
+         outputs=["results/gdp_happiness_scatter_labeled.png"]),
+    Step("run_kmeans_no_gdp", "Robustness: clustering without GDP",
+         inputs=[STD_TABLE, FEATURES],
+         outputs=[NO_GDP_FILE, NO_GDP_TABLE],
+         params={"n_clusters": 3, "streaming": False}),
+    Step("compare_clusters", "Robustness: agreement of the no-GDP clusters with the baseline",
+         inputs=[CLUSTER_TABLE, NO_GDP_TABLE],
+         outputs=["results/cluster_confusion_no_gdp.csv", "results/cluster_agreement.csv"]),
+    Step("feature_subsets", "Robustness: clustering on every subset of the drivers",
+         inputs=[FEATURES, CLUSTER_TABLE],
+         outputs=["results/feature_subsets.csv"],
+         params={"k_values": [2, 3, 4, 5, 6], "random_state": 42, "n_init": 10}),
+    Step("cluster_stability", "Robustness: bootstrap stability of the clusters",
+         inputs=[FEATURES, CLUSTER_TABLE],
+         outputs=[
+             "results/stability_country.csv",
+             "results/stability_clusters.csv",
+             "results/stability_ari.csv",
+             "results/stability_coassignment.csv",
+         ],
+         params={"n_resamples": 1000, "method": "bootstrap", "random_state": 42}),
+    Step("reginteractions", "Regression with interactions & corruption dummy",
+         inputs=[CLEAN_FILE],
+         outputs=[
+             "results/reginteractions_coeffs.csv",
+             "results/reginteractions_coeffs.png",
+             "results/reginteractions_cv.csv",
+             INTERACTION_FIT,
+         ],
+         params={"n_boot": 2000, "n_perm": 2000, "random_state": 42,
+                 "cv_folds": 5, "cv_repeats": 10}),
+    Step("corruption_threshold", "Sensitivity of the regression to the HighCorruption cut",
+         inputs=[CLEAN_FILE],
+         outputs=[
+             "results/corruption_threshold_sweep.csv",
+             "results/corruption_threshold_sweep.png",
+         ],
+         params={"q_min": 0.05, "q_max": 0.95, "n_thresholds": 181}),
+    Step("interaction_search", "Forward-stepwise search over all pairwise interactions",
+         inputs=[CLEAN_FILE],
+         outputs=["results/interaction_search.csv"],
+         params={"cv_folds": 5, "cv_repeats": 10, "random_state": 42}),
+    Step("interaction_gdp_pairs",
+         "Scatter matrix of all driver pairs; GDP vs Life expectancy and Generosity",
+         inputs=[CLUSTER_TABLE],
+         outputs=[
+             "results/driver_pairs_clusters.png",
+             "results/gdp_lifeexpectancy_clusters.png",
+             "results/gdp_generosity_clusters.png",
+         ]),
+]
+
+
+def build_graph(steps):
+    """
+    Return {step name: set of upstream step names}, derived from the files
+    each step reads and writes. Raises ValueError if two steps write the same
+    file or the steps depend on each other in a cycle.
+    """
+    producers = {}
+    for step in steps:
+        for out in step.outputs:
+            if out in producers:
+                raise ValueError(
+                    f"{out} is written by both {producers[out]} and {step.name}"
+                )
+            producers[out] = step.name
+
+    graph = {}
+    for step in steps:
+        graph[step.name] = {
+            producers[f] for f in step.inputs if f in producers
+        } - {step.name}
+
+    # Check for cycles (Kahn's algorithm)
+    remaining = {name: set(deps) for name, deps in graph.items()}
+    while remaining:
+        ready = [name for name, deps in remaining.items() if not deps]
+        if not ready:
+            raise ValueError(f"Dependency cycle between steps: {sorted(remaining)}")
+        for name in ready:
+            del remaining[name]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+
+    return graph
+
+
+def topological_order(steps):
+    """Step names in an order that respects dependencies (stable w.r.t. STEPS)."""
+    graph = build_graph(steps)
+    order = []
+    done = set()
+    while len(order) < len(steps):
+        for step in steps:
+            if step.name not in done and graph[step.name] <= done:
+                order.append(step.name)
+                done.add(step.name)
+                break
+    return order
+
+
+def file_hash(path):
+    """SHA-256 of a file's content (of every file, by relative name, for a folder)."""
+    path = Path(path)
+    digest = hashlib.sha256()
+    files = sorted(p for p in path.rglob("*") if p.is_file()) if path.is_dir() else [path]
+    for f in files:
+        if path.is_dir():
+            digest.update(str(f.relative_to(path)).encode())
+        with open(f, "rb") as fh:
+            for block in iter(lambda: fh.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def source_files(module):
+    """
+    The module's own .py file plus every src/ module it imports (directly
+    or through other src/ modules), so a change in a shared helper
+    invalidates the steps that use it.
+    """
+    found = {}
+    todo = [module]
+    while todo:
+        mod = todo.pop()
+        path = Path(getattr(mod, "__file__", "") or "")
+        if path.parent != SRC_DIR or mod.__name__ in found:
+            continue
+        found[mod.__name__] = path
+        for value in vars(mod).values():
+            if inspect.ismodule(value):
+                todo.append(value)
+            else:
+                owner = sys.modules.get(getattr(value, "__module__", None) or "")
+                if owner is not None:
+                    todo.append(owner)
+    return [found[name] for name in sorted(found)]
+
+
+def step_signature(step):
+    """
+    Hashes that decide whether a step is up to date: inputs, source code,
+    params, and for steps that draw figures the figure profile (figures.py).
+    """
+    module = importlib.import_module(step.name)
+    source = hashlib.sha256()
+    for path in source_files(module):
+        source.update(path.read_bytes())
+    params = json.dumps(step.params, sort_keys=True, default=str)
+    signature = {
+        "inputs": {f: file_hash(f) for f in step.inputs if Path(f).exists()},
+        "source": source.hexdigest(),
+        "params": hashlib.sha256(params.encode()).hexdigest(),
+    }
+    if any(is_figure(out) for out in step.outputs):
+        signature["figures"] = current_profile()
+    return signature
+
+
+def load_state():
+    if Path(STATE_FILE).exists():
+        with open(STATE_FILE) as fh:
+            return json.load(fh)
+    return {}
+
+
+def save_state(state):
+    Path(STATE_FILE).parent.mkdir(parents=True, exist_ok=True)
+    with open(STATE_FILE, "w") as fh:
+        json.dump(state, fh, indent=2, sort_keys=True)
+
+
+def why_run(step, signature, state):
+    """
+    Reason the step has to run, or None if its recorded build is still valid.
+    With the "none" figure profile, missing or differently rendered figures
+    do not make a step run (only its tables matter).
+    """
+    record = state.get(step.name)
+    if record is None:
+        return "never run"
+    skip_figures = signature.get("figures") == "none"
+    for out in step.outputs:
+        if skip_figures and is_figure(out):
+            continue
+        if not Path(out).exists():
+            return f"output missing: {out}"
+    for f in step.inputs:
+        if signature["inputs"].get(f) != record["inputs"].get(f):
+            return f"input changed: {f}"
+    if signature["source"] != record["source"]:
+        return "source code changed"
+    if signature["params"] != record["params"]:
+        return "parameters changed"
+    if "figures" in signature and not skip_figures:
+        if signature["figures"] != record.get("figures", DEFAULT_PROFILE):
+            return f"figure profile changed: {signature['figures']}"
+    return None
+
+
+# plan() reason of a step that is up to date itself but downstream of one that runs
+MAY_RUN = "may run, if inputs change"
+
+
+def plan(steps, state=None, force=False):
+    """
+    Return {step name: reason to run or None} for a whole run, without running
+    anything. A step that is up to date itself but downstream of a step that
+    runs gets a reason starting with MAY_RUN: the real run decides only after
+    the upstream step has finished, and skips the step if the rebuilt inputs
+    hash the same as before (early cutoff).
+    """
+    if state is None:
+        state = load_state()
+    graph = build_graph(steps)
+    by_name = {step.name: step for step in steps}
+
+    reasons = {}
+    for name in topological_order(steps):
+        step = by_name[name]
+        if force:
+            reasons[name] = "forced"
+            continue
+        reasons[name] = why_run(step, step_signature(step), state)
+        if reasons[name] is None:
+            stale_upstream = sorted(dep for dep in graph[name] if reasons[dep])
+            if stale_upstream:
+                reasons[name] = f"{MAY_RUN}: after {stale_upstream[0]}"
+    return reasons
+
+
+def print_plan(steps, reasons):
+    by_name = {step.name: step for step in steps}
+    print("Dry run: nothing is executed.\n")
+    for name, reason in reasons.items():
+        if not reason:
+            status = "SKIP  (up to date)"
+        elif reason.startswith(MAY_RUN):
+            status = f"MAYBE ({reason})"
+        else:
+            status = f"RUN   ({reason})"
+        print(f"{status:<60} src/{name}.py - {by_name[name].description}")
+    n_maybe = sum(1 for reason in reasons.values() if reason and reason.startswith(MAY_RUN))
+    n_run = sum(1 for reason in reasons.values() if reason) - n_maybe
+    print(f"\n{n_run} of {len(reasons)} steps would run, {n_maybe} more if their inputs change.")
+
+
+def print_banner(step, reason=None):
+    print("\n" + "=" * 100)
+    print(f"STEP: {step.description}")
+    print(f"Running: src/{step.name}.py main()" + (f"   [{reason}]" if reason else ""))
+    print("=" * 100)
+
+
+def _run_step(module_name, params):
+    """
+    Worker entry point: run one step's main() and capture what it prints.
+    Returns (ok, output text, spans recorded in this process, see instrument.py).
+    """
+    buffer = io.StringIO()
+    ok = True
+    with contextlib.redirect_stdout(buffer):
+        try:
+            with span(module_name, cat="step", reset_peak=True):
+                importlib.import_module(module_name).main(**params)
+        except Exception:
+            traceback.print_exc(file=buffer)
+            ok = False
+    return ok, buffer.getvalue(), collect()
+
+
+def _import_steps(steps):
+    """Import every step module once, so workers start warm. Drops missing ones."""
+    available = []
+    for step in steps:
+        try:
+            importlib.import_module(step.name)
+        except ModuleNotFoundError as exc:
+            if exc.name != step.name:
+                raise
+            print(f"WARNING: Script not found: src/{step.name}.py")
+            continue
+        available.append(step)
+    return available
+
+
+def _init_worker(budget):
+    """
+    Worker initializer: drop the spans copied from the parent by fork (it
+    reports them) and limit the nested pools of the steps (K sweep,
+    bootstrap, figures) to this worker's share of the CPUs.
+    """
+    collect()
+    os.environ[WORKER_JOBS_ENV] = str(budget)
+
+
+def _start_pool(jobs):
+    """
+    Worker pool for parallel steps. The step modules import scikit-learn,
+    SciPy and matplotlib only when they use them, so these are loaded here
+    once and "fork" copies the warm parent into every worker.
+    """
+    with span("import libraries", cat="pipeline"):
+        for module in WARM_IMPORTS:
+            importlib.import_module(module)
+    budget = max(1, (os.cpu_count() or 1) // jobs)
+    return ProcessPoolExecutor(max_workers=jobs, mp_context=multiprocessing.get_context("fork"),
+                               initializer=_init_worker, initargs=(budget,))
+
+
+def _warm_raw_data(steps, state, force):
+    """
+    Parse the raw file in the parent before the pool forks, if more than one
+    step that reads it has to run. load_data caches the parsed table only
+    within a process, so otherwise every such worker parses the file again.
+    """
+    readers = [step for step in steps if RAW_FILE in step.inputs
+               and (force or why_run(step, step_signature(step), state) is not None)]
+    if len(readers) < 2:
+        return
+    from load_data import load_raw
+
+    with span("load raw data", cat="pipeline"):
+        load_raw(path=RAW_FILE)
+
+
+def _execute(steps, jobs, force, trace):
+    graph = build_graph(steps)
+    by_name = {step.name: step for step in steps}
+    order = topological_order(steps)
+    state = load_state()
+
+    done = set()
+    failed = None
+    running = {}
+    signatures = {}
+    n_skipped = 0
+
+    parallel = jobs > 1
+    pool = None  # started with the first step that has to run
+    broken = None  # BrokenProcessPool of a worker that died (killed, crashed)
+
+    def finish(name, ok, output, records, reason):
+        nonlocal failed
+        print_banner(by_name[name], reason)
+        print(output, end="")
+        trace.extend(records)
+        if ok:
+            done.add(name)
+            state[name] = signatures[name]
+            save_state(state)
+        elif failed is None:
+            failed = name
+
+    try:
+        while True:
+            if failed is None:
+                for name in order:
+                    in_flight = {running_name for running_name, _ in running.values()}
+                    if name in done or name in in_flight or not graph[name] <= done:
+                        continue
+                    # decided only now, so upstream outputs that were just rebuilt are hashed
+                    step = by_name[name]
+                    signatures[name] = step_signature(step)
+                    reason = "forced" if force else why_run(step, signatures[name], state)
+                    if reason is None:
+                        print(f"SKIP: {step.description} (src/{name}.py is up to date)")
+                        done.add(name)
+                        n_skipped += 1
+                        continue
+                    if not parallel:
+                        finish(name, *_run_step(name, step.params), reason)
+                        break
+                    if pool is None:
+                        _warm_raw_data(steps, state, force)
+                        pool = _start_pool(jobs)
+                    running[pool.submit(_run_step, name, step.params)] = (name, reason)
+
+            if not parallel:
+                if failed is not None or len(done) == len(order):
+                    break
+                continue
+            if not running:
+                break
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name, reason = running.pop(future)
+                try:
+                    result = future.result()
+                except BrokenProcessPool as exc:
+                    # the worker died without a Python exception (e.g. OOM kill):
+                    # the step failed, the steps that finished stay recorded
+                    broken = broken or exc
+                    result = (False, f"Worker process died: {exc}\n", [])
+                finish(name, *result, reason)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    if n_skipped:
+        print(f"\nSkipped {n_skipped} up-to-date step(s).")
+    if failed is not None:
+        print(f"\nERROR while running src/{failed}.py. Stopping pipeline.")
+        save_state(state)
+        if broken is not None:
+            raise broken
+        return False
+    return True
+
+
+def run_pipeline(steps=None, jobs=None, force=False, dry_run=False, figures=None):
+    """
+    Run the steps in dependency order inside this process.
+    jobs > 1 runs independent steps in parallel on a forked worker pool.
+    Steps whose inputs, source code and params are unchanged since their last
+    successful run are skipped (force=True reruns everything).
+    dry_run=True only prints which steps would run and why.
+    figures picks the figure profile ("full", "preview" or "none", see
+    figures.py); by default the HAPPINESS_FIGURES environment variable.
+    Every step is timed (instrument.py); the spans are written to
+    results/pipeline_trace.jsonl and results/pipeline_trace.json.
+    Returns True if every step succeeded.
+    """
+    if steps is None:
+        steps = STEPS
+
+    # No GUI backend: figures are only ever saved to disk
+    os.environ.setdefault("MPLBACKEND", "Agg")
+    if figures is not None:
+        os.environ["HAPPINESS_FIGURES"] = figures
+    current_profile()  # fail early on an unknown profile
+
+    with span("import steps", cat="pipeline"):
+        steps = _import_steps(steps)
+
+    if dry_run:
+        print_plan(steps, plan(steps, force=force))
+        return True
+
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    if "fork" not in multiprocessing.get_all_start_methods():
+        jobs = 1
+
+    # spans of the parent; workers drop their forked copies (_init_worker)
+    trace = collect()
+    try:
+        with span("run", cat="pipeline", jobs=jobs):
+            ok = _execute(steps, jobs, force, trace)
+    finally:
+        # also after a crashed worker pool, for the steps that did run
+        trace.extend(collect())
+        if trace:
+            write_trace(trace)
+            print_summary(trace)
+    return ok
@@ -2,9 +2,27 @@
 # Bar chart of mean standardized factor values (z-scores) by cluster
 
 import pandas as pd
-import matplotlib.pyplot as plt
+
+from figures import FigureSpec, render
 
 PROFILE_FILE = "results/cluster_profiles.csv"
+OUT_FILE = "results/cluster_profiles_bars.png"
+
+
+def draw_profiles(fig, df_plot):
+    """Grouped bar chart: one group per factor, one bar per cluster."""
+    ax = fig.subplots()
+    df_plot.T.plot(kind="bar", ax=ax)
+
+    ax.set_xlabel("Factor")
+    ax.set_ylabel("Mean standardized value (z-score)")
+    ax.set_title("Cluster profiles: mean z-scores of happiness drivers")
+    ax.axhline(0, color="black", linewidth=0.8)
+
+    # Make legend nicer
+    ax.legend(title="Cluster", loc="best")
+
+    fig.tight_layout()
 
 
 def main():
@@ -33,21 +51,8 @@ def main():
     df_plot = df.set_index("cluster")[factor_cols]
 
     # 3) Make a grouped bar chart
-    ax = df_plot.T.plot(kind="bar", figsize=(10, 6))
-
-    ax.set_xlabel("Factor")
-    ax.set_ylabel("Mean standardized value (z-score)")
-    ax.set_title("Cluster profiles: mean z-scores of happiness drivers")
-    ax.axhline(0, color="black", linewidth=0.8)
-
-    # Make legend nicer
-    ax.legend(title="Cluster", loc="best")
-
-    plt.tight_layout()
-    plt.savefig("results/cluster_profiles_bars.png", dpi=300)
-    plt.close()
-
-    print("\nSaved bar chart to: results/cluster_profiles_bars.png")
+    render([FigureSpec(OUT_FILE, draw_profiles, {"df_plot": df_plot}, figsize=(10, 6),
+                       label="bar chart")])
 
 
 if __name__ == "__main__":
@@ -2,16 +2,116 @@
 # Scatter of happiness vs log GDP, coloured by cluster,
 # with labels for countries that strongly over-/under-perform
 # relative to their GDP (based on residuals).
+# The regression line comes from the fit stored by gdp_residuals.py.
+# Large inputs are drawn as a per-cluster density image (density.py); the
+# labeled countries and outliers stay markers on top of it.
 
 import pandas as pd
-import matplotlib.pyplot as plt
-from sklearn.linear_model import LinearRegression
 import numpy as np
 
+from density import category_colors, density_grid, draw_density, sparse_points, use_density
+from figures import FigureSpec, render
+from ols import load_fit
+
 DATA_FILE = "results/cluster_assignments_with_resid.csv"
+OUT_FILE = "results/gdp_happiness_scatter_labeled.png"
+
+# Ladder score ~ log_GDP, fitted and stored by gdp_residuals.py
+GDP_FIT = "ols_gdp"
+
+
+def draw_scatter(fig, df, line, labeled):
+    """Happiness vs log GDP per cluster, regression line and labeled countries."""
+    ax = fig.subplots()
+
+    clusters = sorted(df["cluster"].unique())
+    for c in clusters:
+        subset = df[df["cluster"] == c]
+        ax.scatter(
+            subset["log_GDP"],
+            subset["Ladder score"],
+            label=f"Cluster {c}",
+            alpha=0.7,
+        )
+
+    # Regression line
+    ax.plot(*line, linewidth=2)
+
+    ax.set_xlabel("log GDP per capita")
+    ax.set_ylabel("Happiness (Ladder score)")
+    ax.set_title("Happiness vs log GDP with clusters and extreme residuals")
+    ax.axhline(0, color="grey", linewidth=0.5)
+
+    label_countries(ax, labeled)
+
+    ax.legend()
+    fig.tight_layout()
 
 
-def main():
+def label_countries(ax, labeled):
+    """Write the names of the countries that strongly over-/under-perform."""
+    for _, row in labeled.iterrows():
+        ax.text(
+            row["log_GDP"],
+            row["Ladder score"],
+            row["Country name"],
+            fontsize=7,
+            ha="left",
+            va="bottom",
+        )
+
+
+def draw_density_scatter(fig, counts, extent, outliers, outlier_clusters, line, labeled):
+    """Density image of happiness vs log GDP per cluster; outliers and labeled countries as markers."""
+    ax = fig.subplots()
+    colors = category_colors(len(counts))
+    handles = draw_density(ax, counts, extent, colors)
+    ax.scatter(outliers[:, 0], outliers[:, 1], color=colors[outlier_clusters], s=8, alpha=0.7)
+    ax.scatter(labeled["log_GDP"], labeled["Ladder score"], color="black", s=12)
+
+    # Regression line
+    ax.plot(*line, linewidth=2)
+
+    ax.set_xlabel("log GDP per capita")
+    ax.set_ylabel("Happiness (Ladder score)")
+    ax.set_title("Happiness vs log GDP with clusters and extreme residuals (density)")
+    ax.axhline(0, color="grey", linewidth=0.5)
+
+    label_countries(ax, labeled)
+
+    ax.legend(handles, [f"Cluster {c}" for c in range(len(counts))])
+    fig.tight_layout()
+
+
+def scatter_figure(df, line, labeled, density=None):
+    """
+    FigureSpec for the scatter: markers for small data, a density image
+    (only the grid, the outliers and the labeled rows are passed to the
+    renderer) for large data.
+    """
+    if not use_density(len(df), density):
+        return FigureSpec(OUT_FILE, draw_scatter, {
+            "df": df[["Country name", "log_GDP", "Ladder score", "cluster"]],
+            "line": line,
+            "labeled": labeled,
+        }, label="labeled scatter plot")
+
+    points = df[["log_GDP", "Ladder score"]].to_numpy(dtype=np.float64)
+    clusters = df["cluster"].to_numpy()
+    counts, extent, cells = density_grid(points[:, 0], points[:, 1], clusters)
+    sparse = sparse_points(counts, cells)
+    return FigureSpec(OUT_FILE, draw_density_scatter, {
+        "counts": counts,
+        "extent": extent,
+        "outliers": points[sparse],
+        "outlier_clusters": clusters[sparse],
+        "line": line,
+        "labeled": labeled,
+    }, label="labeled scatter plot")
+
+
+def main(density=None):
+    """density: True/False forces the density image / markers; None decides by size."""
     print(">>> PLOT_GDP_HAPPINESS.PY IS RUNNING <<<")
 
     # 1) Load data (already contains log_GDP, Ladder score, cluster, happiness_resid)
@@ -23,16 +123,11 @@ def main():
     # Make sure cluster is integer
     df["cluster"] = df["cluster"].astype(int)
 
-    # 2) Fit a simple linear regression: happiness ~ log_GDP
-    X = df[["log_GDP"]].values
-    y = df["Ladder score"].values
+    # 2) Simple linear regression happiness ~ log_GDP (already fitted in gdp_residuals.py)
+    model = load_fit(GDP_FIT)
 
-    model = LinearRegression()
-    model.fit(X, y)
-
-    intercept = model.intercept_
-    slope = model.coef_[0]
-    r2 = model.score(X, y)
+    intercept, slope = model.coef
+    r2 = model.r2
 
     print(f"\nLinear regression: Ladder score ~ log_GDP")
     print(f"Intercept: {intercept:.3f}")
@@ -51,50 +146,14 @@ def main():
     print("\n5 countries MUCH MORE happy than their GDP predicts:")
     print(top5[["Country name", "log_GDP", "Ladder score", "happiness_resid", "cluster"]])
 
-    # 4) Scatter plot coloured by cluster
-    plt.figure(figsize=(8, 6))
-
-    clusters = sorted(df["cluster"].unique())
-    for c in clusters:
-        subset = df[df["cluster"] == c]
-        plt.scatter(
-            subset["log_GDP"],
-            subset["Ladder score"],
-            label=f"Cluster {c}",
-            alpha=0.7,
-        )
-
-    # Regression line
+    # 4) Scatter plot coloured by cluster, with the top/bottom 5 labeled
     x_vals = np.linspace(df["log_GDP"].min(), df["log_GDP"].max(), 100).reshape(-1, 1)
-    y_pred = model.predict(x_vals)
-    plt.plot(x_vals, y_pred, linewidth=2)
-
-    plt.xlabel("log GDP per capita")
-    plt.ylabel("Happiness (Ladder score)")
-    plt.title("Happiness vs log GDP with clusters and extreme residuals")
-    plt.axhline(0, color="grey", linewidth=0.5)
-
-    # 5) Label top/bottom 5 on the plot
-    def add_labels(subset, color):
-        for _, row in subset.iterrows():
-            plt.text(
-                row["log_GDP"],
-                row["Ladder score"],
-                row["Country name"],
-                fontsize=7,
-                ha="left",
-                va="bottom",
-            )
-
-    add_labels(bottom5, "black")
-    add_labels(top5, "black")
-
-    plt.legend()
-    plt.tight_layout()
-    plt.savefig("results/gdp_happiness_scatter_labeled.png", dpi=300)
-    plt.close()
-
-    print("\nSaved labeled scatter plot to: results/gdp_happiness_scatter_labeled.png")
+    render([scatter_figure(
+        df,
+        (x_vals.ravel(), model.predict(x_vals)),
+        pd.concat([bottom5, top5])[["Country name", "log_GDP", "Ladder score"]],
+        density,
+    )])
 
 
 if __name__ == "__main__":
@@ -2,9 +2,24 @@
 # Boxplot of residual happiness (happiness beyond GDP) by cluster
 
 import pandas as pd
-import matplotlib.pyplot as plt
+
+from figures import FigureSpec, render
 
 DATA_FILE = "results/cluster_assignments_with_resid.csv"
+OUT_FILE = "results/residuals_boxplot.png"
+
+
+def draw_boxplot(fig, data, labels):
+    """One box of residual happiness per cluster."""
+    ax = fig.subplots()
+    ax.boxplot(data, labels=labels)
+
+    ax.axhline(0, color="black", linewidth=0.8)
+    ax.set_xlabel("Cluster")
+    ax.set_ylabel("Residual happiness (actual - predicted from GDP)")
+    ax.set_title("Residual happiness by cluster")
+
+    fig.tight_layout()
 
 
 def main():
@@ -22,19 +37,10 @@ def main():
     clusters = sorted(df["cluster"].unique())
     data = [df.loc[df["cluster"] == c, "happiness_resid"] for c in clusters]
 
-    plt.figure(figsize=(8, 6))
-    plt.boxplot(data, labels=[str(c) for c in clusters])
-
-    plt.axhline(0, color="black", linewidth=0.8)
-    plt.xlabel("Cluster")
-    plt.ylabel("Residual happiness (actual - predicted from GDP)")
-    plt.title("Residual happiness by cluster")
-
-    plt.tight_layout()
-    plt.savefig("results/residuals_boxplot.png", dpi=300)
-    plt.close()
-
-    print("\nSaved boxplot to: results/residuals_boxplot.png")
+    render([FigureSpec(OUT_FILE, draw_boxplot, {
+        "data": [d.to_numpy() for d in data],
+        "labels": [str(c) for c in clusters],
+    }, label="boxplot")])
 
 
 if __name__ == "__main__":
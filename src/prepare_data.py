@@ -8,19 +8,14 @@
 # It selects only the variables needed for the analysis.
 # Drops countries with missing values
 
-import pandas as pd
+from load_data import load_raw
 
-# Path to the original 2024 dataset
-DATA_FILE = "data/world-happiness-2024.csv"
 OUT_FILE = "results/clean_happiness_data.csv"
 
 
 def main():
     print(">>> PREPARE_DATA.PY IS RUNNING <<<")
 
-    # Load the full dataset with correct separators
-    df = pd.read_csv(DATA_FILE, sep=";", decimal=",")
-
     # Select the variables needed for the project
     selected_columns = [
         "Country name",
@@ -33,8 +28,8 @@ def main():
         "Explained by: Perceptions of corruption",
     ]
     
-    # Keep only these columns
-    clean_df = df[selected_columns].copy()
+    # Load only these columns (whiskers and dystopia are never parsed)
+    clean_df = load_raw(columns=selected_columns)
 
     # Show the shape to verify it worked
     print("Clean dataset shape BEFORE dropping missing values:", clean_df.shape)
@@ -1,38 +1,107 @@
 # regression_interactions.py
 # Multiple linear regression with interactions and a high-corruption dummy,
 # plus a bar plot of standardized coefficients.
+# All nested specifications (base, + dummy, + interactions) are solved in one
+# batched call on the same design matrix (ols.py); the full model is stored.
+# Bootstrap confidence intervals and permutation p-values for every
+# coefficient come from batched resampled fits (ols_resampling.py).
+# Out-of-sample R^2 / RMSE of every specification (repeated k-fold and
+# leave-one-out) come from one X'X by downdating (ols_cv.py).
 
 import pandas as pd
 import numpy as np
-from sklearn.linear_model import LinearRegression
-from sklearn.preprocessing import StandardScaler
-from sklearn.metrics import r2_score, mean_squared_error
-import matplotlib.pyplot as plt
+from figures import FigureSpec, render
+from ols import fit_specs, save_fit
+from ols_cv import N_FOLDS, N_REPEATS, cv_scores
+from ols_resampling import N_RESAMPLES, bootstrap_ci, bootstrap_coefs, permutation_pvalues
 
 DATA_FILE = "results/clean_happiness_data.csv"
 OUT_COEFFS = "results/reginteractions_coeffs.csv"
 OUT_PLOT = "results/reginteractions_coeffs.png"
+OUT_CV = "results/reginteractions_cv.csv"
+
+# base features (raw scale) using original WHR names
+GDP_COL = "Explained by: Log GDP per capita"
+SOCIAL_COL = "Explained by: Social support"
+LIFE_COL = "Explained by: Healthy life expectancy"
+FREEDOM_COL = "Explained by: Freedom to make life choices"
+GENEROSITY_COL = "Explained by: Generosity"
+CORRUPTION_COL = "Explained by: Perceptions of corruption"
+
+BASE_COLS = [
+    GDP_COL,
+    SOCIAL_COL,
+    LIFE_COL,
+    FREEDOM_COL,
+    GENEROSITY_COL,
+    CORRUPTION_COL,
+]
+
+# Target: happiness
+TARGET_COL = "Ladder score"
+
+# countries at or below this quantile of the corruption score get HighCorruption = 1
+HIGH_CORR_QUANTILE = 0.30
+
+FEATURE_COLS = BASE_COLS + [
+    "HighCorruption",
+    "logGDP_x_SocialSupport",
+    "logGDP_x_HighCorr",
+]
+
+# fitted full model with interactions (coefficients on the raw scale)
+INTERACTION_FIT = "ols_reginteractions"
+
+# resamples for the bootstrap intervals and the permutation tests
+N_BOOT = N_RESAMPLES
+N_PERM = N_RESAMPLES
+RANDOM_STATE = 42
+CI_LEVEL = 0.95
+
+# cross-validation of the nested models (repeated k-fold + leave-one-out)
+CV_FOLDS = N_FOLDS
+CV_REPEATS = N_REPEATS
+
+
+def add_model_features(df, threshold):
+    """
+    Add the HighCorruption dummy (corruption score <= threshold) and the two
+    interaction terms to a copy of df.
+    """
+    df = df.copy()
+    df["HighCorruption"] = (df[CORRUPTION_COL] <= threshold).astype(int)
+    df["logGDP_x_SocialSupport"] = df[GDP_COL] * df[SOCIAL_COL]
+    df["logGDP_x_HighCorr"] = df[GDP_COL] * df["HighCorruption"]
+    return df
 
 
-def plot_coefficients(coefs):
+def draw_coefficients(fig, coefs):
     """
-    Create a horizontal bar chart of standardized regression coefficients.
+    Horizontal bar chart of standardized regression coefficients,
+    with bootstrap confidence intervals as error bars when available.
     """
     features = coefs["feature"]
     values = coefs["coef_standardized"]
 
-    plt.figure(figsize=(8, 5))
-    plt.barh(features, values)
-    plt.axvline(0, color="black", linewidth=1)
-    plt.xlabel("Standardized coefficient")
-    plt.title("Regression coefficients with interactions")
-    plt.tight_layout()
-    plt.savefig(OUT_PLOT, dpi=300)
-    plt.close()
-    print(f"Saved coefficient plot to: {OUT_PLOT}")
+    ax = fig.subplots()
+    if "ci_low" in coefs:
+        xerr = np.vstack([values - coefs["ci_low"], coefs["ci_high"] - values])
+        ax.barh(features, values, xerr=xerr, capsize=3, ecolor="black")
+    else:
+        ax.barh(features, values)
+    ax.axvline(0, color="black", linewidth=1)
+    ax.set_xlabel("Standardized coefficient")
+    ax.set_title("Regression coefficients with interactions")
+    fig.tight_layout()
+
+
+def plot_coefficients(coefs):
+    render([FigureSpec(OUT_PLOT, draw_coefficients, {"coefs": coefs}, figsize=(8, 5),
+                       label="coefficient plot")])
 
 
-def main():
+def main(n_boot=N_BOOT, n_perm=N_PERM, random_state=RANDOM_STATE,
+         cv_folds=CV_FOLDS, cv_repeats=CV_REPEATS):
     print(">>> REGINTERACTIONS.PY IS RUNNING <<<")
 
     # 1) Load cleaned data
@@ -41,43 +110,18 @@ def main():
     print("\nColumns in data:")
     print(list(df.columns))
 
-    # 2) Choose base features (raw scale) using original WHR names
-    gdp_col = "Explained by: Log GDP per capita"
-    social_col = "Explained by: Social support"
-    life_col = "Explained by: Healthy life expectancy"
-    freedom_col = "Explained by: Freedom to make life choices"
-    generosity_col = "Explained by: Generosity"
-    corruption_col = "Explained by: Perceptions of corruption"
-
-    base_cols = [
-        gdp_col,
-        social_col,
-        life_col,
-        freedom_col,
-        generosity_col,
-        corruption_col,
-    ]
-
-    # Target: happiness
-    target_col = "Ladder score"
+    # 2) Base features (raw scale) using original WHR names: BASE_COLS
+    base_cols = BASE_COLS
+    target_col = TARGET_COL
 
     # 3) High-corruption dummy (bottom 30% of corruption score)
-    corr_values = df[corruption_col]
-    threshold = corr_values.quantile(0.30)
-    df["HighCorruption"] = (corr_values <= threshold).astype(int)
-
-    print(f"\nHighCorruption dummy: threshold (30% quantile) = {threshold:.3f}")
-    print(df["HighCorruption"].value_counts())
+    threshold = df[CORRUPTION_COL].quantile(HIGH_CORR_QUANTILE)
+    print(f"\nHighCorruption dummy: threshold ({HIGH_CORR_QUANTILE:.0%} quantile) = {threshold:.3f}")
 
     # 4) Interaction terms
-    df["logGDP_x_SocialSupport"] = df[gdp_col] * df[social_col]
-    df["logGDP_x_HighCorr"] = df[gdp_col] * df["HighCorruption"]
-
-    feature_cols = base_cols + [
-        "HighCorruption",
-        "logGDP_x_SocialSupport",
-        "logGDP_x_HighCorr",
-    ]
+    df = add_model_features(df, threshold)
+    print(df["HighCorruption"].value_counts())
+    feature_cols = FEATURE_COLS
 
     print("\nFeatures used in regression:")
     print(feature_cols)
@@ -88,41 +132,73 @@ def main():
     print(f"\nRows before dropping NaNs: {len(df)}")
     print(f"Rows after dropping NaNs: {len(df_model)}")
 
-    X_raw = df_model[feature_cols].values
+    X = df_model[feature_cols]
     y = df_model[target_col].values
 
-    # 6) Standardize features
-    scaler = StandardScaler()
-    X = scaler.fit_transform(X_raw)
-
-    # 7) Fit linear regression
-    model = LinearRegression()
-    model.fit(X, y)
-
-    y_pred = model.predict(X)
-    r2 = r2_score(y, y_pred)
-    rmse = mean_squared_error(y, y_pred, squared=False)
+    # 6) Fit the nested models in one batched solve (same design matrix)
+    specs = {
+        "base": base_cols,
+        "base + HighCorruption": base_cols + ["HighCorruption"],
+        "with interactions": feature_cols,
+    }
+    fits = dict(zip(specs, fit_specs(X, y, list(specs.values()))))
+    model = fits["with interactions"]
+    save_fit(model, INTERACTION_FIT)
+
+    print("\nNested models:")
+    for name, fit in fits.items():
+        print(f"  {name:<22} R^2 = {fit.r2:.3f}  adj. R^2 = {fit.adj_r2:.3f}")
+
+    # Out-of-sample fit: do the interactions overfit? (cv_folds=0 skips)
+    if cv_folds > 0:
+        spec_cols = list(specs.values())
+        kfold = cv_scores(X, y, spec_cols, list(specs), cv_folds, cv_repeats, random_state)
+        loo = cv_scores(X, y, spec_cols, list(specs), n_folds="loo")
+        cv = pd.concat({f"{cv_folds}fold_x{cv_repeats}": kfold, "loo": loo}, names=["scheme"])
+        cv = cv.reset_index()
+        cv.insert(2, "in_sample_r2", [fits[name].r2 for name in cv["spec"]])
+        cv.to_csv(OUT_CV, index=False)
+
+        print(f"\nCross-validated fit ({cv_repeats} x {cv_folds}-fold and leave-one-out):")
+        print(cv.round(3).to_string(index=False))
+        print(f"Saved cross-validation results to: {OUT_CV}")
 
     print(f"\nLinear regression: {target_col} ~ features with interactions")
-    print(f"R^2 (in-sample): {r2:.3f}")
-    print(f"RMSE (in-sample): {rmse:.3f}")
+    print(f"R^2 (in-sample): {model.r2:.3f}")
+    print(f"RMSE (in-sample): {model.rmse:.3f}")
+
+    # 7) Standardized coefficients: raw coefficient times the feature's standard
+    # deviation (same as refitting on z-scores, without a second fit)
+    scale = X.std(ddof=0).to_numpy()
 
     # 8) Collect coefficients in a table
     coefs = pd.DataFrame({
         "feature": feature_cols,
-        "coef_standardized": model.coef_,
+        "coef_standardized": model.coef[1:] * scale,
     })
+
+    # 9) Uncertainty: bootstrap intervals and permutation p-values
+    # (n_boot=0 / n_perm=0 skips them)
+    if n_boot > 0:
+        samples = bootstrap_coefs(X, y, n_boot, random_state)[:, 1:] * scale
+        coefs["ci_low"], coefs["ci_high"] = bootstrap_ci(samples, CI_LEVEL)
+    if n_perm > 0:
+        coefs["p_value"] = permutation_pvalues(X, y, n_perm, random_state)
+
     coefs["abs_coef"] = coefs["coef_standardized"].abs()
     coefs = coefs.sort_values("abs_coef", ascending=False)
 
     print("\nRegression coefficients (on standardized features):")
-    print(coefs[["feature", "coef_standardized"]])
+    if n_boot > 0:
+        print(f"({CI_LEVEL:.0%} bootstrap intervals from {n_boot} resamples,"
+              f" Freedman-Lane permutation p-values from {n_perm} permutations)")
+    print(coefs.drop(columns=["abs_coef"]).round(4).to_string(index=False))
 
-    # 9) Save coefficients to CSV
+    # 10) Save coefficients to CSV
     coefs.drop(columns=["abs_coef"]).to_csv(OUT_COEFFS, index=False)
     print(f"\nSaved regression coefficients to: {OUT_COEFFS}")
 
-    # 10) Plot coefficients
+    # 11) Plot coefficients
     plot_coefficients(coefs)
 
 
@@ -2,23 +2,123 @@
 # This script:
 # loads the standardized happiness data
 # Drop rows with any missing standardized values
-# runs K-means for K = 3, 4, 5, 6
-# computes silhouette scores
-# chooses the best K
-# runs final K-means and saves cluster assignments + profiles
+# runs K-means for K = 3, 4, 5, 6 (all K values and restarts in parallel)
+# computes silhouette scores (block-wise; sampled estimate for very large data)
+# plus Calinski-Harabasz, Davies-Bouldin and inertia for every K (cluster_validity.py)
+# chooses the best K (by silhouette unless another metric is asked for)
+# keeps the fitted model of the best K and saves cluster assignments + profiles
+# the fitted models (every K and the final one) go to the model store
+# (model_store.py); a rerun on the same data with the same settings loads them
+# streaming=True: mini-batch K-Means that reads the data in chunks (kmeans_stream.py)
 
 import pandas as pd
-from sklearn.cluster import KMeans
-from sklearn.metrics import silhouette_score
 
-DATA_FILE = "results/happiness_standardized.csv"
+from artifacts import load_matrix, load_table, save_table
+from cluster_validity import choose_best_k, evaluate_sweep
+from kmeans_stream import CHUNKSIZE, fit_streaming, sample_silhouette, write_assignments
+from kmeans_sweep import sweep_kmeans
+from model_store import StaleModelError, load_model, load_or_fit, model_path, save_model
+
+# artifacts written by standardize_data.py
+DATA_TABLE = "happiness_standardized"
+FEATURES = "features_std"
+
+# K values to compare and K-Means settings
+K_VALUES = [3, 4, 5, 6]
+RANDOM_STATE = 42
+N_INIT = 10
+
+# metric used to choose K: "silhouette", "calinski_harabasz", "davies_bouldin"
+# or "inertia" (elbow)
+SELECTION_METRIC = "silhouette"
+
+# "independent": n_init fresh fits per K; "bisecting": K+1 warm-started from K
+SWEEP_MODE = "independent"
+
+VALIDITY_FILE = "results/kmeans_validity.csv"
+
+# columns saved per country in cluster_assignments.csv
+ASSIGNMENT_COLS = [
+    "Country name",
+    "Ladder score",
+    "log_GDP",
+    "Social_Support",
+    "Life_expectancy",
+    "Freedom",
+    "Generosity",
+    "Corruption",
+]
+
+
+def fit_sweep(X, k_values=K_VALUES, n_init=N_INIT, random_state=RANDOM_STATE,
+              sweep_mode=SWEEP_MODE, n_jobs=None):
+    """
+    {K: fitted KMeans} for every K. Taken from the model store (kmeans_k<K>)
+    when all of them were fitted on X with these settings, otherwise the
+    sweep runs and its models are stored.
+    """
+    settings = {"n_init": n_init, "random_state": random_state, "sweep_mode": sweep_mode}
+    try:
+        models = {k: load_model(f"kmeans_k{k}", X, dict(settings, n_clusters=k)) for k in k_values}
+    except FileNotFoundError:
+        pass
+    except StaleModelError as exc:
+        print(f"Refitting K-Means ({exc})")
+    else:
+        print(f"Loaded K-Means models for K = {list(k_values)} from: {model_path('kmeans_k<K>')}")
+        return models
+
+    models = sweep_kmeans(
+        X, k_values, n_init=n_init, random_state=random_state, n_jobs=n_jobs, mode=sweep_mode
+    )
+    for k, model in models.items():
+        save_model(model, f"kmeans_k{k}", X, dict(settings, n_clusters=k))
+    print(f"Saved K-Means models to: {model_path('kmeans_k<K>')}")
+    return models
 
 
-def main():
-    print(">>> RUN_KMEANS.PY IS RUNNING <<<")
+def run_streaming(feature_cols_std, k_values, random_state, chunksize):
+    """Out-of-core version: mini-batch fits per K, best K by sampled silhouette."""
+    print(f"Streaming mode: reading the standardized data in chunks of {chunksize} rows")
+
+    models = {}
+    scores = {}
+    print("Silhouette scores for different K (random sample of rows):")
+    for k in k_values:
+        models[k] = fit_streaming(FEATURES, feature_cols_std, k, chunksize, random_state=random_state)
+        scores[k] = sample_silhouette(FEATURES, feature_cols_std, models[k])
+        print(f"K = {k}: silhouette score = {scores[k]:.4f}")
+
+    validity = pd.DataFrame({"silhouette": scores})
+    validity.index.name = "k"
+    validity.to_csv(VALIDITY_FILE)
+
+    best_k = max(scores, key=scores.get)
+    print(f"\nBest K according to silhouette: K = {best_k}")
+
+    # final model to the model store; the memory-mapped matrix is hashed block by block
+    load_or_fit(
+        "kmeans", load_matrix(FEATURES, feature_cols_std), lambda: models[best_k],
+        {"n_clusters": best_k, "random_state": random_state, "streaming": True,
+         "chunksize": chunksize, "selection_metric": "silhouette"},
+    )
+
+    # second pass over the data: labels, assignments and profiles
+    profiles = write_assignments(
+        models[best_k], FEATURES, feature_cols_std, DATA_TABLE, ASSIGNMENT_COLS, "cluster",
+        "results/cluster_assignments.csv", "cluster_assignments",
+        profile_csv="results/cluster_profiles.csv", chunksize=chunksize,
+    )
+    print("\nSaved cluster assignments to: results/cluster_assignments.csv")
+    print("Saved cluster profiles to: results/cluster_profiles.csv")
+    print("\nCluster profiles (mean standardized values):")
+    print(profiles)
+
 
-    # 1) Load standardized data (already cleaned) - read happiness_standardized.csv
-    df = pd.read_csv(DATA_FILE)
+def main(k_values=K_VALUES, random_state=RANDOM_STATE, n_init=N_INIT,
+         selection_metric=SELECTION_METRIC, sweep_mode=SWEEP_MODE, n_jobs=None,
+         streaming=False, chunksize=CHUNKSIZE):
+    print(">>> RUN_KMEANS.PY IS RUNNING <<<")
 
     # Extract standardized feature columns into X
     feature_cols_std = [
@@ -30,51 +130,61 @@ def main():
         "Corruption_std",
     ]
 
+    if streaming:
+        run_streaming(feature_cols_std, k_values, random_state, chunksize)
+        return
+
+    # 1) Load standardized data (already cleaned) - binary copy of happiness_standardized.csv
+    df = load_table(DATA_TABLE)
+
     print("Number of rows in standardized data:", len(df))
     
-    X = df[feature_cols_std].values
+    X = load_matrix(FEATURES, feature_cols_std)
 
 
     # 2) Try different K and compute silhouette scores, using:
     # random_state=42 and n_init=10
-    
-    k_values = [3, 4, 5, 6]
-    scores = {}
+    # every (K, restart) fit runs as its own task on a process pool
+    # (skipped when the model store already has these fits)
+    models = fit_sweep(X, k_values, n_init, random_state, sweep_mode, n_jobs)
 
-    print("Silhouette scores for different K:")
-    for k in k_values:
-        kmeans = KMeans(n_clusters=k, random_state=42, n_init=10)
-        labels = kmeans.fit_predict(X)
-        score = silhouette_score(X, labels)
-        scores[k] = score
-        print(f"K = {k}: silhouette score = {score:.4f}")
-
-    # 3) Choose the best K (highest silhouette score)
-    best_k = max(scores, key=scores.get)
-    print(f"\nBest K according to silhouette score: K = {best_k}")
+    # all validity metrics for every K (distances for silhouette are computed once)
+    validity = evaluate_sweep(X, {k: models[k].labels_ for k in k_values})
 
-    # 4) Fit final K-means with best K
-    final_kmeans = KMeans(n_clusters=best_k, random_state=42, n_init=10)
-    
-    # run .fit_predict(X)
-    df["cluster"] = final_kmeans.fit_predict(X)
+    print("Silhouette scores for different K:")
+    for k, row in validity.iterrows():
+        score, low, high = row["silhouette"], row["silhouette_ci_low"], row["silhouette_ci_high"]
+        if low == high:
+            print(f"K = {k}: silhouette score = {score:.4f}")
+        else:
+            # sampled estimate (large data): show the 95% confidence interval
+            print(f"K = {k}: silhouette score = {score:.4f} (95% CI {low:.4f} to {high:.4f})")
+
+    print("\nOther validity metrics (CH: higher is better, DB: lower is better):")
+    print(validity[["inertia", "calinski_harabasz", "davies_bouldin"]])
+
+    validity.to_csv(VALIDITY_FILE)
+    print(f"Saved validity metrics to: {VALIDITY_FILE}")
+
+    # 3) Choose the best K (highest silhouette score by default)
+    best_k = choose_best_k(validity, selection_metric)
+    print(f"\nBest K according to {selection_metric}: K = {best_k}")
+
+    # 4) Final K-means = the model already fitted for best K (no refit)
+    final_kmeans = load_or_fit(
+        "kmeans", X, lambda: models[best_k],
+        {"n_clusters": best_k, "n_init": n_init, "random_state": random_state,
+         "sweep_mode": sweep_mode, "selection_metric": selection_metric, "streaming": False},
+    )
+    df["cluster"] = final_kmeans.labels_
 
     # 5) Save cluster assignments (per country)
-    cluster_cols_to_save = [
-        "Country name",
-        "Ladder score",
-        "log_GDP",
-        "Social_Support",
-        "Life_expectancy",
-        "Freedom",
-        "Generosity",
-        "Corruption",
-        "cluster",
-    ]
+    cluster_cols_to_save = ASSIGNMENT_COLS + ["cluster"]
     df[cluster_cols_to_save].to_csv(
         "results/cluster_assignments.csv", index=False
     )
     print("\nSaved cluster assignments to: results/cluster_assignments.csv")
+    save_table(df[cluster_cols_to_save], "cluster_assignments")
 
     # 6) Create cluster profile table: mean of standardized vars per cluster
     profile_cols = feature_cols_std + ["cluster"]
@@ -1,18 +1,22 @@
 # run_kmeans_no_gdp.py
 # K-Means clustering on all standardized factors EXCEPT log_GDP
 # robustness check: clustering without log_GDP_std to could next compare with initial cluster model in compare_clusters.py
+# streaming=True: mini-batch K-Means that reads the data in chunks (kmeans_stream.py)
 
-import pandas as pd
-from sklearn.cluster import KMeans
 
-STD_FILE = "results/happiness_standardized.csv"
+from artifacts import load_matrix, load_table, save_table
+from kmeans_stream import CHUNKSIZE, fit_streaming, write_assignments
 
+# artifacts written by standardize_data.py
+STD_TABLE = "happiness_standardized"
+FEATURES = "features_std"
 
-def main():
-    print(">>> RUN_KMEANS_NO_GDP.PY IS RUNNING <<<")
+# same K as the baseline solution
+N_CLUSTERS = 3
 
-    # 1) Load standardized data (already cleaned)
-    df = pd.read_csv(STD_FILE)
+
+def main(n_clusters=N_CLUSTERS, streaming=False, chunksize=CHUNKSIZE):
+    print(">>> RUN_KMEANS_NO_GDP.PY IS RUNNING <<<")
 
     # Columns used for K-Means (exclude log_GDP_std)
     factor_std_cols = [
@@ -25,12 +29,28 @@ def main():
 
     print("\nUsing standardized factor columns (no GDP):")
     print(factor_std_cols)
+
+    if streaming:
+        # fit on chunks, then label and save chunk by chunk
+        model = fit_streaming(FEATURES, factor_std_cols, n_clusters, chunksize)
+        write_assignments(
+            model, FEATURES, factor_std_cols, STD_TABLE, ["Country name"], "cluster_no_gdp",
+            "results/cluster_assignments_no_gdp.csv", "cluster_assignments_no_gdp",
+            chunksize=chunksize,
+        )
+        print("\nSaved cluster assignments without GDP to: results/cluster_assignments_no_gdp.csv")
+        return
+
+    # 1) Load standardized data (already cleaned)
+    df = load_table(STD_TABLE, columns=["Country name"])
     print("Number of rows in standardized data:", len(df))
     
-    X = df[factor_std_cols].values
+    X = load_matrix(FEATURES, factor_std_cols)
 
     # 2) Run K-Means with K=3 (same K as baseline)
-    kmeans = KMeans(n_clusters=3, random_state=42, n_init=10)
+    from sklearn.cluster import KMeans
+
+    kmeans = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
     labels_no_gdp = kmeans.fit_predict(X)
 
     df["cluster_no_gdp"] = labels_no_gdp
@@ -38,6 +58,7 @@ def main():
     # 3) Save new assignments
     out_cols = ["Country name", "cluster_no_gdp"]
     df[out_cols].to_csv("results/cluster_assignments_no_gdp.csv", index=False)
+    save_table(df[out_cols], "cluster_assignments_no_gdp")
 
     print(
         "\nSaved cluster assignments without GDP to: "
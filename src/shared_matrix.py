@@ -0,0 +1,72 @@
+# shared_matrix.py
+# Process pool whose workers all read one feature matrix from shared memory.
+# The matrix is copied into shared memory once; workers map it without
+# copying and get it through shared_matrix(). Used by the parallel K sweep,
+# the bootstrap stability engine and the feature-subset sweep.
+# Inside a parallel pipeline run each step gets only its share of the CPUs
+# (env HAPPINESS_WORKER_JOBS, set by pipeline.py), so nested pools do not
+# start cpu_count workers in every pipeline worker.
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# worker budget of a step running inside a pipeline worker
+WORKER_JOBS_ENV = "HAPPINESS_WORKER_JOBS"
+
+# matrix shared with the worker processes (set by _attach)
+_SHARED_X = None
+_SHARED_MEM = None
+
+
+def _attach(name, shape, dtype):
+    """Worker initializer: map the shared matrix without copying it."""
+    global _SHARED_X, _SHARED_MEM
+    _SHARED_MEM = shared_memory.SharedMemory(name=name)
+    _SHARED_X = np.ndarray(shape, dtype=dtype, buffer=_SHARED_MEM.buf)
+    _SHARED_X.flags.writeable = False
+
+    # one BLAS/OpenMP thread per worker, the pool already uses every core
+    from threadpoolctl import threadpool_limits
+    threadpool_limits(1)
+
+
+def shared_matrix():
+    """The shared matrix, inside a worker of shared_matrix_pool()."""
+    return _SHARED_X
+
+
+def default_jobs():
+    """Workers a nested pool may use: the pipeline's budget, else all CPUs."""
+    budget = os.environ.get(WORKER_JOBS_ENV)
+    if budget:
+        return max(1, int(budget))
+    return os.cpu_count() or 1
+
+
+def resolve_jobs(n_jobs, n_tasks):
+    """Number of workers to use: n_jobs (None = default_jobs()), at most one per task."""
+    if n_jobs is None:
+        n_jobs = default_jobs()
+    return max(1, min(n_jobs, n_tasks))
+
+
+@contextmanager
+def shared_matrix_pool(X, n_jobs):
+    """ProcessPoolExecutor with n_jobs workers that can read X via shared_matrix()."""
+    X = np.ascontiguousarray(X, dtype=np.float64)
+    shm = shared_memory.SharedMemory(create=True, size=max(X.nbytes, 1))
+    try:
+        np.ndarray(X.shape, dtype=X.dtype, buffer=shm.buf)[:] = X
+        with ProcessPoolExecutor(
+            max_workers=n_jobs,
+            initializer=_attach,
+            initargs=(shm.name, X.shape, X.dtype.str),
+        ) as pool:
+            yield pool
+    finally:
+        shm.close()
+        shm.unlink()
@@ -0,0 +1,164 @@
+# silhouette.py
+# Silhouette score that works for large numbers of rows.
+# - exact: distances are computed one block of rows at a time, so memory
+#   stays below max_memory_mb instead of growing with n^2
+# - estimate: silhouette values of a stratified sample of rows (measured
+#   against all rows), with a confidence interval for the mean
+# - DistanceBlocks can keep the distances between calls, for scoring
+#   many labelings of the same data
+
+from statistics import NormalDist
+
+import numpy as np
+
+# memory allowed for one block of the distance matrix
+MAX_MEMORY_MB = 64
+
+# above this many rows score_silhouette() switches to the sampled estimate
+EXACT_MAX_ROWS = 20_000
+SAMPLE_SIZE = 5_000
+
+
+class DistanceBlocks:
+    """
+    Euclidean distances from blocks of rows to all rows of X, one block at a
+    time, each block using at most about max_memory_mb.
+    With cache_mb > 0 and a full distance matrix that fits into it, the blocks
+    are kept after the first pass, so scoring many labelings of the same X
+    (e.g. every K of a sweep) computes the distances only once.
+    """
+
+    def __init__(self, X, max_memory_mb=MAX_MEMORY_MB, cache_mb=0):
+        self.X = np.asarray(X, dtype=np.float64)
+        n = len(self.X)
+        self.sq_norms = np.einsum("ij,ij->i", self.X, self.X)
+        # rows per block so that the ~3 temporary (block x n) float arrays fit into max_memory_mb
+        self.block = max(1, int(max_memory_mb * 2**20 // (3 * 8 * n)))
+        self.use_cache = 8 * n * n <= cache_mb * 2**20
+        self._cache = []
+
+    def _compute(self, idx):
+        X = self.X
+        d2 = self.sq_norms[idx, None] + self.sq_norms[None, :] - 2.0 * (X[idx] @ X.T)
+        np.maximum(d2, 0, out=d2)
+        d2[np.arange(len(idx)), idx] = 0.0
+        return np.sqrt(d2, out=d2)
+
+    def blocks(self, rows=None):
+        """Yield (row indices, distances of those rows to all rows)."""
+        if rows is None and self._cache:
+            yield from self._cache
+            return
+        all_rows = rows is None
+        if all_rows:
+            rows = np.arange(len(self.X))
+        for start in range(0, len(rows), self.block):
+            idx = rows[start:start + self.block]
+            dist = self._compute(idx)
+            if all_rows and self.use_cache:
+                self._cache.append((idx, dist))
+            yield idx, dist
+
+
+def silhouette_values(X, labels, rows=None, max_memory_mb=MAX_MEMORY_MB, distances=None):
+    """
+    Silhouette value of each row in `rows` (default: all rows), using the
+    distances to every row of X. Same definition as sklearn's
+    silhouette_samples (rows alone in their cluster get 0).
+    distances: a DistanceBlocks for X to reuse (created here if None, with
+    the memory left after the label arrays).
+    """
+    _, codes = np.unique(labels, return_inverse=True)
+    n, n_clusters = len(codes), codes.max() + 1
+    if rows is not None:
+        rows = np.asarray(rows)
+
+    cluster_sizes = np.bincount(codes, minlength=n_clusters).astype(np.float64)
+    # per-cluster distance sums: one matrix product with a dense n x n_clusters
+    # one-hot if that fits into a quarter of max_memory_mb, otherwise one
+    # cluster at a time (O(n) memory besides the distance blocks)
+    onehot = None
+    if 8 * n * n_clusters <= max_memory_mb * 2**20 // 4:
+        onehot = np.zeros((n, n_clusters))
+        onehot[np.arange(n), codes] = 1.0
+    if distances is None:
+        used_mb = (codes.nbytes + cluster_sizes.nbytes + (0 if onehot is None else onehot.nbytes)) / 2**20
+        distances = DistanceBlocks(X, max(max_memory_mb - used_mb, 1))
+
+    values = np.empty(n if rows is None else len(rows))
+    pos = 0
+    for idx, dist in distances.blocks(rows):
+        if onehot is not None:
+            dist_sums = dist @ onehot  # (block rows x clusters)
+        else:
+            dist_sums = np.empty((len(idx), n_clusters))
+            for c in range(n_clusters):
+                dist_sums[:, c] = dist @ (codes == c).astype(np.float64)
+
+        own = codes[idx]
+        own_size = cluster_sizes[own]
+        a = dist_sums[np.arange(len(idx)), own] / np.maximum(own_size - 1, 1)
+
+        mean_other = dist_sums / cluster_sizes
+        mean_other[np.arange(len(idx)), own] = np.inf
+        b = mean_other.min(axis=1)
+
+        s = (b - a) / np.maximum(a, b)
+        s[own_size <= 1] = 0.0
+        values[pos:pos + len(idx)] = np.nan_to_num(s)
+        pos += len(idx)
+    return values
+
+
+def silhouette_exact(X, labels, max_memory_mb=MAX_MEMORY_MB, distances=None):
+    """Mean silhouette over all rows (block-wise, bounded memory)."""
+    return float(silhouette_values(X, labels, max_memory_mb=max_memory_mb, distances=distances).mean())
+
+
+def silhouette_estimate(X, labels, sample_size=SAMPLE_SIZE, confidence=0.95,
+                        random_state=0, max_memory_mb=MAX_MEMORY_MB):
+    """
+    Estimate the mean silhouette from a sample stratified by cluster
+    (each cluster sampled in proportion to its size, at least 2 rows).
+    Returns (estimate, ci_low, ci_high).
+    """
+    rng = np.random.default_rng(random_state)
+    clusters, codes = np.unique(labels, return_inverse=True)
+    n = len(codes)
+
+    sample_rows, strata = [], []
+    for c in range(len(clusters)):
+        members = np.flatnonzero(codes == c)
+        m = min(len(members), max(2, round(sample_size * len(members) / n)))
+        sample_rows.append(rng.choice(members, size=m, replace=False))
+        strata.append((len(members), m))
+
+    values = silhouette_values(X, labels, np.concatenate(sample_rows), max_memory_mb)
+
+    # stratified mean and its variance (with finite population correction)
+    estimate, variance, pos = 0.0, 0.0, 0
+    for size, m in strata:
+        v = values[pos:pos + m]
+        pos += m
+        weight = size / n
+        estimate += weight * v.mean()
+        if m > 1:
+            variance += weight**2 * v.var(ddof=1) / m * (1 - m / size)
+
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    half_width = z * np.sqrt(variance)
+    return float(estimate), float(estimate - half_width), float(estimate + half_width)
+
+
+def score_silhouette(X, labels, exact_max_rows=EXACT_MAX_ROWS, sample_size=SAMPLE_SIZE,
+                     max_memory_mb=MAX_MEMORY_MB, random_state=0, distances=None):
+    """
+    Silhouette score for K selection: exact for up to exact_max_rows rows,
+    sampled estimate above that. Returns (score, ci_low, ci_high); for the
+    exact score the interval is just (score, score).
+    """
+    if len(X) <= exact_max_rows:
+        score = silhouette_exact(X, labels, max_memory_mb, distances)
+        return score, score, score
+    return silhouette_estimate(X, labels, sample_size, random_state=random_state,
+                               max_memory_mb=max_memory_mb)
@@ -2,11 +2,15 @@
 # This script:
 # 1) loads the cleaned dataset
 # 2) renames the 6 explanatory variables to shorter names
-# 3) standardizes them with StandardScaler (z-scores)
+# 3) standardizes them with StandardScaler (z-scores); the fitted scaler is
+#    kept in the model store (model_store.py) and reused while the data is the same
 # 4) saves the standardized data for clustering
+#    (CSV for people, binary artifacts for the next pipeline steps)
 
 import pandas as pd
-from sklearn.preprocessing import StandardScaler
+
+from artifacts import save_matrix, save_table
+from model_store import load_or_fit
 
 # 1) load cleaned data
 
@@ -43,8 +47,11 @@ def main():
         "Corruption",
     ]
     
-    scaler = StandardScaler()
-    X_std = scaler.fit_transform(df[feature_cols])
+    from sklearn.preprocessing import StandardScaler
+
+    X = df[feature_cols]
+    scaler = load_or_fit("scaler", X, lambda: StandardScaler().fit(X))
+    X_std = scaler.transform(X)
     
     #Put standardied values into a new DataFrame
     df_std = pd.DataFrame(X_std, columns=[col + "_std" for col in feature_cols])
@@ -66,6 +73,11 @@ def main():
 # Save for clustering
     result_df.to_csv("results/happiness_standardized.csv", index=False)
     print("\nSaved standardized data to: results/happiness_standardized.csv")
+
+    # Binary copies for the downstream steps (no CSV parsing there)
+    save_table(result_df, "happiness_standardized")
+    save_matrix(X_std, "features_std", list(df_std.columns))
+    print("Saved artifacts: happiness_standardized (table), features_std (matrix)")
     
 if __name__ == "__main__":
     main()
\ No newline at end of file
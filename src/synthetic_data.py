@@ -0,0 +1,90 @@
+# synthetic_data.py
+# Synthetic data shaped like the WHR export (data/world-happiness-2024.csv):
+# same columns, ';' separator and ',' decimal mark, any number of rows.
+# The six "Explained by" drivers are drawn from a multivariate normal with
+# the means, standard deviations and correlations of the 2024 file (clipped
+# at 0 like the real values); Ladder score = sum of the drivers + Dystopia
+# + residual. A small share of rows has missing drivers, as in the real file.
+# Used by the benchmarks (benchmarks/run_benchmarks.py) and for tests that
+# should not depend on the real data.
+
+import numpy as np
+import pandas as pd
+
+from load_data import DECIMAL, SEP
+
+DRIVER_COLS = [
+    "Explained by: Log GDP per capita",
+    "Explained by: Social support",
+    "Explained by: Healthy life expectancy",
+    "Explained by: Freedom to make life choices",
+    "Explained by: Generosity",
+    "Explained by: Perceptions of corruption",
+]
+COLUMNS = (["Country name", "Ladder score", "upperwhisker", "lowerwhisker"]
+           + DRIVER_COLS + ["Dystopia + residual"])
+PANEL_COLUMNS = ["Country name", "Regional indicator", "year"] + COLUMNS[1:]
+
+# moments of the drivers in the 2024 file
+DRIVER_MEAN = np.array([1.379, 1.134, 0.521, 0.621, 0.146, 0.154])
+DRIVER_SD = np.array([0.425, 0.333, 0.165, 0.162, 0.073, 0.126])
+DRIVER_CORR = np.array([
+    [1.00, 0.73, 0.83, 0.41, -0.06, 0.44],
+    [0.73, 1.00, 0.71, 0.48, 0.08, 0.25],
+    [0.83, 0.71, 1.00, 0.40, 0.01, 0.40],
+    [0.41, 0.48, 0.40, 1.00, 0.22, 0.34],
+    [-0.06, 0.08, 0.01, 0.22, 1.00, 0.17],
+    [0.44, 0.25, 0.40, 0.34, 0.17, 1.00],
+])
+DYSTOPIA_MEAN, DYSTOPIA_SD = 1.576, 0.537
+WHISKER = 0.11  # half width of the confidence interval around the ladder score
+
+MISSING_RATE = 0.02  # share of rows without driver values
+
+REGIONS = [
+    "Western Europe", "Central and Eastern Europe", "Latin America and Caribbean",
+    "Sub-Saharan Africa", "South Asia", "Southeast Asia", "East Asia",
+    "Middle East and North Africa", "North America and ANZ", "Commonwealth of Independent States",
+]
+FIRST_YEAR = 2005
+
+
+def generate(n_rows, random_state=0, start=0, missing_rate=MISSING_RATE, panel=False):
+    """
+    DataFrame of n_rows synthetic WHR rows. Row i is called "Country <start + i>".
+    panel=True adds "Regional indicator" and "year" like the multi-year files.
+    """
+    rng = np.random.default_rng([random_state, start])
+    cov = DRIVER_CORR * np.outer(DRIVER_SD, DRIVER_SD)
+    drivers = np.maximum(rng.multivariate_normal(DRIVER_MEAN, cov, size=n_rows, method="cholesky"), 0.0)
+    dystopia = rng.normal(DYSTOPIA_MEAN, DYSTOPIA_SD, n_rows)
+    ladder = drivers.sum(axis=1) + dystopia
+
+    df = pd.DataFrame(drivers, columns=DRIVER_COLS)
+    df.insert(0, "Country name", [f"Country {i:08d}" for i in range(start, start + n_rows)])
+    df.insert(1, "Ladder score", ladder)
+    df.insert(2, "upperwhisker", ladder + WHISKER)
+    df.insert(3, "lowerwhisker", ladder - WHISKER)
+    df["Dystopia + residual"] = dystopia
+
+    missing = rng.random(n_rows) < missing_rate
+    df.loc[missing, DRIVER_COLS + ["Dystopia + residual"]] = np.nan
+
+    if panel:
+        df["Regional indicator"] = np.asarray(REGIONS)[rng.integers(0, len(REGIONS), n_rows)]
+        df["year"] = FIRST_YEAR + rng.integers(0, 20, n_rows)
+        df = df[PANEL_COLUMNS]
+    return df
+
+
+def write_csv(path, n_rows, random_state=0, chunk_rows=500_000, **kwargs):
+    """
+    Write n_rows synthetic rows to path in the WHR format, chunk by chunk
+    (memory stays bounded for 1e7 rows). Returns the path.
+    """
+    n_rows = int(n_rows)
+    with open(path, "w", newline="") as fh:
+        for start in range(0, max(n_rows, 1), chunk_rows):
+            chunk = generate(min(chunk_rows, n_rows - start), random_state, start, **kwargs)
+            chunk.to_csv(fh, sep=SEP, decimal=DECIMAL, float_format="%.3f", index=False, header=start == 0)
+    return path
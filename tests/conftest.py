@@ -0,0 +1,43 @@
+# conftest.py
+# Make the modules in src/ importable from the tests (same as run_all.py does).
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+# committed output of standardize_data.py (results/artifacts is not in git)
+STD_CSV = "results/happiness_standardized.csv"
+
+
+@pytest.fixture
+def model_store(tmp_path, monkeypatch):
+    """
+    Empty model store in tmp_path, used as the store during the test: models
+    are fitted and stored there, never in the project's results/models.
+    """
+    import model_store
+
+    root = tmp_path / "models"
+    monkeypatch.setattr(model_store, "MODEL_DIR", str(root))
+    return root
+
+
+@pytest.fixture
+def features_std(tmp_path):
+    """
+    The features_std matrix artifact, built in tmp_path from the committed
+    standardized CSV; returned memory-mapped, as load_matrix() gives it to
+    the steps.
+    """
+    import pandas as pd
+
+    from artifacts import load_matrix, save_matrix
+
+    df = pd.read_csv(STD_CSV)
+    columns = [col for col in df.columns if col.endswith("_std")]
+    root = tmp_path / "artifacts"
+    save_matrix(df[columns].to_numpy(), "features_std", columns, root=root)
+    return load_matrix("features_std", root=root)
@@ -0,0 +1,93 @@
+# test_artifacts.py
+# Check that tables and matrices survive the binary artifact round-trip,
+# missing text values included, and that a save replaces the earlier files.
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from artifacts import TableWriter, iter_table, load_matrix, load_table, save_matrix, save_table
+
+
+def test_table_round_trip_keeps_values_and_dtypes(tmp_path):
+    df = pd.DataFrame({
+        "Country name": ["Finland", "Denmark", "Côte d’Ivoire"],
+        "Ladder score": [7.741, 7.583, 5.080],
+        "cluster": np.array([1, 1, 0], dtype=np.int32),
+    })
+    save_table(df, "t", root=tmp_path)
+
+    loaded = load_table("t", root=tmp_path)
+    pd.testing.assert_frame_equal(loaded, df)
+
+    only_names = load_table("t", columns=["Country name"], root=tmp_path)
+    assert list(only_names.columns) == ["Country name"]
+
+
+def test_matrix_is_memory_mapped_and_column_slices_are_views(tmp_path):
+    X = np.arange(12, dtype=float).reshape(4, 3)
+    save_matrix(X, "m", ["a", "b", "c"], root=tmp_path)
+
+    full = load_matrix("m", root=tmp_path)
+    assert isinstance(full, np.memmap)
+    np.testing.assert_array_equal(full, X)
+
+    tail = load_matrix("m", ["b", "c"], root=tmp_path)
+    assert not tail.flags.owndata  # a view on the mapped file, not a copy
+    np.testing.assert_array_equal(tail, X[:, 1:])
+
+
+def test_table_written_and_read_in_chunks(tmp_path):
+    df = pd.DataFrame({
+        "Country name": [f"c{i}" for i in range(10)],
+        "cluster": np.arange(10, dtype=np.int32) % 3,
+    })
+    writer = TableWriter("w", {"Country name": "<U3", "cluster": "int32"}, n_rows=10, root=tmp_path)
+    for start in range(0, 10, 4):
+        writer.write(df.iloc[start:start + 4])
+    writer.close()
+
+    chunks = list(iter_table("w", chunksize=3, root=tmp_path))
+    assert [len(c) for c in chunks] == [3, 3, 3, 1]
+    pd.testing.assert_frame_equal(pd.concat(chunks).reset_index(drop=True), df)
+
+
+def test_missing_text_values_round_trip(tmp_path):
+    df = pd.DataFrame({
+        "Country name": ["Finland", None, "nan", np.nan],
+        "Regional indicator": ["Western Europe", "None", np.nan, "Africa"],
+        "cluster": np.arange(4, dtype=np.int32),
+    })
+    save_table(df, "na", root=tmp_path)
+
+    loaded = load_table("na", root=tmp_path)
+    assert loaded["Country name"].isna().tolist() == [False, True, False, True]
+    assert loaded["Regional indicator"].isna().tolist() == [False, False, True, False]
+    assert loaded.loc[2, "Country name"] == "nan"
+    assert loaded.loc[1, "Regional indicator"] == "None"
+
+    # the chunked reader and writer keep the masks as well
+    writer = TableWriter("na_copy", {"Country name": "<U7", "cluster": "int32"}, n_rows=4, root=tmp_path)
+    for chunk in iter_table("na", ["Country name", "cluster"], chunksize=3, root=tmp_path):
+        writer.write(chunk)
+    writer.close()
+    copied = load_table("na_copy", root=tmp_path)
+    pd.testing.assert_frame_equal(copied, loaded[["Country name", "cluster"]])
+
+
+def test_save_replaces_files_of_an_earlier_save(tmp_path):
+    save_table(pd.DataFrame({"a": [1.0], "b": [2.0], "c": [3.0]}), "x", root=tmp_path)
+    save_matrix(np.ones((2, 2)), "x/nested", ["a", "b"], root=tmp_path)
+    save_matrix(np.ones((2, 2)), "x", ["a", "b"], root=tmp_path)
+
+    # files of the earlier table are gone, the nested artifact is kept
+    assert sorted(p.name for p in (tmp_path / "x").iterdir()) == ["matrix.npy", "meta.json", "nested"]
+    assert load_matrix("x/nested", root=tmp_path).shape == (2, 2)
+
+
+def test_writer_rejects_text_longer_than_its_column(tmp_path):
+    writer = TableWriter("w", {"Country name": "<U5"}, n_rows=2, root=tmp_path)
+    writer.write(pd.DataFrame({"Country name": ["Chad"]}))
+
+    with pytest.raises(ValueError, match="6 characters.*<U5"):
+        writer.write(pd.DataFrame({"Country name": ["Israel"]}))
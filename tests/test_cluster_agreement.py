@@ -0,0 +1,53 @@
+# test_cluster_agreement.py
+# Batched NMI / variation of information must match their definitions, and
+# label matching must work when the two labelings have different K, and the
+# permutation search must find matchings as good as the Hungarian algorithm.
+
+import numpy as np
+from sklearn.metrics import adjusted_rand_score, mutual_info_score, normalized_mutual_info_score
+
+from cluster_agreement import (MAX_BRUTE_FORCE_K, align_labels, best_matching, compare_labelings,
+                               contingency_batch, matched_share)
+
+
+def test_compare_many_labelings_matches_sklearn():
+    rng = np.random.default_rng(0)
+    reference = rng.integers(0, 3, size=150)
+    labelings = rng.integers(0, 5, size=(20, 150))
+    labelings[0] = np.array([1, 2, 0])[reference]  # same clusters, other ids
+
+    table = compare_labelings(reference, labelings)
+
+    assert np.isclose(table.loc[0, "matched_share"], 1.0)
+    assert np.isclose(table.loc[0, "vi"], 0.0)
+    for b, labels in enumerate(labelings):
+        h_ref = mutual_info_score(reference, reference)
+        h_other = mutual_info_score(labels, labels)
+        vi = h_ref + h_other - 2 * mutual_info_score(reference, labels)
+        assert np.isclose(table.loc[b, "ari"], adjusted_rand_score(reference, labels))
+        assert np.isclose(table.loc[b, "nmi"], normalized_mutual_info_score(reference, labels))
+        assert np.isclose(table.loc[b, "vi"], vi)
+
+
+def test_matching_with_different_k():
+    reference = np.array([0, 0, 1, 1, 2, 2])
+    split = np.array([3, 3, 0, 1, 2, 2])  # baseline cluster 1 split in two
+    merged = np.array([1, 1, 0, 0, 0, 0])
+
+    for labels, expected_agreement in ((split, 5), (merged, 4)):
+        table = contingency_batch(reference, labels[None])
+        aligned = align_labels(labels[None], best_matching(table))[0]
+        assert (aligned == reference).sum() == expected_agreement
+
+
+def test_permutation_and_hungarian_matching_agree():
+    from scipy.optimize import linear_sum_assignment
+
+    rng = np.random.default_rng(1)
+    for k in (MAX_BRUTE_FORCE_K, MAX_BRUTE_FORCE_K + 2):
+        reference = rng.integers(0, k, size=300)
+        tables = contingency_batch(reference, rng.integers(0, k, size=(10, 300)), k, k)
+        share = matched_share(tables, best_matching(tables))
+        for b, table in enumerate(tables):
+            rows, cols = linear_sum_assignment(table, maximize=True)
+            assert np.isclose(share[b], table[rows, cols].sum() / table.sum())
@@ -0,0 +1,39 @@
+# test_cluster_stability.py
+# Batched agreement metrics must match sklearn, label alignment must undo a
+# permutation of label ids, and the stability run must not depend on the
+# number of worker processes.
+
+import numpy as np
+from sklearn.metrics import adjusted_rand_score
+
+from cluster_agreement import adjusted_rand_batch, align_labels, best_matching, contingency_batch
+from cluster_stability import resample_stability
+
+
+def test_batched_ari_and_alignment():
+    rng = np.random.default_rng(0)
+    reference = rng.integers(0, 4, size=200)
+    permuted = np.array([2, 0, 3, 1])[reference]
+    noisy = np.where(rng.random(200) < 0.3, rng.integers(0, 4, size=200), permuted)
+    labelings = np.vstack([permuted, noisy])
+
+    table = contingency_batch(reference, labelings)
+    ari = adjusted_rand_batch(table)
+    assert np.isclose(ari[0], 1.0)
+    assert np.isclose(ari[1], adjusted_rand_score(reference, noisy))
+
+    aligned = align_labels(labelings, best_matching(table))
+    assert (aligned[0] == reference).all()
+
+
+def test_stability_independent_of_workers():
+    rng = np.random.default_rng(1)
+    X = np.vstack([rng.normal(c, 0.4, size=(30, 2)) for c in ([0, 0], [3, 0], [0, 3])])
+    reference = np.repeat([0, 1, 2], 30)
+
+    serial = resample_stability(X, reference, n_resamples=60, n_jobs=1)
+    parallel = resample_stability(X, reference, n_resamples=60, n_jobs=2)
+
+    assert np.array_equal(serial["coassigned"], parallel["coassigned"])
+    assert np.allclose(serial["ari"], parallel["ari"])
+    assert serial["ari"].min() > 0.9
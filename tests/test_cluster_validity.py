@@ -0,0 +1,26 @@
+# test_cluster_validity.py
+# Validity metrics from cluster statistics must match sklearn's implementations.
+
+import numpy as np
+from sklearn.cluster import KMeans
+from sklearn.metrics import calinski_harabasz_score, davies_bouldin_score, silhouette_score
+
+from cluster_validity import choose_best_k, evaluate_sweep
+
+
+def test_sweep_metrics_match_sklearn_and_pick_true_k():
+    rng = np.random.default_rng(3)
+    X = np.vstack([rng.normal(c, 0.5, size=(60, 2)) for c in ([0, 0], [4, 0], [0, 4])])
+    labels_by_k = {
+        k: KMeans(n_clusters=k, n_init=3, random_state=0).fit_predict(X) for k in (2, 3, 4, 5)
+    }
+
+    table = evaluate_sweep(X, labels_by_k, cache_mb=16)
+
+    for k, labels in labels_by_k.items():
+        assert np.isclose(table.loc[k, "silhouette"], silhouette_score(X, labels))
+        assert np.isclose(table.loc[k, "calinski_harabasz"], calinski_harabasz_score(X, labels))
+        assert np.isclose(table.loc[k, "davies_bouldin"], davies_bouldin_score(X, labels))
+
+    for metric in ("silhouette", "calinski_harabasz", "davies_bouldin", "inertia"):
+        assert choose_best_k(table, metric) == 3
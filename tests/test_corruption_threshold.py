@@ -0,0 +1,27 @@
+# test_corruption_threshold.py
+# The incrementally updated threshold sweep must match refitting the
+# interaction model from scratch at every threshold.
+
+import numpy as np
+import pandas as pd
+
+from corruption_threshold import threshold_sweep
+from ols import fit_ols
+from reginteractions import BASE_COLS, CORRUPTION_COL, FEATURE_COLS, TARGET_COL, add_model_features
+
+
+def test_sweep_matches_refit():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.uniform(0.1, 1.5, size=(60, len(BASE_COLS))), columns=BASE_COLS)
+    df[TARGET_COL] = df[BASE_COLS].sum(axis=1) + rng.normal(0, 0.2, size=60)
+
+    quantiles = np.array([0.2, 0.3, 0.5, 0.8])
+    table = threshold_sweep(df, quantiles)
+
+    for _, row in table.iterrows():
+        model_df = add_model_features(df, row["threshold"])
+        X = model_df[FEATURE_COLS]
+        fit = fit_ols(X, model_df[TARGET_COL])
+        assert row["n_high_corruption"] == (df[CORRUPTION_COL] <= row["threshold"]).sum()
+        assert np.isclose(row["r2"], fit.r2)
+        assert np.allclose(row[FEATURE_COLS].to_numpy(float), fit.coef[1:] * X.std(ddof=0).to_numpy())
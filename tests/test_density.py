@@ -0,0 +1,49 @@
+# test_density.py
+# Check the density grid against per-category np.histogram2d and the
+# composed image (transparent where empty, pure colour where one category).
+
+import numpy as np
+
+from density import compose_density, density_grid, sparse_points, use_density
+
+
+def test_grid_counts_equal_histogram2d_per_category():
+    rng = np.random.default_rng(0)
+    x, y = rng.normal(size=(2, 5000))
+    categories = rng.integers(0, 3, 5000)
+    grid = (40, 30)
+
+    counts, extent, _ = density_grid(x, y, categories, grid=grid)
+
+    assert counts.shape == (3, 30, 40)
+    assert counts.sum() == 5000
+    for c in range(3):
+        expected, _, _ = np.histogram2d(
+            y[categories == c], x[categories == c],
+            bins=[30, 40], range=[extent[2:], extent[:2]],
+        )
+        np.testing.assert_array_equal(counts[c], expected)
+
+
+def test_composed_image_colours_and_transparency():
+    x = np.array([0.0, 0.0, 1.0, 1.0, 1.0])
+    y = np.array([0.0, 0.0, 1.0, 1.0, 1.0])
+    categories = np.array([0, 0, 1, 1, 0])
+    colors = np.array([[1.0, 0.0, 0.0], [0.0, 0.0, 1.0]])
+
+    counts, _, cells = density_grid(x, y, categories, grid=(2, 2))
+    image = compose_density(counts, colors)
+
+    np.testing.assert_allclose(image[0, 0], [1.0, 0.0, 0.0, image[0, 0, 3]])  # only category 0
+    np.testing.assert_allclose(image[1, 1, :3], [1 / 3, 0.0, 2 / 3])  # mixed by counts
+    assert image[1, 1, 3] == 1.0  # densest cell is opaque
+    assert image[0, 1, 3] == 0.0 and image[1, 0, 3] == 0.0  # empty cells
+
+    # with a threshold of two points only the lone pair of cell (0, 0) is sparse
+    np.testing.assert_array_equal(sparse_points(counts, cells, max_count=2), [True, True, False, False, False])
+
+
+def test_density_is_chosen_by_size():
+    assert not use_density(150)
+    assert use_density(1_000_000)
+    assert use_density(150, density=True)
@@ -0,0 +1,30 @@
+# test_feature_subsets.py
+# The subset sweep covers every non-empty subset, reads evenly spaced columns
+# without copying and gives the same labels with or without a process pool.
+
+import numpy as np
+
+from feature_subsets import all_subsets, column_view, sweep_subsets
+
+
+def test_subsets_and_column_views():
+    assert len(all_subsets(6)) == 63
+    X = np.arange(60.0).reshape(10, 6)
+    for cols in [(4,), (1, 2, 3), (0, 2, 4), (1, 4)]:
+        assert np.shares_memory(column_view(X, cols), X)
+        assert np.array_equal(column_view(X, cols), X[:, list(cols)])
+    assert not np.shares_memory(column_view(X, (0, 1, 3)), X)
+    assert np.array_equal(column_view(X, (0, 1, 3)), X[:, [0, 1, 3]])
+
+
+def test_parallel_sweep_equals_serial():
+    rng = np.random.default_rng(2)
+    X = np.vstack([rng.normal(c, 0.5, size=(40, 3)) for c in ([0, 0, 0], [3, 3, 0])])
+
+    serial = sweep_subsets(X, [2, 3], n_init=2, n_jobs=1)
+    parallel = sweep_subsets(X, [2, 3], n_init=2, n_jobs=2)
+
+    assert [cols for cols, _, _ in serial] == all_subsets(3)
+    for (_, labels_s, table_s), (_, labels_p, table_p) in zip(serial, parallel):
+        assert all(np.array_equal(labels_s[k], labels_p[k]) for k in (2, 3))
+        assert np.allclose(table_s["silhouette"], table_p["silhouette"])
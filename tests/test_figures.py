@@ -0,0 +1,51 @@
+# test_figures.py
+# Check the figure profiles: preview renders at low dpi, "none" renders
+# nothing and lets the pipeline ignore missing figures.
+
+import numpy as np
+from matplotlib.image import imread
+
+from figures import FigureSpec, render
+from pipeline import Step, why_run
+
+
+def draw_line(fig, values):
+    ax = fig.subplots()
+    ax.plot(values)
+
+
+def test_preview_renders_smaller_images_than_full(tmp_path, capsys):
+    specs = [
+        FigureSpec(str(tmp_path / "full.png"), draw_line, {"values": np.arange(5)}, figsize=(4, 3),
+                   label="line plot"),
+        FigureSpec(str(tmp_path / "preview.png"), draw_line, {"values": np.arange(5)}, figsize=(4, 3)),
+    ]
+    render(specs[:1], profile="full", jobs=1)
+    render(specs[1:], profile="preview", jobs=1)
+
+    assert f"Saved line plot to: {specs[0].path}" in capsys.readouterr().out
+    assert imread(specs[0].path).shape[:2] == (900, 1200)
+    assert imread(specs[1].path).shape[:2] == (216, 288)
+
+
+def test_figures_are_rendered_on_a_process_pool(tmp_path):
+    specs = [FigureSpec(str(tmp_path / f"fig{i}.png"), draw_line, {"values": np.arange(i + 2)}) for i in range(3)]
+    paths = render(specs, profile="preview", jobs=2)
+
+    assert paths == [spec.path for spec in specs]
+    assert all((tmp_path / f"fig{i}.png").exists() for i in range(3))
+
+
+def test_none_profile_skips_figures(tmp_path):
+    spec = FigureSpec(str(tmp_path / "skipped.png"), draw_line, {"values": np.arange(3)})
+
+    assert render([spec], profile="none") == []
+    assert not (tmp_path / "skipped.png").exists()
+
+    # the pipeline does not rerun a step just because its figure is missing
+    table = tmp_path / "table.csv"
+    table.write_text("a\n1\n")
+    step = Step("x", "x", inputs=[], outputs=[str(table), spec.path])
+    record = {"inputs": {}, "source": "s", "params": "p", "figures": "full"}
+    assert why_run(step, dict(record, figures="none"), {"x": record}) is None
+    assert why_run(step, record, {"x": record}) == f"output missing: {spec.path}"
@@ -0,0 +1,48 @@
+# test_happiness_cli.py
+# Check that the step modules import without scikit-learn, SciPy or
+# matplotlib, that `python -m happiness list` works, and that -X importtime
+# output is parsed into a per-package breakdown.
+
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from instrument import import_breakdown, parse_importtime
+from pipeline import STEPS
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+HEAVY = ("sklearn", "scipy", "matplotlib")
+
+
+@pytest.mark.parametrize("step", [s.name for s in STEPS])
+def test_step_import_is_lazy(step):
+    code = (f"import sys; sys.path.insert(0, 'src'); import {step}; "
+            f"print(','.join(m for m in {HEAVY!r} if m in sys.modules))")
+    out = subprocess.run([sys.executable, "-c", code], cwd=PROJECT_ROOT,
+                         capture_output=True, text=True, check=True).stdout
+    assert out.strip() == ""
+
+
+def test_list_shows_every_step():
+    out = subprocess.run([sys.executable, "-m", "happiness", "list"], cwd=PROJECT_ROOT,
+                         capture_output=True, text=True, check=True).stdout
+    assert [line.split()[0] for line in out.splitlines()] == [s.name for s in STEPS]
+
+
+def test_parse_importtime():
+    text = (
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       100 |        100 |     numpy.core\n"
+        "import time:       300 |        400 |   numpy\n"
+        "some warning\n"
+        "import time:      2000 |       2000 | pandas\n"
+    )
+    imports, rest = parse_importtime(text)
+
+    assert [(r["module"], r["depth"]) for r in imports] == [("numpy.core", 2), ("numpy", 1), ("pandas", 0)]
+    assert imports[1]["cumulative_s"] == pytest.approx(0.0004)
+    assert rest == "some warning\n"
+    assert import_breakdown(imports) == [("pandas", pytest.approx(0.002), 1),
+                                         ("numpy", pytest.approx(0.0004), 2)]
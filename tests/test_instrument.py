@@ -0,0 +1,45 @@
+# test_instrument.py
+# Check that spans nest, count written bytes and export a valid Chrome trace.
+
+import json
+
+from instrument import collect, span, traced, write_trace
+
+
+@traced("save")
+def write_file(path, n_bytes):
+    with open(path, "wb") as fh:
+        fh.write(b"x" * n_bytes)
+
+
+def test_nested_spans_record_time_and_io(tmp_path):
+    collect()
+    with span("step", cat="step", reset_peak=True):
+        write_file(tmp_path / "out.bin", 1_000_000)
+        sum(i * i for i in range(100_000))
+    inner, outer = collect()
+
+    assert (inner["name"], inner["parent"]) == ("save", "step")
+    assert inner["function"].endswith("write_file")
+    assert outer["parent"] is None and outer["cat"] == "step"
+    assert outer["wall_s"] >= inner["wall_s"] > 0
+    assert outer["cpu_s"] > 0 and outer["peak_rss_mb"] > 0
+    assert inner["bytes_written"] >= 1_000_000
+    assert collect() == []
+
+
+def test_trace_files(tmp_path):
+    collect()
+    with span("a"):
+        with span("b", items=3):
+            pass
+    lines, trace = tmp_path / "t.jsonl", tmp_path / "t.json"
+    write_trace(collect(), lines, trace)
+
+    records = [json.loads(line) for line in lines.read_text().splitlines()]
+    assert [r["name"] for r in records] == ["b", "a"]
+
+    events = [e for e in json.loads(trace.read_text())["traceEvents"] if e["ph"] == "X"]
+    b, a = events
+    assert a["ts"] == 0 and b["ts"] >= a["ts"] and b["ts"] + b["dur"] <= a["ts"] + a["dur"] + 1
+    assert b["args"]["items"] == 3 and b["args"]["parent"] == "a"
@@ -0,0 +1,32 @@
+# test_interaction_search.py
+# Each forward-stepwise step must pick the candidate a full refit would
+# pick, with the same residual sum of squares.
+
+import numpy as np
+
+from interaction_search import forward_stepwise, pairwise_products
+from ols import fit_ols
+
+
+def sse_of(X, y):
+    resid = fit_ols(X, y).resid
+    return resid @ resid
+
+
+def test_stepwise_path_matches_brute_force_refits():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(80, 4))
+    products, names = pairwise_products(X, list("abcd"))
+    y = X.sum(axis=1) + 2 * products[:, 1] - products[:, 4] + rng.normal(0, 0.3, size=80)
+    assert names[1] == "a_x_c" and products.shape == (80, 6)
+
+    order, sse = forward_stepwise(X, products, y, max_steps=3)
+
+    chosen = []
+    for step, picked in enumerate(order):
+        rest = [c for c in range(6) if c not in chosen]
+        refits = {c: sse_of(np.column_stack([X, products[:, chosen + [c]]]), y) for c in rest}
+        assert picked == min(refits, key=refits.get)
+        chosen.append(picked)
+        assert np.isclose(sse[step + 1], refits[picked])
+    assert set(order[:2]) == {1, 4}
@@ -0,0 +1,44 @@
+# test_kmeans_stream.py
+# The streaming mode of run_kmeans.py (partial_fit per chunk, second pass
+# through TableWriter, CSV appended chunk by chunk) on a small artifact with
+# a chunk size that does not divide the row count.
+
+import numpy as np
+import pandas as pd
+
+import run_kmeans
+from artifacts import load_matrix, load_table, save_matrix, save_table
+from model_store import load_model
+
+N_ROWS = 103
+CHUNKSIZE = 10
+
+
+def test_streaming_run_writes_every_row_once(tmp_path, monkeypatch, model_store):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "results").mkdir()
+
+    rng = np.random.default_rng(0)
+    centers = rng.normal(0, 4, size=(3, 6))
+    X = centers[np.arange(N_ROWS) % 3] + rng.normal(0, 0.5, size=(N_ROWS, 6))
+    std_cols = [f"{col}_std" for col in run_kmeans.ASSIGNMENT_COLS[2:]]
+    table = pd.DataFrame(X, columns=run_kmeans.ASSIGNMENT_COLS[2:])
+    table.insert(0, "Ladder score", rng.uniform(3, 8, size=N_ROWS))
+    table.insert(0, "Country name", [f"Country {i}" for i in range(N_ROWS)])
+    save_table(table, run_kmeans.DATA_TABLE)
+    save_matrix(X, run_kmeans.FEATURES, std_cols)
+
+    run_kmeans.main(k_values=[2, 3], streaming=True, chunksize=CHUNKSIZE)
+
+    model = load_model("kmeans")
+    full = np.asarray(load_matrix(run_kmeans.FEATURES))
+    assignments = load_table("cluster_assignments")
+    assert len(assignments) == N_ROWS
+    np.testing.assert_array_equal(assignments["cluster"], model.predict(full))
+    pd.testing.assert_frame_equal(assignments[run_kmeans.ASSIGNMENT_COLS], table)
+
+    lines = (tmp_path / "results/cluster_assignments.csv").read_text().splitlines()
+    assert len(lines) == N_ROWS + 1
+    assert sum(line.startswith("Country name,") for line in lines) == 1
+    csv = pd.read_csv(tmp_path / "results/cluster_assignments.csv")
+    assert csv["cluster"].tolist() == assignments["cluster"].tolist()
@@ -0,0 +1,30 @@
+# test_kmeans_sweep.py
+# The parallel K sweep must give the same models as the serial one.
+
+import numpy as np
+
+from kmeans_sweep import sweep_kmeans
+
+
+def test_parallel_sweep_matches_serial_sweep():
+    rng = np.random.default_rng(0)
+    X = np.vstack([rng.normal(c, 0.3, size=(40, 3)) for c in (-2, 0, 2)])
+
+    serial = sweep_kmeans(X, [2, 3, 4], n_init=4, random_state=42, n_jobs=1)
+    parallel = sweep_kmeans(X, [2, 3, 4], n_init=4, random_state=42, n_jobs=2)
+
+    for k in (2, 3, 4):
+        np.testing.assert_array_equal(serial[k].labels_, parallel[k].labels_)
+        assert serial[k].inertia_ == parallel[k].inertia_
+
+
+def test_bisecting_sweep_returns_every_k_with_comparable_inertia():
+    rng = np.random.default_rng(0)
+    X = np.vstack([rng.normal(c, 0.3, size=(40, 3)) for c in (-2, 0, 2, 4)])
+
+    independent = sweep_kmeans(X, [2, 3, 4], n_init=4, n_jobs=1)
+    bisecting = sweep_kmeans(X, [2, 3, 4], n_init=4, n_jobs=1, mode="bisecting")
+
+    for k in (2, 3, 4):
+        assert len(np.unique(bisecting[k].labels_)) == k
+        assert bisecting[k].inertia_ <= 1.05 * independent[k].inertia_
@@ -0,0 +1,35 @@
+# test_load_data.py
+# Check the shared raw-data loader: column projection, dtypes, row filters, chunking.
+
+from load_data import DATA_FILE, iter_raw, load_raw
+
+
+def test_projection_reads_only_requested_columns_with_schema_dtypes():
+    df = load_raw(columns=["Country name", "Ladder score", "Dystopia + residual"])
+
+    assert list(df.columns) == ["Country name", "Ladder score", "Dystopia + residual"]
+    assert df["Ladder score"].dtype == "float64"
+    assert df["Dystopia + residual"].dtype == "float32"
+    # decimal commas are parsed as numbers
+    assert df.loc[df["Country name"] == "Finland", "Ladder score"].iloc[0] == 7.741
+
+
+def test_row_filter_and_chunked_read_match_full_read():
+    full = load_raw(columns=["Country name", "Ladder score"])
+    wanted = ["Finland", "Denmark", "Afghanistan"]
+
+    filtered = load_raw(columns=["Ladder score"], where={"Country name": wanted}, chunksize=20)
+    expected = full[full["Country name"].isin(wanted)]["Ladder score"].reset_index(drop=True)
+    assert filtered["Ladder score"].tolist() == expected.tolist()
+
+    chunks = list(iter_raw(columns=["Country name"], chunksize=50, path=DATA_FILE))
+    assert sum(len(c) for c in chunks) == len(full)
+    assert len(chunks) > 1
+
+
+def test_cached_result_is_not_changed_by_callers():
+    df = load_raw(columns=["Country name", "Ladder score"])
+    df["Ladder score"] = 0.0
+
+    again = load_raw(columns=["Country name", "Ladder score"])
+    assert (again["Ladder score"] > 0).all()
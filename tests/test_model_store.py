@@ -0,0 +1,78 @@
+# test_model_store.py
+# Check that stored estimators are rebuilt exactly, that stale models are
+# detected, and that load_or_fit() only fits once.
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.cluster import KMeans
+from sklearn.decomposition import PCA
+from sklearn.preprocessing import StandardScaler
+
+from model_store import (KEEP_VERSIONS, StaleModelError, load_model, load_or_fit, model_info,
+                         save_model, versions)
+
+X = np.random.default_rng(0).normal(size=(200, 4))
+
+
+@pytest.mark.parametrize("model", [
+    StandardScaler().fit(pd.DataFrame(X, columns=list("abcd"))),
+    KMeans(n_clusters=3, n_init=2, random_state=0).fit(X),
+    PCA(n_components=2).fit(X),
+])
+def test_round_trip(model, tmp_path):
+    save_model(model, "m", X, root=tmp_path)
+    loaded = load_model("m", X, root=tmp_path)
+
+    data = pd.DataFrame(X, columns=list("abcd")) if hasattr(model, "feature_names_in_") else X
+    assert type(loaded) is type(model)
+    assert np.array_equal(loaded.transform(data), model.transform(data))
+    if hasattr(model, "labels_"):
+        assert np.array_equal(loaded.predict(X), model.labels_)
+
+
+def test_stale_model_is_detected(tmp_path):
+    save_model(PCA(n_components=2).fit(X), "pca", X, root=tmp_path)
+
+    with pytest.raises(StaleModelError, match="training data changed"):
+        load_model("pca", X[:-1], root=tmp_path)
+    with pytest.raises(StaleModelError, match="n_components"):
+        load_model("pca", X, {"n_components": 3}, root=tmp_path)
+    with pytest.raises(FileNotFoundError):
+        load_model("other", root=tmp_path)
+
+
+def test_load_or_fit_fits_once_per_data(tmp_path):
+    calls = []
+
+    def fit(data):
+        calls.append(len(data))
+        return PCA(n_components=2).fit(data)
+
+    first = load_or_fit("pca", X, lambda: fit(X), {"n_components": 2}, root=tmp_path)
+    again = load_or_fit("pca", X, lambda: fit(X), {"n_components": 2}, root=tmp_path)
+    load_or_fit("pca", X[:100], lambda: fit(X[:100]), {"n_components": 2}, root=tmp_path)
+
+    assert calls == [200, 100]
+    assert np.array_equal(first.components_, again.components_)
+    assert versions("pca", root=tmp_path) == [1, 2]
+    assert model_info("pca", version=1, root=tmp_path)["n_rows"] == 200
+
+    for _ in range(KEEP_VERSIONS + 2):
+        save_model(first, "pca", X, root=tmp_path)
+    assert len(versions("pca", root=tmp_path)) == KEEP_VERSIONS
+
+
+def test_minibatch_model_keeps_its_random_state(tmp_path):
+    from sklearn.cluster import MiniBatchKMeans
+
+    model = MiniBatchKMeans(n_clusters=3, random_state=0, n_init=3, batch_size=50)
+    for chunk in np.array_split(X, 4):
+        model.partial_fit(chunk)
+    save_model(model, "stream", X, root=tmp_path)
+    loaded = load_model("stream", X, root=tmp_path)
+
+    # continuing the fit gives the same centers as the original model
+    model.partial_fit(X[:50])
+    loaded.partial_fit(X[:50])
+    assert np.array_equal(loaded.cluster_centers_, model.cluster_centers_)
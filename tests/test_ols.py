@@ -0,0 +1,45 @@
+# test_ols.py
+# The closed-form OLS engine must agree with sklearn, batched specifications
+# must equal separate fits, and a stored fit must load back unchanged.
+
+import numpy as np
+from sklearn.linear_model import LinearRegression
+
+from ols import fit_ols, fit_specs, load_fit, save_fit
+
+
+def test_ols_matches_sklearn_and_specs_match_single_fits(tmp_path):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(120, 4))
+    y = 1.5 + X @ np.array([0.5, -1.0, 0.0, 2.0]) + rng.normal(0, 0.3, size=120)
+
+    fit = fit_ols(X, y)
+    reference = LinearRegression().fit(X, y)
+    assert np.allclose(fit.coef, np.r_[reference.intercept_, reference.coef_])
+    assert np.isclose(fit.r2, reference.score(X, y))
+
+    specs = [[0], [0, 1], [1, 3], [0, 1, 2, 3]]
+    for spec, batched in zip(specs, fit_specs(X, y, specs)):
+        single = fit_ols(X[:, spec], y)
+        assert np.allclose(batched.coef, single.coef)
+        assert np.allclose(batched.se, single.se)
+        assert np.isclose(batched.r2, single.r2)
+
+    save_fit(fit, "fit", root=tmp_path)
+    loaded = load_fit("fit", root=tmp_path)
+    assert loaded.names == fit.names
+    assert np.allclose(loaded.resid, fit.resid)
+    assert np.allclose(loaded.predict(X[:5]), fit.fitted[:5])
+
+
+def test_exactly_identified_fit_has_no_residual_variance():
+    rng = np.random.default_rng(1)
+    X = rng.normal(size=(3, 2))
+    y = rng.normal(size=3)
+
+    fit = fit_ols(X, y)
+    assert fit.df_resid == 0
+    assert np.isnan(fit.sigma2)
+    assert np.isnan(fit.adj_r2)
+    assert np.isnan(fit.se).all()
+    assert fit.summary()["p_value"].isna().all()
@@ -0,0 +1,30 @@
+# test_ols_cv.py
+# Cross-validation by Gram downdating and the hat-matrix leave-one-out
+# shortcut must give the same predictions as refitting on the training rows.
+
+import numpy as np
+
+from ols import fit_ols
+from ols_cv import fold_ids, kfold_predictions, loo_predictions
+
+
+def test_downdated_folds_and_loo_equal_refits():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(40, 3))
+    y = X @ np.array([1.0, -0.5, 0.2]) + rng.normal(0, 0.3, size=40)
+    specs = [[0], [0, 2], [0, 1, 2]]
+
+    folds = fold_ids(40, n_folds=4, n_repeats=2, random_state=1)
+    preds = kfold_predictions(X, y, folds, specs)
+    loo = loo_predictions(X, y, specs)
+
+    for s, spec in enumerate(specs):
+        for r in range(2):
+            for f in range(4):
+                test = folds[r] == f
+                fit = fit_ols(X[~test][:, spec], y[~test])
+                assert np.allclose(preds[s, r, test], fit.predict(X[test][:, spec]))
+        for i in (0, 17, 39):
+            keep = np.arange(40) != i
+            fit = fit_ols(X[keep][:, spec], y[keep])
+            assert np.isclose(loo[s, i], fit.predict(X[i:i + 1, spec])[0])
@@ -0,0 +1,62 @@
+# test_ols_grouped.py
+# Per-group fits from the grouped statistics must equal separate fits, and
+# the pooled interaction model must reproduce the per-group lines.
+
+import numpy as np
+
+from ols import fit_ols
+from ols_grouped import fit_groups, pooled_design
+
+
+def test_grouped_fits_match_separate_and_pooled_fits():
+    rng = np.random.default_rng(0)
+    groups = rng.integers(0, 3, size=150)
+    X = rng.normal(size=(150, 2))
+    y = np.array([1.0, -2.0, 0.5])[groups] + X[:, 0] * (groups + 1) + rng.normal(0, 0.3, size=150)
+
+    coefs, summary, resid = fit_groups(X, y, groups)
+
+    for g in range(3):
+        rows = groups == g
+        single = fit_ols(X[rows], y[rows])
+        assert np.allclose(coefs.loc[coefs["group"] == g, "coef"], single.coef)
+        assert np.allclose(coefs.loc[coefs["group"] == g, "se"], single.se)
+        assert np.isclose(summary.loc[g, "r2"], single.r2)
+        assert np.allclose(resid[rows], single.resid)
+
+    pooled = fit_ols(pooled_design(X[:, :1], groups, ["x"]), y).params()
+    sep = fit_groups(X[:, :1], y, groups, names=["x"])[0]
+    assert np.isclose(pooled["Intercept"] + pooled["group2"], sep.query("group == 2 and term == 'Intercept'")["coef"].item())
+    assert np.isclose(pooled["x"] + pooled["group2_x_x"], sep.query("group == 2 and term == 'x'")["coef"].item())
+
+
+def test_near_perfect_fit_keeps_its_residual_variance():
+    rng = np.random.default_rng(2)
+    groups = np.repeat([0, 1], 50)
+    X = rng.normal(size=(100, 2))
+    y = 1e4 + X @ np.array([3.0, 2.0]) + rng.normal(0, 1e-7, size=100)  # R^2 ~ 1 - 1e-16
+
+    coefs, summary, _ = fit_groups(X, y, groups)
+
+    for g in range(2):
+        rows = groups == g
+        single = fit_ols(X[rows], y[rows])
+        assert np.allclose(coefs.loc[coefs["group"] == g, "se"], single.se)
+        assert np.isclose(summary.loc[g, "rmse"], single.rmse)
+
+
+def test_group_with_a_constant_predictor_falls_back_to_pinv():
+    rng = np.random.default_rng(1)
+    groups = np.repeat([0, 1], 40)
+    X = rng.normal(size=(80, 2))
+    X[groups == 1, 1] = 0.0  # no variance in group 1: singular X'X
+    y = X[:, 0] + rng.normal(0, 0.3, size=80)
+
+    coefs, summary, resid = fit_groups(X, y, groups)
+
+    rows = groups == 0
+    assert np.allclose(coefs.loc[coefs["group"] == 0, "coef"], fit_ols(X[rows], y[rows]).coef)
+    # group 1: same residuals as a least-squares fit without the empty column
+    rows = groups == 1
+    assert np.allclose(resid[rows], fit_ols(X[rows, :1], y[rows]).resid)
+    assert np.isfinite(summary["r2"]).all()
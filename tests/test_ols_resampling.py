@@ -0,0 +1,32 @@
+# test_ols_resampling.py
+# Batched bootstrap fits must equal refits on the drawn rows, and the
+# permutation test must separate a real effect from a null one.
+
+import numpy as np
+
+from ols import fit_ols
+from ols_resampling import bootstrap_coefs, permutation_pvalues
+
+
+def test_bootstrap_equals_refit_on_drawn_rows():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(50, 2))
+    y = 1.0 + 2.0 * X[:, 0] + rng.normal(0, 0.5, size=50)
+
+    coefs = bootstrap_coefs(X, y, n_boot=3, random_state=7)
+
+    # redraw the same row weights and refit on the repeated rows
+    weights = np.random.default_rng(7).multinomial(50, np.full(50, 1 / 50), size=3)
+    for b in range(3):
+        rows = np.repeat(np.arange(50), weights[b])
+        assert np.allclose(coefs[b], fit_ols(X[rows], y[rows]).coef)
+
+
+def test_permutation_pvalues_find_real_effect():
+    rng = np.random.default_rng(1)
+    X = rng.normal(size=(80, 2))
+    y = 3.0 * X[:, 0] + rng.normal(size=80)
+
+    p_real, p_null = permutation_pvalues(X, y, n_perm=499, random_state=0)
+    assert p_real < 0.01
+    assert p_null > 0.05
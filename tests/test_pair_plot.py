@@ -0,0 +1,32 @@
+# test_pair_plot.py
+# Check the scatter-matrix specs: one correlation matrix for all pairs and
+# the per-point colours matplotlib would pick for c=cluster.
+
+import numpy as np
+import pandas as pd
+from matplotlib import colormaps
+
+from pair_plot import cluster_colors, pair_plot_specs
+
+
+def test_specs_share_one_correlation_matrix(tmp_path):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(100, 4))
+    names = ["a", "b", "c", "d"]
+    clusters = rng.integers(0, 3, 100)
+
+    specs, corr = pair_plot_specs(X, names, clusters, str(tmp_path / "m.png"),
+                                  panels=[("a", "c", str(tmp_path / "ac.png"))])
+
+    np.testing.assert_allclose(corr, pd.DataFrame(X, columns=names).corr().to_numpy())
+    assert [spec.path for spec in specs] == [str(tmp_path / "m.png"), str(tmp_path / "ac.png")]
+    assert specs[1].data["r"] == corr[2, 0]
+    np.testing.assert_array_equal(specs[1].data["y"], X[:, 2])
+
+
+def test_point_colours_follow_the_colormap_over_the_cluster_range():
+    point_colors, palette, codes = cluster_colors(np.array([2, 0, 1, 2]))
+
+    np.testing.assert_array_equal(codes, [0, 1, 2])
+    np.testing.assert_allclose(palette, colormaps["viridis"]([0.0, 0.5, 1.0]))
+    np.testing.assert_allclose(point_colors, palette[[2, 0, 1, 2]])
@@ -1,26 +1,15 @@
 # tests/test_pca_var.py
 # Check that the first two principal components explain at least 60% of the variance.
-# used the same cleaning as in run_kmeans.py
+# uses the PCA fitted by pca_clusters.py from the model store (src/model_store.py);
+# it is only refit when the standardized data changed (empty store in tmp_path, see conftest.py)
 
-import pandas as pd
-from sklearn.decomposition import PCA
+from pca_clusters import fit_pca
 
-def test_pca_two_components_explain_enough_variance():
-    df = pd.read_csv("results/happiness_standardized.csv")
+def test_pca_two_components_explain_enough_variance(model_store, features_std):
+    # same matrix pca_clusters.py fits on (binary copy of happiness_standardized.csv, see conftest.py)
+    X = features_std
 
-    factor_std_cols = [
-        "log_GDP_std",
-        "Social_Support_std",
-        "Life_expectancy_std",
-        "Freedom_std",
-        "Generosity_std",
-        "Corruption_std",
-    ]
-    
-    X = df[factor_std_cols].values
-
-    pca = PCA(n_components=2)
-    pca.fit(X)
+    pca = fit_pca(X)
     
     var_ratio = pca.explained_variance_ratio_
     total_explained = var_ratio.sum()
@@ -30,7 +19,3 @@ def test_pca_two_components_explain_enough_variance():
 
     # Require at least 60% of total variance explained by PC1+PC2
     assert total_explained >= 0.60
-
-if __name__ == "__main__":
-    test_pca_two_components_explain_enough_variance()
-    print("PCA variance test passed.")
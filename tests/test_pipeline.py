@@ -0,0 +1,146 @@
+# test_pipeline.py
+# Check that the declared step inputs/outputs form a valid dependency graph,
+# and that a parallel run records every span once, shares the CPUs, parses
+# the raw data once and survives a worker that dies.
+
+import json
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from instrument import TRACE_LINES
+from pipeline import (MAY_RUN, RAW_FILE, STATE_FILE, STEPS, Step, build_graph, file_hash, plan,
+                      run_pipeline, topological_order, why_run)
+
+
+def test_every_step_runs_after_its_inputs_are_produced():
+    order = topological_order(STEPS)
+    position = {name: i for i, name in enumerate(order)}
+
+    assert len(order) == len(STEPS)
+    for name, upstream in build_graph(STEPS).items():
+        for dep in upstream:
+            assert position[dep] < position[name]
+
+
+def test_independent_branches_after_standardization():
+    graph = build_graph(STEPS)
+
+    # PCA, residual and no-GDP branches do not depend on each other
+    assert "run_kmeans_no_gdp" not in graph["pca_clusters"]
+    assert "run_kmeans_no_gdp" not in graph["gdp_residuals"]
+    assert graph["run_kmeans_no_gdp"] == {"standardize_data"}
+
+
+def test_cycle_is_rejected():
+    steps = [
+        Step("a", "a", inputs=["y.csv"], outputs=["x.csv"]),
+        Step("b", "b", inputs=["x.csv"], outputs=["y.csv"]),
+    ]
+    with pytest.raises(ValueError):
+        build_graph(steps)
+
+
+def test_step_reruns_only_when_an_input_changes(tmp_path):
+    in_file = tmp_path / "in.csv"
+    out_file = tmp_path / "out.csv"
+    in_file.write_text("a,b\n1,2\n")
+    out_file.write_text("done\n")
+    step = Step("x", "x", inputs=[str(in_file)], outputs=[str(out_file)])
+
+    signature = {"inputs": {str(in_file): file_hash(in_file)}, "source": "s", "params": "p"}
+    state = {"x": signature}
+    assert why_run(step, signature, state) is None
+
+    in_file.write_text("a,b\n1,3\n")
+    signature = {"inputs": {str(in_file): file_hash(in_file)}, "source": "s", "params": "p"}
+    assert why_run(step, signature, state) == f"input changed: {in_file}"
+
+
+
+def test_parallel_run_records_each_span_once(tmp_path, monkeypatch):
+    for name in ("trace_step_a", "trace_step_b"):
+        (tmp_path / f"{name}.py").write_text("def main():\n    print('ran')\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.chdir(tmp_path)
+    steps = [Step("trace_step_a", "a"), Step("trace_step_b", "b")]
+
+    assert run_pipeline(steps, jobs=2, force=True, figures="none")
+
+    names = [json.loads(line)["name"] for line in open(TRACE_LINES)]
+    assert names.count("import libraries") == 1
+    assert names.count("trace_step_a") == names.count("trace_step_b") == 1
+    assert names.count("run") == 1
+
+
+def test_nested_pools_get_a_share_of_the_cpus(tmp_path, monkeypatch):
+    code = ("from shared_matrix import resolve_jobs\n"
+            "def main():\n"
+            "    open(__name__ + '.txt', 'w').write(str(resolve_jobs(None, 1000)))\n")
+    for name in ("budget_step_a", "budget_step_b"):
+        (tmp_path / f"{name}.py").write_text(code)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr("os.cpu_count", lambda: 8)
+
+    assert run_pipeline([Step("budget_step_a", "a"), Step("budget_step_b", "b")], jobs=4, force=True)
+
+    assert (tmp_path / "budget_step_a.txt").read_text() == "2"
+    assert (tmp_path / "budget_step_b.txt").read_text() == "2"
+
+
+def test_workers_share_the_raw_data_parsed_before_the_fork(tmp_path, monkeypatch):
+    code = ("import load_data\n"
+            "def main():\n"
+            "    open(__name__ + '.txt', 'w').write(str(len(load_data._CACHE)))\n"
+            "    load_data.load_raw()\n")
+    for name in ("raw_step_a", "raw_step_b"):
+        (tmp_path / f"{name}.py").write_text(code)
+    (tmp_path / "data").mkdir()
+    (tmp_path / RAW_FILE).write_text("Country name;Ladder score\nFinland;7,7\nDenmark;7,6\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr("load_data._CACHE", {})
+
+    steps = [Step("raw_step_a", "a", inputs=[RAW_FILE]), Step("raw_step_b", "b", inputs=[RAW_FILE])]
+    assert run_pipeline(steps, jobs=2, force=True, figures="none")
+
+    # the parent parsed the file once; each forked worker starts with it cached
+    assert (tmp_path / "raw_step_a.txt").read_text() == "1"
+    assert (tmp_path / "raw_step_b.txt").read_text() == "1"
+
+
+def test_dead_worker_fails_its_step_and_keeps_the_finished_ones(tmp_path, monkeypatch, capsys):
+    (tmp_path / "crash_step_a.py").write_text("def main():\n    open('a.txt', 'w').write('a')\n")
+    (tmp_path / "crash_step_b.py").write_text("import os, signal\n"
+                                              "def main():\n    os.kill(os.getpid(), signal.SIGKILL)\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.chdir(tmp_path)
+    steps = [Step("crash_step_a", "a", outputs=["a.txt"]), Step("crash_step_b", "b", inputs=["a.txt"])]
+
+    with pytest.raises(BrokenProcessPool):
+        run_pipeline(steps, jobs=2, force=True, figures="none")
+
+    assert "ERROR while running src/crash_step_b.py" in capsys.readouterr().out
+    state = json.loads((tmp_path / STATE_FILE).read_text())
+    assert list(state) == ["crash_step_a"]
+
+
+def test_dry_run_marks_downstream_steps_as_maybe(tmp_path, monkeypatch):
+    (tmp_path / "plan_step_a.py").write_text("def main(n):\n    open('a.txt', 'w').write('a')\n")
+    (tmp_path / "plan_step_b.py").write_text("def main():\n    open('b.txt', 'w').write('b')\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.chdir(tmp_path)
+    step_b = Step("plan_step_b", "b", inputs=["a.txt"], outputs=["b.txt"])
+    assert run_pipeline([Step("plan_step_a", "a", outputs=["a.txt"], params={"n": 1}), step_b],
+                        jobs=1, figures="none")
+
+    # a reruns with a new parameter but writes the same output: b may run, and is skipped
+    steps = [Step("plan_step_a", "a", outputs=["a.txt"], params={"n": 2}), step_b]
+    reasons = plan(steps)
+    assert reasons["plan_step_a"] == "parameters changed"
+    assert reasons["plan_step_b"].startswith(MAY_RUN)
+
+    (tmp_path / "b.txt").write_text("marker")
+    assert run_pipeline(steps, jobs=1, figures="none")
+    assert (tmp_path / "b.txt").read_text() == "marker"
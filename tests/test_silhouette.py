@@ -0,0 +1,32 @@
+# test_silhouette.py
+# The block-wise silhouette must match sklearn; the sampled estimate must cover it.
+
+import numpy as np
+from sklearn.metrics import silhouette_samples, silhouette_score
+
+from silhouette import silhouette_estimate, silhouette_exact, silhouette_values
+
+
+def make_data(n_per_cluster=300):
+    rng = np.random.default_rng(1)
+    X = np.vstack([rng.normal(c, 1.0, size=(n_per_cluster, 4)) for c in (-2, 0, 3)])
+    labels = np.repeat([5, 7, 9], n_per_cluster)
+    return X, labels
+
+
+def test_blocked_silhouette_matches_sklearn_with_tiny_memory_limit():
+    X, labels = make_data()
+
+    # 0.05 MB forces many small blocks and per-cluster sums (no dense one-hot)
+    values = silhouette_values(X, labels, max_memory_mb=0.05)
+    np.testing.assert_allclose(values, silhouette_samples(X, labels), atol=1e-10)
+    assert abs(silhouette_exact(X, labels) - silhouette_score(X, labels)) < 1e-10
+
+
+def test_sampled_estimate_interval_contains_exact_score():
+    X, labels = make_data()
+    exact = silhouette_exact(X, labels)
+
+    estimate, low, high = silhouette_estimate(X, labels, sample_size=200, confidence=0.99)
+    assert low <= exact <= high
+    assert low < estimate < high
@@ -0,0 +1,41 @@
+# test_synthetic_data.py
+# Check that synthetic WHR files parse with the real loader and keep the
+# correlation structure of the drivers.
+
+import numpy as np
+import pandas as pd
+
+from load_data import load_raw, read_header
+from synthetic_data import COLUMNS, DRIVER_COLS, DRIVER_CORR, generate, write_csv
+
+
+def test_synthetic_file_parses_like_the_real_one(tmp_path):
+    path = write_csv(tmp_path / "whr.csv", 20_000, random_state=1)
+    df = load_raw(path=path)
+
+    assert read_header(path) == COLUMNS
+    assert "," in path.read_text().splitlines()[1]  # decimal commas
+    assert len(df) == 20_000 and df["Country name"].is_unique
+    assert df[DRIVER_COLS].dtypes.eq(np.float64).all()
+    assert (df[DRIVER_COLS].min() >= 0).all()
+    assert 0.005 < df[DRIVER_COLS[0]].isna().mean() < 0.04
+
+    corr = df[DRIVER_COLS].dropna().corr().to_numpy()
+    assert np.abs(corr - DRIVER_CORR).max() < 0.1
+
+
+def test_chunked_write_equals_one_chunk(tmp_path):
+    one = write_csv(tmp_path / "one.csv", 1_000, random_state=2, chunk_rows=1_000)
+    many = write_csv(tmp_path / "many.csv", 1_000, random_state=2, chunk_rows=300)
+
+    a, b = pd.read_csv(one, sep=";"), pd.read_csv(many, sep=";")
+    assert len(b) == 1_000
+    assert b["Country name"].is_unique
+    # chunks draw from their own seeds, so only the shape is the same
+    assert list(a.columns) == list(b.columns)
+
+
+def test_panel_columns():
+    df = generate(50, panel=True)
+    assert {"year", "Regional indicator"} <= set(df.columns)
+    assert df["year"].between(2005, 2024).all()